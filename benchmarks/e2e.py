@@ -0,0 +1,243 @@
+"""
+端到端 HTTP 基准测试
+
+通过 httpx.AsyncClient + ASGITransport 直接驱动真实的 ASGI 应用（包括全部中间件、依赖注入与序列化），
+数据库使用 SQLite（aiosqlite），Redis 使用进程内替身（benchmarks/fake_redis.py），不需要任何外部服务。
+
+用法：
+    python -m benchmarks.e2e
+    python -m benchmarks.e2e --requests 500 --concurrency 20 --scenario project_list_page_1 --output bench.json
+
+输出为 JSON：每个场景的请求数、错误数、吞吐（req/s）以及 p50/p95/p99 延迟（毫秒）。
+为了不让控制台日志干扰结果，默认关闭 INFO 日志（LOG_SAMPLING={"INFO": 0}），可以用环境变量覆盖。
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BENCH_PASSWORD = "Bench@123456"
+
+
+def configure_environment(db_path: str) -> None:
+    """必须在导入 src 之前调用，Settings 在首次导入时读取环境变量"""
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ.setdefault("LOG_SAMPLING", '{"INFO": 0}')
+    os.environ.setdefault("TRACING_ENABLED", "false")
+    os.environ.setdefault("SLOW_QUERY_EXPLAIN", "false")
+
+
+async def prepare_database(users: int, projects: int, docs: int, viewers_per_project: int, seed: int) -> dict:
+    """建表并批量写入基准数据，返回场景需要用到的 ID"""
+    from sqlalchemy import insert
+    from src.core.server.database import Base, engine
+    from src.features.doc.models import Doc
+    from src.features.project.models import Project, project_viewers
+    from src.features.user.models import User, user_roles
+    from src.main import check_and_init_database
+
+    rng = random.Random(seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # 创建角色与 admin 用户
+    await check_and_init_database()
+
+    hashed = User.make_password(BENCH_PASSWORD)
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {"username": f"bench{i}", "email": f"bench{i}@example.com", "hashed_password": hashed,
+             "nickname": f"压测用户{i}"}
+            for i in range(users)
+        ])
+        user_ids = [1] + list(range(2, users + 2))
+        await conn.execute(insert(user_roles), [{"user_id": user_id, "role_id": 1} for user_id in user_ids[1:]])
+        # 前 10% 的项目属于 admin，用于更新可见人员场景
+        admin_projects = max(projects // 10, 1)
+        await conn.execute(insert(Project), [
+            {"name": f"项目{i}", "owner_id": 1 if i < admin_projects else rng.choice(user_ids), "project_type": 1}
+            for i in range(projects)
+        ])
+        project_ids = list(range(1, projects + 1))
+        await conn.execute(insert(project_viewers), [
+            {"project_id": project_id, "user_id": user_id}
+            for project_id in project_ids
+            for user_id in rng.sample(user_ids, min(viewers_per_project, len(user_ids)))
+        ])
+        await conn.execute(insert(Doc), [
+            {"file_name": f"文档{i}.pdf", "file_uuid": f"bench-{i}", "owner_id": rng.choice(user_ids),
+             "project_id": rng.choice(project_ids), "status": 0}
+            for i in range(docs)
+        ])
+    return {"user_ids": user_ids, "admin_project_ids": project_ids[:admin_projects]}
+
+
+def build_scenarios(context: dict, bypass_cache: bool) -> Dict[str, Callable]:
+    """每个场景是一个接收 (client, 序号) 的协程函数，返回响应"""
+    from src.core.conf.config import settings
+
+    auth = {"Authorization": f"Bearer {context['token']}"}
+    if bypass_cache:
+        auth["Cache-Control"] = "no-store"
+    user_ids = context["user_ids"]
+    rng = random.Random(0)
+
+    def list_page(path: str, page_num: int):
+        async def run(client, i):
+            return await client.get(path, params={"page_num": page_num, "page_size": 10}, headers=auth)
+        return run
+
+    async def login(client, i):
+        return await client.post("/api/v1/auth/login", json={
+            "username": "admin", "password": settings.ADMIN_PASSWORD.get_secret_value()})
+
+    async def project_create(client, i):
+        return await client.post("/api/v1/project/create", headers=auth, json={
+            "name": f"压测项目-{context['run_id']}-{i}", "viewers": rng.sample(user_ids, 3), "project_type": 1})
+
+    async def project_viewers_update(client, i):
+        project_id = context["admin_project_ids"][i % len(context["admin_project_ids"])]
+        return await client.put(f"/api/v1/project/update/viewers/{project_id}", headers=auth,
+                                json={"viewers": rng.sample(user_ids, 3)})
+
+    scenarios = {"login": login}
+    for page_num in (1, 10, 50):
+        scenarios[f"project_list_page_{page_num}"] = list_page("/api/v1/project/list", page_num)
+    for page_num in (1, 10, 100):
+        scenarios[f"doc_list_page_{page_num}"] = list_page("/api/v1/doc/list", page_num)
+    scenarios["project_create"] = project_create
+    scenarios["project_viewers_update"] = project_viewers_update
+    return scenarios
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法百分位"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, scenario: Callable, total: int, concurrency: int, warmup: int) -> dict:
+    for i in range(warmup):
+        await scenario(client, -i - 1)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await scenario(client, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    import httpx
+    from benchmarks.fake_redis import FakeRedis
+    from src.core.server import dependencies
+    from src.core.server.database import engine
+    from src.main import app
+
+    dependencies._redis_client = FakeRedis()
+    context = await prepare_database(args.users, args.projects, args.docs, args.viewers, args.seed)
+    context["run_id"] = int(time.time())
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        from src.core.conf.config import settings
+        response = await client.post("/api/v1/auth/login", json={
+            "username": "admin", "password": settings.ADMIN_PASSWORD.get_secret_value()})
+        context["token"] = response.json()["data"]["access"]
+
+        scenarios = build_scenarios(context, args.bypass_cache)
+        selected = args.scenario or list(scenarios)
+        results = {}
+        for name in selected:
+            if name not in scenarios:
+                raise SystemExit(f"未知场景 {name}，可选：{', '.join(scenarios)}")
+            results[name] = await run_scenario(client, scenarios[name], args.requests, args.concurrency, args.warmup)
+    await engine.dispose()
+
+    return {
+        "meta": {
+            "git_rev": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": "sqlite+aiosqlite",
+            "redis": "in-process",
+            "dataset": {"users": args.users, "projects": args.projects, "docs": args.docs},
+            "bypass_cache": args.bypass_cache,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="端到端 HTTP 基准测试")
+    parser.add_argument("--requests", type=int, default=200, help="每个场景的请求数")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发数")
+    parser.add_argument("--warmup", type=int, default=10, help="每个场景的预热请求数")
+    parser.add_argument("--scenario", action="append", help="只运行指定场景，可重复")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--viewers", type=int, default=3, help="每个项目的可见用户数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bypass-cache", action="store_true", help="发送 Cache-Control: no-store，测量未命中缓存的路径")
+    parser.add_argument("--output", help="结果写入文件，默认输出到标准输出")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        configure_environment(os.path.join(tmp_dir, "bench.db"))
+        result = asyncio.run(run(args))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+进程内的 Redis 替身，只实现项目用到的命令（字符串、集合、哈希、过期、pipeline），行为与 decode_responses=True 的客户端一致。
+用于基准测试，不需要启动 Redis 服务。
+"""
+import time
+from typing import Any, Dict, Optional
+
+
+class FakeRedis:
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expiry: Dict[str, float] = {}
+
+    def _alive(self, key: str) -> bool:
+        expiry = self._expiry.get(key)
+        if expiry is not None and expiry <= time.monotonic():
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+        return key in self._data
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._data[key] if self._alive(key) else None
+
+    async def mget(self, keys):
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value, ex: int = None, nx: bool = False):
+        if nx and self._alive(key):
+            return None
+        self._data[key] = str(value)
+        self._expiry.pop(key, None)
+        if ex:
+            await self.expire(key, ex)
+        return True
+
+    async def setex(self, key: str, seconds: int, value):
+        return await self.set(key, value, ex=seconds)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(await self.get(key) or 0) + amount
+        self._data[key] = str(value)
+        return value
+
+    async def delete(self, *keys) -> int:
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+        return removed
+
+    async def exists(self, *keys) -> int:
+        return sum(1 for key in keys if self._alive(key))
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if not self._alive(key):
+            return False
+        self._expiry[key] = time.monotonic() + seconds
+        return True
+
+    async def sadd(self, key: str, *members) -> int:
+        self._alive(key)
+        members_set = self._data.setdefault(key, set())
+        before = len(members_set)
+        members_set.update(str(member) for member in members)
+        return len(members_set) - before
+
+    async def smembers(self, key: str) -> set:
+        return set(self._data[key]) if self._alive(key) else set()
+
+    async def hset(self, key: str, field: str, value) -> int:
+        self._alive(key)
+        fields = self._data.setdefault(key, {})
+        added = 0 if str(field) in fields else 1
+        fields[str(field)] = str(value)
+        return added
+
+    async def hdel(self, key: str, *fields) -> int:
+        if not self._alive(key):
+            return 0
+        removed = sum(1 for field in fields if self._data[key].pop(str(field), None) is not None)
+        if not self._data[key]:
+            await self.delete(key)
+        return removed
+
+    async def hgetall(self, key: str) -> dict:
+        return dict(self._data[key]) if self._alive(key) else {}
+
+    async def ping(self) -> bool:
+        return True
+
+    async def aclose(self) -> None:
+        pass
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """把命令排队，execute 时依次执行"""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.commands.clear()
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+
+        def queue(*args, **kwargs) -> "FakePipeline":
+            self.commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self, raise_on_error: bool = True) -> list:
+        commands, self.commands = self.commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
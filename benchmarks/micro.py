@@ -0,0 +1,255 @@
+"""
+核心组件微基准与回归比较
+
+run：对每个基准先标定循环次数（单个样本不少于 --min-time），再采集 --samples 个样本（单次调用耗时），
+     结果按 git 版本写入 benchmarks/history/<rev>.json（工作区有改动时版本号带 -dirty 后缀）
+compare：对两个版本的样本做 Mann-Whitney U 检验（正态近似，含并列校正），p 值小于 --alpha 且中位数
+     变慢超过 --threshold 时判定为回归，存在回归时以退出码 1 结束，便于接入 CI
+
+用法：
+    python -m benchmarks.micro run
+    git checkout <base> && python -m benchmarks.micro run && git checkout -
+    python -m benchmarks.micro compare <base> <target>
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history")
+
+
+# -------------------------
+# 基准
+# -------------------------
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    """返回 {名称: 无参可调用对象}，准备数据的开销不计入"""
+    from sqlalchemy.dialects import mysql
+
+    from src.common.utils.pagination import build_page_queries
+    from src.common.utils.security import create_access_token, validate_jwt_token
+    from src.core.base.response import BaseResponse
+    from src.features.doc.models import Doc  # noqa: F401  保证关系映射可解析
+    from src.features.project.models import Project
+    from src.features.project.schema import ProjectListData
+    from src.features.project.service import project_service
+    from src.features.user.models import User
+    from src.features.user.schema import UpdateUserSchema
+
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    projects = []
+    for i in range(50):
+        project = Project(id=i, name=f"项目{i}", create_time=now, project_type=1, owner_id=1)
+        project.viewers = [User(id=j, username=f"user{j}", nickname=None) for j in range(3)]
+        project.document_count = i
+        projects.append(project)
+    page = {
+        "list": [ProjectListData.model_validate(project) for project in projects[:10]],
+        "total": 1000, "total_pages": 100, "page_num": 1, "page_size": 10,
+    }
+    token_data = {"sub": "1", "username": "admin", "email": "admin@example.com", "is_superuser": True}
+    token = create_access_token(token_data, timedelta(days=1))
+    update_payload = {"id": 1, "username": "new_username", "email": "new@example.com",
+                      "nickname": "新昵称", "is_superuser": False}
+    dialect = mysql.dialect()
+
+    def paginate_query():
+        count_query, page_query = build_page_queries(project_service.get_project_list("项目"), 3, 10)
+        return count_query.compile(dialect=dialect), page_query.compile(dialect=dialect)
+
+    return {
+        "base_response_success": lambda: BaseResponse.success(data=page),
+        "paginate_query_construction": paginate_query,
+        "create_access_token": lambda: create_access_token(token_data, timedelta(days=1)),
+        "validate_jwt_token": lambda: validate_jwt_token(token),
+        "update_user_schema_validation": lambda: UpdateUserSchema(**update_payload),
+        "project_list_model_validate": lambda: [ProjectListData.model_validate(project) for project in projects],
+    }
+
+
+def calibrate(func: Callable, min_time: float) -> int:
+    """找到让一个样本耗时不少于 min_time 的循环次数"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time:
+            return loops
+        loops *= 2
+
+
+def measure(func: Callable, samples: int, min_time: float) -> Tuple[int, List[float]]:
+    loops = calibrate(func, min_time)
+    results = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        results.append((time.perf_counter() - start) / loops)
+    return loops, results
+
+
+# -------------------------
+# 统计
+# -------------------------
+def mann_whitney_u(a: List[float], b: List[float]) -> Tuple[float, float]:
+    """返回 (U, 双侧 p 值)，使用正态近似与并列校正"""
+    n1, n2 = len(a), len(b)
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            ranks[k] = rank
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    rank_sum_a = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u1 = rank_sum_a - n1 * (n1 + 1) / 2
+    u = min(u1, n1 * n2 - u1)
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2 + 0.5) / math.sqrt(variance)
+    return u, min(1.0, math.erfc(abs(z) / math.sqrt(2)))
+
+
+def compare_results(base: dict, target: dict, alpha: float, threshold: float) -> List[dict]:
+    rows = []
+    for name, target_result in target["results"].items():
+        base_result = base["results"].get(name)
+        if base_result is None:
+            continue
+        base_median = statistics.median(base_result["samples"])
+        target_median = statistics.median(target_result["samples"])
+        ratio = target_median / base_median if base_median else float("inf")
+        _, p_value = mann_whitney_u(base_result["samples"], target_result["samples"])
+        significant = p_value < alpha
+        if significant and ratio > 1 + threshold:
+            verdict = "slower"
+        elif significant and ratio < 1 - threshold:
+            verdict = "faster"
+        else:
+            verdict = "same"
+        rows.append({
+            "name": name,
+            "base_median_us": round(base_median * 1e6, 3),
+            "target_median_us": round(target_median * 1e6, 3),
+            "ratio": round(ratio, 4),
+            "p_value": round(p_value, 6),
+            "verdict": verdict,
+        })
+    return rows
+
+
+# -------------------------
+# 历史文件
+# -------------------------
+def git_revision() -> str:
+    try:
+        rev = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                      stderr=subprocess.DEVNULL).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD", "--", "src"], stderr=subprocess.DEVNULL).returncode
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{rev}-dirty" if dirty else rev
+
+
+def history_path(rev: str, history_dir: str = HISTORY_DIR) -> str:
+    return os.path.join(history_dir, f"{rev}.json")
+
+
+def load_history(rev: str, history_dir: str = HISTORY_DIR) -> dict:
+    path = rev if rev.endswith(".json") else history_path(rev, history_dir)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_command(args) -> None:
+    benchmarks = build_benchmarks()
+    selected = {name: func for name, func in benchmarks.items() if not args.filter or args.filter in name}
+    results = {}
+    for name, func in selected.items():
+        loops, samples = measure(func, args.samples, args.min_time)
+        results[name] = {
+            "loops": loops,
+            "samples": samples,
+            "median": statistics.median(samples),
+            "mean": statistics.fmean(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        }
+        print(f"{name:<32} {results[name]['median'] * 1e6:>12.3f} us  (loops={loops})", file=sys.stderr)
+
+    rev = args.rev or git_revision()
+    document = {
+        "git_rev": rev,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    os.makedirs(args.history_dir, exist_ok=True)
+    path = history_path(rev, args.history_dir)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(path)
+
+
+def compare_command(args) -> int:
+    base = load_history(args.base, args.history_dir)
+    target = load_history(args.target, args.history_dir)
+    rows = compare_results(base, target, args.alpha, args.threshold)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'benchmark':<32} {'base(us)':>12} {'target(us)':>12} {'ratio':>8} {'p':>10}  verdict")
+        for row in rows:
+            print(f"{row['name']:<32} {row['base_median_us']:>12.3f} {row['target_median_us']:>12.3f} "
+                  f"{row['ratio']:>8.3f} {row['p_value']:>10.2g}  {row['verdict']}")
+    return 1 if any(row["verdict"] == "slower" for row in rows) else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="核心组件微基准")
+    parser.add_argument("--history-dir", default=HISTORY_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="运行微基准并写入历史文件")
+    run_parser.add_argument("--samples", type=int, default=20)
+    run_parser.add_argument("--min-time", type=float, default=0.02, help="单个样本的最短耗时（秒）")
+    run_parser.add_argument("--filter", help="只运行名称包含该字符串的基准")
+    run_parser.add_argument("--rev", help="历史文件名，默认当前 git 版本")
+
+    compare_parser = sub.add_parser("compare", help="比较两个版本的结果")
+    compare_parser.add_argument("base", help="基准版本（或历史文件路径）")
+    compare_parser.add_argument("target", help="对比版本（或历史文件路径）")
+    compare_parser.add_argument("--alpha", type=float, default=0.01, help="显著性水平")
+    compare_parser.add_argument("--threshold", type=float, default=0.05, help="中位数变化超过该比例才报告")
+    compare_parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.command == "run":
+        run_command(args)
+    else:
+        sys.exit(compare_command(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+流量回放
+
+读取 TrafficCaptureMiddleware 采集的 JSONL（格式见 src/common/utils/traffic_capture.py），按原始时间间隔
+（或 --speed 倍速，0 表示不等待、尽快发出）向目标服务重新发出请求，按路由对比采集时与回放时的延迟分布。
+
+- 带 Authorization 的请求使用回放工具自己的令牌（--token，或用 --username/--password 登录获取）
+- 采集时记录了请求体原文（TRAFFIC_CAPTURE_BODIES=true）则原样发送，否则按形状合成同结构的请求体；
+  非 JSON 请求体（如文件上传）无法还原，计入 skipped
+- 回放时的状态码与采集时不同（如合成的请求体没有通过校验）计入 status_mismatch，便于判断回放是否可信
+- schedule_lag 是实际发出时间落后于计划时间的分位数，数值偏大说明回放端本身成为了瓶颈
+
+用法：
+    python -m benchmarks.replay data/traffic/requests.jsonl --target http://127.0.0.1:8000 --username admin --password ...
+    python -m benchmarks.replay data/traffic/requests.jsonl --in-process --speed 0 --concurrency 20 --output replay.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from benchmarks.e2e import git_revision, percentile
+
+LOGIN_PATH = "/api/v1/auth/login"
+
+
+def load_records(paths: Iterable[str], routes: Optional[List[str]] = None, limit: Optional[int] = None) -> List[dict]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if routes and record.get("route") not in routes:
+                    continue
+                records.append(record)
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+def synthesize(shape):
+    """按采集到的形状合成同结构的值"""
+    if isinstance(shape, dict):
+        if "$list" in shape:
+            return [synthesize(shape["item"]) for _ in range(shape["$list"])] if shape["item"] is not None else []
+        return {key: synthesize(item) for key, item in shape.items()}
+    if isinstance(shape, str):
+        if shape.startswith("str:"):
+            return "x" * int(shape[4:])
+        return {"int": 1, "float": 1.0, "bool": True}.get(shape)
+    return None
+
+
+def request_body(record: dict):
+    """返回 (可回放, JSON 请求体)"""
+    if "body" in record:
+        return True, record["body"]
+    shape = record.get("body_shape")
+    if not record.get("body_size"):
+        return True, None
+    if record.get("content_type") != "application/json" or shape in (None, "truncated", "invalid"):
+        return False, None
+    return True, synthesize(shape)
+
+
+def summarize(values: List[float]) -> dict:
+    values = sorted(values)
+    return {
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "mean_ms": round(statistics.fmean(values), 3) if values else 0.0,
+    }
+
+
+def build_report(results: List[dict], skipped: int, lags: List[float], elapsed: float) -> dict:
+    by_route: Dict[str, list] = defaultdict(list)
+    for result in results:
+        by_route[f"{result['method']} {result['route']}"].append(result)
+
+    routes = {}
+    for name, items in sorted(by_route.items()):
+        original = summarize([item["original_ms"] for item in items])
+        replay = summarize([item["replay_ms"] for item in items])
+        routes[name] = {
+            "requests": len(items),
+            "errors": sum(item["error"] is not None for item in items),
+            "status_mismatch": sum(item["status"] != item["original_status"] for item in items),
+            "original": original,
+            "replay": replay,
+            "delta_p50_ms": round(replay["p50_ms"] - original["p50_ms"], 3),
+            "delta_p95_ms": round(replay["p95_ms"] - original["p95_ms"], 3),
+            "ratio_p50": round(replay["p50_ms"] / original["p50_ms"], 3) if original["p50_ms"] else None,
+        }
+    return {
+        "meta": {
+            "git_rev": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "total": {
+            "requests": len(results),
+            "skipped": skipped,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+            "schedule_lag": summarize([lag * 1000 for lag in lags]),
+        },
+        "routes": routes,
+    }
+
+
+async def login(client, username: str, password: str) -> str:
+    response = await client.post(LOGIN_PATH, json={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["data"]["access"]
+
+
+async def replay(client, records: List[dict], speed: float, concurrency: int, token: Optional[str]) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[dict] = []
+    lags: List[float] = []
+    skipped = 0
+    base_ts = records[0]["ts"] if records else 0.0
+    start = time.perf_counter()
+
+    async def send(record: dict, body) -> None:
+        headers = {"Authorization": f"Bearer {token}"} if record.get("auth") and token else {}
+        sent = time.perf_counter()
+        status, error = None, None
+        try:
+            response = await client.request(record["method"], record["path"], params=record.get("query"),
+                                            json=body, headers=headers)
+            status = response.status_code
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            semaphore.release()
+        results.append({
+            "method": record["method"],
+            "route": record.get("route") or record["path"],
+            "original_status": record.get("status"),
+            "status": status,
+            "error": error,
+            "original_ms": record.get("duration_ms", 0.0),
+            "replay_ms": (time.perf_counter() - sent) * 1000,
+        })
+
+    tasks = set()
+    for record in records:
+        replayable, body = request_body(record)
+        if not replayable:
+            skipped += 1
+            continue
+        due = (record["ts"] - base_ts) / speed if speed > 0 else 0.0
+        delay = due - (time.perf_counter() - start)
+        if speed > 0 and delay > 0:
+            await asyncio.sleep(delay)
+        # 先占用并发名额再创建任务：进行中的任务数有上限，目标跟不上时的积压体现在 schedule_lag 上
+        await semaphore.acquire()
+        if speed > 0:
+            lags.append(max(0.0, time.perf_counter() - start - due))
+        task = asyncio.create_task(send(record, body))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    return build_report(results, skipped, lags, time.perf_counter() - start)
+
+
+async def run(args) -> dict:
+    import httpx
+
+    records = load_records(args.files, args.route, args.limit)
+    if args.in_process:
+        from src.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://replay"
+    else:
+        transport = None
+        base_url = args.target
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        token = args.token
+        if token is None and args.username:
+            token = await login(client, args.username, args.password or "")
+        report = await replay(client, records, args.speed, args.concurrency, token)
+    report["meta"].update({"target": base_url, "speed": args.speed, "concurrency": args.concurrency,
+                           "files": args.files})
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="回放采集的线上流量并对比延迟")
+    parser.add_argument("files", nargs="+", help="采集文件（JSONL），可传入多个轮转文件")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--target", help="目标服务地址，如 http://127.0.0.1:8000")
+    target.add_argument("--in-process", action="store_true", help="直接驱动本仓库的 ASGI 应用（使用当前配置的数据库）")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速，1 为原始速度，0 为不等待")
+    parser.add_argument("--concurrency", type=int, default=50, help="同时进行中的请求上限")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--route", action="append", help="只回放指定路由模板，可重复")
+    parser.add_argument("--limit", type=int, help="最多回放的请求数")
+    parser.add_argument("--token", help="带 Authorization 的请求使用的访问令牌")
+    parser.add_argument("--username", help="未提供 --token 时用于登录的用户名")
+    parser.add_argument("--password", help="登录密码")
+    parser.add_argument("--output", help="结果写入文件，默认输出到标准输出")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    result = asyncio.run(run(args))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
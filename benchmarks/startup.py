@@ -0,0 +1,185 @@
+"""
+冷启动耗时与启动预算
+
+每次测量都在全新的子进程中进行（模块缓存、连接池都是冷的），依次记录：
+- import_ms：导入 src.main（含创建应用、注册路由与中间件）
+- startup_ms：lifespan 启动阶段（初始化检查、连接预热），数据库已初始化，Redis 使用进程内替身
+- first_request_ms：启动后第一个请求（默认 /healthz）
+- openapi_ms：第一次请求 /openapi.json（有预生成文档时只是读文件）
+- first_response_ms：从父进程启动子进程到第一个请求完成的墙钟时间，包含解释器启动，最接近扩容时的真实等待
+
+另外用 python -X importtime 统计导入耗时，按顶层包汇总自身耗时，并列出最慢的模块，用于定位新增的重量级导入。
+中位数超过 BUDGET_MS 时以退出码 1 结束，tests/core/test_startup.py 用同样的预算做回归检查。
+
+用法：
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 5 --top 30 --output startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks.e2e import configure_environment, git_revision
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 预算按开发机实测值留出约一倍余量，新增的重量级导入或启动阶段的阻塞操作会明显越过它
+BUDGET_MS = {
+    "import_ms": 4000,
+    "startup_ms": 1000,
+    "first_request_ms": 300,
+    "first_response_ms": 8000,
+}
+# 只在特定操作中用到、不应出现在应用导入链上的模块
+DEFERRED_MODULES = ("aiosmtplib", "faker")
+
+
+async def measure(path: str, db_path: str) -> dict:
+    """子进程内执行：各阶段耗时（毫秒）"""
+    configure_environment(db_path)
+    started = time.perf_counter()
+    from src.main import app
+    result = {"import_ms": (time.perf_counter() - started) * 1000}
+
+    import httpx
+    from benchmarks.fake_redis import FakeRedis
+    from src.common.scripts.initial_data import ensure_initialized
+    from src.core.server import dependencies
+    from src.core.server.database import Base, engine
+
+    # 准备一个已初始化的库，测量的是常规重启而不是首次部署
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await ensure_initialized(engine)
+    await engine.dispose()
+    dependencies._redis_client = FakeRedis()
+
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        result["startup_ms"] = (time.perf_counter() - started) * 1000
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            started = time.perf_counter()
+            response = await client.get(path)
+            result["first_request_ms"] = (time.perf_counter() - started) * 1000
+            result["first_response_at"] = time.time()
+            result["status"] = response.status_code
+            started = time.perf_counter()
+            await client.get("/openapi.json")
+            result["openapi_ms"] = (time.perf_counter() - started) * 1000
+    result["deferred_loaded"] = [name for name in DEFERRED_MODULES if name in sys.modules]
+    return result
+
+
+def run_once(path: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        launched = time.time()
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child", "--path", path,
+             "--db", os.path.join(tmp, "startup.db")],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["first_response_ms"] = (result.pop("first_response_at") - launched) * 1000
+    return result
+
+
+def import_profile(top: int) -> dict:
+    """python -X importtime 的输出按顶层包汇总自身耗时（微秒 -> 毫秒）"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.main"], cwd=ROOT_DIR,
+                            capture_output=True, text=True, env={**os.environ, "LOG_SAMPLING": '{"INFO": 0}'}).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        packages[name.split(".")[0]] += self_us
+    return {
+        "total_ms": round(sum(self_us for _, self_us, _ in modules) / 1000, 1),
+        "modules": len(modules),
+        "packages": [{"name": name, "self_ms": round(us / 1000, 1)}
+                     for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]],
+        "slowest": [{"name": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cumulative_us / 1000, 1)}
+                    for name, self_us, cumulative_us in sorted(modules, key=lambda item: -item[1])[:top]],
+    }
+
+
+def summarize(runs: List[dict]) -> dict:
+    summary = {}
+    for metric in ("import_ms", "startup_ms", "first_request_ms", "openapi_ms", "first_response_ms"):
+        values = [run[metric] for run in runs]
+        summary[metric] = {"median": round(statistics.median(values), 1), "min": round(min(values), 1),
+                           "max": round(max(values), 1)}
+    return summary
+
+
+def check_budget(summary: dict, budget: Dict[str, float] = None) -> Dict[str, dict]:
+    """返回超出预算的指标"""
+    budget = budget or BUDGET_MS
+    return {metric: {"budget": limit, "median": summary[metric]["median"]}
+            for metric, limit in budget.items() if summary[metric]["median"] > limit}
+
+
+def run(args) -> dict:
+    runs = [run_once(args.path) for _ in range(args.runs)]
+    summary = summarize(runs)
+    report = {
+        "meta": {
+            "git_rev": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "path": args.path,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "summary": summary,
+        "over_budget": check_budget(summary),
+        "deferred_loaded": sorted({name for item in runs for name in item["deferred_loaded"]}),
+    }
+    if args.top:
+        report["imports"] = import_profile(args.top)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="冷启动耗时与启动预算")
+    parser.add_argument("--runs", type=int, default=3, help="测量次数（每次一个新进程），结果取中位数")
+    parser.add_argument("--path", default="/healthz", help="第一个请求的路径")
+    parser.add_argument("--top", type=int, default=20, help="导入耗时排行的条数，0 为不统计")
+    parser.add_argument("--output", help="结果写入文件，默认输出到标准输出")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.child:
+        sys.stdout.write(json.dumps(asyncio.run(measure(args.path, args.db))) + "\n")
+        return
+
+    report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    if report["over_budget"] or report["deferred_loaded"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
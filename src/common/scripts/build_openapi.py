@@ -0,0 +1,29 @@
+"""
+预生成 OpenAPI 文档（构建镜像时执行，运行时第一次访问 /docs 不再现场生成，见 src/core/base/openapi.py）
+
+用法：
+    python -m src.common.scripts.build_openapi
+    python -m src.common.scripts.build_openapi --output /tmp/openapi.json
+"""
+import argparse
+import time
+
+from src.core.base.openapi import DEFAULT_SCHEMA_PATH, build_schema
+from src.core.conf.config import settings
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="预生成 OpenAPI 文档")
+    parser.add_argument("--output", help="输出文件，默认 OPENAPI_SCHEMA_PATH（data/openapi.json）")
+    args = parser.parse_args(argv)
+
+    from src.main import app
+
+    path = args.output or settings.OPENAPI_SCHEMA_PATH or DEFAULT_SCHEMA_PATH
+    started = time.perf_counter()
+    schema = build_schema(app, path)
+    print(f"已写入 {path}（{len(schema.get('paths', {}))} 个路径，{(time.perf_counter() - started) * 1000:.1f}ms）")
+
+
+if __name__ == "__main__":
+    main()
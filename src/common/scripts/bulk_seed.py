@@ -0,0 +1,399 @@
+"""
+大批量造数（压测数据集）
+
+ORMDataGenerator 逐个构造 ORM 对象、按 100 行 flush/commit，适合几百行的演示数据；压测需要的百万、千万级数据
+走这里的批量模式：
+- 合成：行数据按 chunk 切分后交给进程池生成，每个 chunk 的随机种子由 (seed, 表, 起始 id) 决定，结果与进程数无关。
+  用户昵称、项目名使用 Faker，文档这类千万级的表只用预置词表与 random，避免 Faker 成为瓶颈；
+  数据规模、查看者与文档的分布由数据集规格（dataset_profiles.py）决定
+- 写入：主键由脚本预先分配（从当前 max(id) + 1 开始），不需要回读自增 id；默认用驱动层 executemany
+  （aiomysql 会改写为多行 VALUES），MySQL 上加 --load-data 时 worker 直接写 CSV，再用 LOAD DATA LOCAL INFILE 导入
+- 索引：导入前删除目标表上的二级索引（模型里 index=True 声明的非唯一索引，外键索引与唯一索引保留），导入结束后统一重建；
+  MySQL 会话内同时关闭 unique_checks / foreign_key_checks
+- 进度：每张表按秒输出已写入行数、吞吐与预计剩余时间，结束时汇总各阶段耗时
+
+用法：
+    python -m src.common.scripts.seed_data --bulk --profile large
+    python -m src.common.scripts.seed_data --bulk --profile large --load-data --workers 8 --load-workers 4
+"""
+import asyncio
+import csv
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from src.common.scripts.dataset_profiles import (
+    DatasetProfile, combine_digests, rows_digest, sample_projects, viewer_count,
+)
+
+# 与 ORMDataGenerator 使用同一套词表，生成的数据风格一致
+SURNAMES = ['王', '李', '张', '刘', '陈', '杨', '赵', '黄', '周', '吴',
+            '徐', '孙', '胡', '朱', '高', '林', '何', '郭', '马', '罗']
+INDUSTRIES = ['金融科技', '医疗健康', '教育培训', '电子商务', '智能制造',
+              '文化娱乐', '新能源', '人工智能', '物联网', '区块链',
+              '农业科技', '物流运输', '房地产', '旅游服务', '媒体广告']
+SUFFIXES = ['开发', '实施', '优化', '升级', '整合', '创新', '数字化转型']
+DOC_TYPES = ['合同', '报告', '方案', '计划', '协议', '规范', '指南', '手册',
+             '纪要', '通知', '函件', '请示', '批复', '总结', '分析']
+DOC_PREFIXES = ['项目', '技术', '商业', '财务', '市场', '产品', '设计', '测试',
+                '用户', '系统', '安全', '质量', '运营', '管理', '战略']
+EMAIL_DOMAINS = ['company.com', 'enterprise.cn', 'corp.net', 'test.org']
+
+# 每张表写入的列（顺序即 CSV 列顺序），关联表的 id 交给自增
+COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "user": ("id", "username", "email", "hashed_password", "nickname", "avatar",
+             "create_time", "update_time", "is_deleted"),
+    "user_roles": ("user_id", "role_id", "create_time", "update_time", "is_deleted"),
+    "project": ("id", "name", "owner_id", "project_type", "create_time", "update_time", "is_deleted"),
+    "project_viewers": ("project_id", "user_id", "create_time", "update_time", "is_deleted"),
+    "doc": ("id", "file_name", "file_uuid", "owner_id", "project_id", "status",
+            "create_time", "update_time", "is_deleted"),
+}
+# 每种 chunk 产出的表
+CHUNK_TABLES = {
+    "user": ("user", "user_roles"),
+    "project": ("project", "project_viewers"),
+    "doc": ("doc",),
+}
+DEFAULT_ROLE_ID = 1  # 普通用户
+MYSQL_NULL = "\\N"
+
+_START_DATE = datetime(2023, 1, 1)
+_DATE_RANGE_SECONDS = int((datetime(2024, 12, 31) - _START_DATE).total_seconds())
+
+_faker = None
+
+
+# -------------------------
+# 合成（在 worker 进程中执行）
+# -------------------------
+def _init_worker(locale: str) -> None:
+    global _faker
+    from faker import Faker
+    _faker = Faker(locale)
+
+
+def _random_datetime(rng: random.Random) -> str:
+    return (_START_DATE + timedelta(seconds=rng.randrange(_DATE_RANGE_SECONDS))).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _user_rows(rng: random.Random, start: int, count: int) -> Dict[str, list]:
+    users, roles = [], []
+    for user_id in range(start, start + count):
+        username = f"user{user_id}"
+        created = _random_datetime(rng)
+        nickname = _faker.name() if rng.random() > 0.3 else rng.choice(SURNAMES) + _faker.first_name()
+        avatar = f"https://avatar.example.com/{username}.jpg" if rng.random() > 0.5 else None
+        is_deleted = int(user_id % 100 == 0)
+        users.append((user_id, username, f"{username}@{rng.choice(EMAIL_DOMAINS)}",
+                      # 与 ORMDataGenerator 一致：密码与用户名相同
+                      hashlib.sha256(username.encode()).hexdigest(),
+                      nickname, avatar, created, created, is_deleted))
+        roles.append((user_id, DEFAULT_ROLE_ID, created, created, 0))
+    return {"user": users, "user_roles": roles}
+
+
+def _project_rows(rng: random.Random, start: int, count: int, refs: dict) -> Dict[str, list]:
+    profile: DatasetProfile = refs["profile"]
+    low, high = refs["user_range"]
+    projects, viewers = [], []
+    for project_id in range(start, start + count):
+        created = _random_datetime(rng)
+        name = f"{_faker.company_prefix()}{rng.choice(INDUSTRIES)}{rng.choice(SUFFIXES)}项目"
+        projects.append((project_id, name, rng.randint(low, high), rng.randint(0, 1),
+                         created, created, int(project_id % 50 == 0)))
+        viewers_count = viewer_count(rng, profile, project_id, refs["hot_project"], high - low + 1)
+        for user_id in rng.sample(range(low, high + 1), viewers_count):
+            viewers.append((project_id, user_id, created, created, 0))
+    return {"project": projects, "project_viewers": viewers}
+
+
+def _doc_rows(rng: random.Random, start: int, count: int, refs: dict) -> Dict[str, list]:
+    profile: DatasetProfile = refs["profile"]
+    user_low, user_high = refs["user_range"]
+    statuses = rng.choices((0, 1, 2, 3), weights=profile.status_weights, k=count)
+    project_ids = sample_projects(rng, profile, refs["project_range"], refs["hot_project"], count)
+    docs = []
+    for offset, doc_id in enumerate(range(start, start + count)):
+        created = _random_datetime(rng)
+        file_name = (f"{rng.choice(DOC_PREFIXES)}{rng.choice(DOC_TYPES)}-{doc_id}"
+                     f"-V{rng.randint(1, 5)}.{rng.randint(0, 3)}")
+        file_uuid = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        docs.append((doc_id, file_name, file_uuid, rng.randint(user_low, user_high),
+                     project_ids[offset], statuses[offset],
+                     created, created, int(doc_id % 80 == 0)))
+    return {"doc": docs}
+
+
+def _write_csv(directory: str, table: str, start: int, rows: list) -> str:
+    path = os.path.join(directory, f"{table}-{start}.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        for row in rows:
+            writer.writerow([MYSQL_NULL if value is None else value for value in row])
+    return path
+
+
+def build_chunk(kind: str, start: int, count: int, seed: int, refs: dict,
+                csv_dir: Optional[str] = None) -> Tuple[Dict[str, object], Dict[str, Tuple[int, str]]]:
+    """
+    生成 [start, start + count) 这一段主键对应的行，返回 ({表名: 行列表}, {表名: (行数, 摘要)})；
+    传入 csv_dir 时行直接写成 CSV 文件，第一项为 {表名: 文件路径}，避免大块数据在进程间来回序列化
+    """
+    if _faker is None:
+        _init_worker(refs.get("locale", "zh_CN"))
+    rng = random.Random(f"{seed}:{kind}:{start}")
+    _faker.seed_instance(rng.getrandbits(32))
+    if kind == "user":
+        tables = _user_rows(rng, start, count)
+    elif kind == "project":
+        tables = _project_rows(rng, start, count, refs)
+    elif kind == "doc":
+        tables = _doc_rows(rng, start, count, refs)
+    else:
+        raise ValueError(f"未知的数据类型: {kind}")
+    stats = {table: (len(rows), rows_digest(rows)) for table, rows in tables.items()}
+    if csv_dir is None:
+        return tables, stats
+    return {table: _write_csv(csv_dir, table, start, rows) for table, rows in tables.items()}, stats
+
+
+# -------------------------
+# 进度
+# -------------------------
+class Progress:
+    """按固定间隔在 stderr 上刷新一行进度"""
+
+    def __init__(self, label: str, total: int, interval: float = 1.0, stream=None):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.rows = 0  # 包含关联表在内实际写入的行数
+        self.start = time.perf_counter()
+        self._last_report = 0.0
+
+    def advance(self, count: int, rows: int = None) -> None:
+        self.done += count
+        self.rows += count if rows is None else rows
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.stream.write(f"\r{self.line()}")
+            self.stream.flush()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def throughput(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def line(self) -> str:
+        percent = self.done / self.total * 100 if self.total else 100.0
+        rate = self.done / self.elapsed if self.elapsed else 0.0
+        eta = (self.total - self.done) / rate if rate else 0.0
+        return (f"[{self.label}] {self.done:,}/{self.total:,} {percent:5.1f}%  "
+                f"{self.throughput:,.0f} rows/s  ETA {eta:,.0f}s")
+
+    def finish(self) -> dict:
+        self.stream.write(f"\r{self.line()}\n")
+        self.stream.flush()
+        return {"count": self.done, "rows": self.rows, "elapsed_s": round(self.elapsed, 2),
+                "rows_per_s": round(self.throughput)}
+
+
+# -------------------------
+# 写入
+# -------------------------
+def _insert_sql(dialect, table: str, columns: Tuple[str, ...]) -> str:
+    quote = dialect.identifier_preparer.quote
+    placeholder = "?" if dialect.paramstyle == "qmark" else "%s"
+    return (f"INSERT INTO {quote(table)} ({', '.join(quote(column) for column in columns)}) "
+            f"VALUES ({', '.join([placeholder] * len(columns))})")
+
+
+def _load_data_sql(dialect, table: str, columns: Tuple[str, ...]) -> str:
+    quote = dialect.identifier_preparer.quote
+    return (f"LOAD DATA LOCAL INFILE %s INTO TABLE {quote(table)} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '\\\\' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(quote(column) for column in columns)})")
+
+
+class BulkLoader:
+    def __init__(self, engine, load_data: bool = False):
+        self.engine = engine
+        self.dialect = engine.dialect
+        self.is_mysql = self.dialect.name == "mysql"
+        self.load_data = load_data
+        if load_data and not self.is_mysql:
+            raise ValueError("--load-data 只支持 MySQL")
+
+    async def _prepare(self, conn) -> None:
+        if self.is_mysql:
+            # 导入期间关闭唯一性与外键检查，数据由脚本保证一致
+            await conn.exec_driver_sql("SET unique_checks = 0, foreign_key_checks = 0")
+
+    async def write(self, chunk: Dict[str, object]) -> None:
+        """在一个事务中写入一个 chunk 的全部表"""
+        async with self.engine.begin() as conn:
+            await self._prepare(conn)
+            for table, payload in chunk.items():
+                if self.load_data:
+                    try:
+                        await conn.exec_driver_sql(_load_data_sql(self.dialect, table, COLUMNS[table]), (payload,))
+                    finally:
+                        os.remove(payload)
+                elif payload:
+                    await conn.exec_driver_sql(_insert_sql(self.dialect, table, COLUMNS[table]), payload)
+
+    async def next_id(self, table: str) -> int:
+        from sqlalchemy import text
+        quote = self.dialect.identifier_preparer.quote
+        async with self.engine.connect() as conn:
+            result = await conn.execute(text(f"SELECT MAX(id) FROM {quote(table)}"))
+            return (result.scalar() or 0) + 1
+
+    async def drop_indexes(self, tables: List[str]) -> list:
+        """删除模型中声明的非唯一二级索引，返回被删除的 Index 对象，供导入后重建"""
+        from sqlalchemy import inspect
+        from src.core.server.database import Base
+        dropped = []
+        async with self.engine.begin() as conn:
+            for name in tables:
+                table = Base.metadata.tables[name]
+                existing = await conn.run_sync(lambda sync_conn: {
+                    index["name"] for index in inspect(sync_conn).get_indexes(name)})
+                for index in sorted(table.indexes, key=lambda item: item.name):
+                    # 唯一索引保留，导入期间仍然能发现重复数据
+                    if index.name in existing and not index.unique:
+                        await conn.run_sync(index.drop)
+                        dropped.append(index)
+        return dropped
+
+    async def create_indexes(self, indexes: list) -> None:
+        async with self.engine.begin() as conn:
+            for index in indexes:
+                started = time.perf_counter()
+                await conn.run_sync(index.create)
+                print(f"重建索引 {index.name}，耗时 {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+async def run_phase(loader: BulkLoader, pool: ProcessPoolExecutor, kind: str, start: int, total: int,
+                    chunk_size: int, seed: int, refs: dict, workers: int, load_workers: int,
+                    csv_dir: Optional[str] = None) -> Tuple[dict, Dict[str, dict]]:
+    """
+    生成与写入流水线：进程池并行合成，load_workers 个连接并行写入，进行中的 chunk 数有上限以控制内存。
+    返回 (阶段耗时统计, {表名: {"rows": 行数, "first_id": 起始主键, "digest": 摘要}})，摘要按 chunk 顺序合并，与并行度无关
+    """
+    loop = asyncio.get_running_loop()
+    progress = Progress(kind, total)
+    chunk_stats: Dict[int, Dict[str, Tuple[int, str]]] = {}
+    pending: asyncio.Queue = asyncio.Queue(maxsize=max(workers, load_workers) * 2)
+
+    async def produce():
+        for offset in range(0, total, chunk_size):
+            count = min(chunk_size, total - offset)
+            future = loop.run_in_executor(pool, build_chunk, kind, start + offset, count, seed, refs, csv_dir)
+            await pending.put((start + offset, count, future))
+        for _ in range(load_workers):
+            await pending.put(None)
+
+    async def consume():
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            chunk_start, count, future = item
+            chunk, stats = await future
+            await loader.write(chunk)
+            chunk_stats[chunk_start] = stats
+            progress.advance(count, sum(rows for rows, _ in stats.values()))
+
+    await asyncio.gather(produce(), *(consume() for _ in range(load_workers)))
+    tables = {}
+    for table in CHUNK_TABLES[kind]:
+        ordered = [chunk_stats[chunk_start][table] for chunk_start in sorted(chunk_stats)]
+        tables[table] = {"rows": sum(rows for rows, _ in ordered),
+                         "first_id": start if table == kind else None,
+                         "digest": combine_digests([digest for _, digest in ordered])}
+    return progress.finish(), tables
+
+
+async def bulk_main(profile: DatasetProfile, args) -> dict:
+    """按规格批量写入，返回 {"phases": 各阶段统计, "tables": 各表行数与摘要, ...}"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from src.core.server.database import DATABASE_URL
+
+    # 独立的引擎：不挂 SQL 埋点与慢查询日志，连接数与写入并发一致
+    is_sqlite = DATABASE_URL.startswith("sqlite")
+    load_workers = 1 if is_sqlite else args.load_workers
+    options = {} if is_sqlite else dict(pool_size=load_workers, max_overflow=0, pool_recycle=3600)
+    if args.load_data:
+        options["connect_args"] = {"local_infile": True}
+    engine = create_async_engine(DATABASE_URL, **options)
+    loader = BulkLoader(engine, load_data=args.load_data)
+    workers = args.workers or os.cpu_count() or 1
+    report = {"phases": {}, "tables": {}, "database": engine.dialect.name}
+    started = time.perf_counter()
+
+    try:
+        first_user = await loader.next_id("user")
+        first_project = await loader.next_id("project")
+        first_doc = await loader.next_id("doc")
+        user_range = (1, first_user + profile.users - 1)
+        project_range = (1, first_project + profile.projects - 1)
+        if profile.docs and project_range[1] < 1:
+            raise ValueError("写入文档前至少需要一个项目")
+        # 热点项目取本次写入的第一个项目，没有新项目时取已有的最后一个
+        hot_project = first_project if profile.projects else project_range[1]
+        refs = {"locale": "zh_CN", "user_range": user_range, "project_range": project_range,
+                "hot_project": hot_project, "profile": profile}
+        phases = (("user", first_user, profile.users), ("project", first_project, profile.projects),
+                  ("doc", first_doc, profile.docs))
+
+        tables = [table for kind, _, count in phases if count for table in CHUNK_TABLES[kind]]
+        dropped = [] if args.keep_indexes else await loader.drop_indexes(tables)
+        csv_dir = tempfile.mkdtemp(prefix="bulk_seed_") if args.load_data else None
+        try:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(refs["locale"],)) as pool:
+                for kind, start, total in phases:
+                    if total:
+                        report["phases"][kind], phase_tables = await run_phase(
+                            loader, pool, kind, start, total, args.chunk_size, profile.seed, refs,
+                            workers, load_workers, csv_dir)
+                        report["tables"].update(phase_tables)
+        finally:
+            # 中途失败也要把索引建回来
+            index_started = time.perf_counter()
+            await loader.create_indexes(dropped)
+            report["index_rebuild_s"] = round(time.perf_counter() - index_started, 2)
+            if csv_dir:
+                # 某个阶段失败时目录里可能还有未导入的 CSV 分块
+                shutil.rmtree(csv_dir, ignore_errors=True)
+    finally:
+        await engine.dispose()
+
+    report["elapsed_s"] = round(time.perf_counter() - started, 2)
+    print(f"批量写入完成，总耗时 {report['elapsed_s']}s（其中重建索引 {report['index_rebuild_s']}s）", file=sys.stderr)
+    return report
+
+
+def add_arguments(parser) -> None:
+    group = parser.add_argument_group("批量模式（--bulk）")
+    group.add_argument('--bulk', action='store_true', help='批量模式：进程池合成 + executemany/LOAD DATA 写入')
+    group.add_argument('--workers', type=int, default=None, help='合成数据的进程数，默认 CPU 核数')
+    group.add_argument('--load-workers', type=int, default=4, help='并行写入的连接数（SQLite 固定为 1）')
+    group.add_argument('--chunk-size', type=int, default=20000, help='每个 chunk 的主表行数，一个 chunk 一个事务')
+    group.add_argument('--load-data', action='store_true', help='生成 CSV 并用 LOAD DATA LOCAL INFILE 导入（仅 MySQL）')
+    group.add_argument('--keep-indexes', action='store_true', help='导入前不删除二级索引')
@@ -0,0 +1,142 @@
+"""
+压测数据集规格
+
+每个规格固定随机种子与数据规模，并描述数据分布：
+- 每个项目的查看者数量区间，以及热点项目的查看者数量
+- 文档在项目间的分布：uniform 为均匀分布，zipf 按项目序号的 1/rank^s 加权；hot_project_share 比例的文档直接落到热点项目
+  （本次写入的第一个项目）
+- 文档状态的权重（排队中、审核中、审核成功、审核失败）
+
+同一规格、同一种子、同一起始主键生成的数据逐行相同。造数结束后写出 manifest（规格参数、各表行数与主键区间、
+数据摘要、版本与环境信息），压测结果附上 manifest 即可判断两次结果是否基于同一份数据。
+"""
+import hashlib
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from src.core.conf.config import BASE_DIR
+
+MANIFEST_DIR = os.path.join(BASE_DIR.parent.parent, "data", "datasets")
+
+
+class DatasetProfile(BaseModel):
+    name: str
+    description: str = ""
+    seed: int = 42
+    users: int
+    projects: int
+    docs: int
+    viewers_per_project: Tuple[int, int] = (1, 10)
+    hot_project_viewers: int = 0
+    doc_distribution: str = Field(default="uniform", pattern="^(uniform|zipf)$")
+    zipf_s: float = 1.1
+    hot_project_share: float = Field(default=0.0, ge=0, le=1)
+    status_weights: List[float] = Field(default=[0.05, 0.1, 0.8, 0.05], min_length=4, max_length=4)
+
+
+PROFILES: Dict[str, DatasetProfile] = {
+    profile.name: profile for profile in (
+        DatasetProfile(name="small", description="本地调试与 CI 冒烟", users=200, projects=500, docs=10_000,
+                       viewers_per_project=(1, 5)),
+        DatasetProfile(name="medium", description="单机压测", users=5_000, projects=20_000, docs=1_000_000),
+        DatasetProfile(name="large", description="接近生产规模", users=100_000, projects=200_000, docs=10_000_000),
+        DatasetProfile(name="skewed-hot-project", description="文档与查看者集中在少数项目，排队中的文档偏多",
+                       users=5_000, projects=20_000, docs=1_000_000, viewers_per_project=(0, 5),
+                       hot_project_viewers=2_000, doc_distribution="zipf", zipf_s=1.2, hot_project_share=0.2,
+                       status_weights=[0.3, 0.3, 0.35, 0.05]),
+    )
+}
+
+
+def get_profile(name: str) -> DatasetProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"未知的数据集规格 {name}，可选：{', '.join(PROFILES)}") from None
+
+
+# 累积权重只与项目数量和 s 有关，同一进程内复用
+_zipf_cache: Dict[Tuple[int, float], List[float]] = {}
+
+
+def _zipf_cum_weights(size: int, s: float) -> List[float]:
+    key = (size, s)
+    if key not in _zipf_cache:
+        _zipf_cache[key] = list(accumulate(1 / rank ** s for rank in range(1, size + 1)))
+    return _zipf_cache[key]
+
+
+def sample_projects(rng: random.Random, profile: DatasetProfile, project_range: Tuple[int, int],
+                    hot_project: int, k: int) -> List[int]:
+    """按规格为 k 个文档选择所属项目"""
+    low, high = project_range
+    size = high - low + 1
+    if profile.doc_distribution == "zipf":
+        cum_weights = _zipf_cum_weights(size, profile.zipf_s)
+        total = cum_weights[-1]
+        picks = [low + bisect_left(cum_weights, rng.random() * total) for _ in range(k)]
+    else:
+        picks = [rng.randint(low, high) for _ in range(k)]
+    if profile.hot_project_share:
+        picks = [hot_project if rng.random() < profile.hot_project_share else pick for pick in picks]
+    return picks
+
+
+def viewer_count(rng: random.Random, profile: DatasetProfile, project_id: int, hot_project: int,
+                 available: int) -> int:
+    if project_id == hot_project and profile.hot_project_viewers:
+        return min(profile.hot_project_viewers, available)
+    low, high = profile.viewers_per_project
+    return min(rng.randint(low, high), available)
+
+
+def rows_digest(rows) -> str:
+    return hashlib.sha256(repr(rows).encode()).hexdigest()
+
+
+def combine_digests(digests: List[str]) -> str:
+    """按顺序合并各块的摘要，结果与并行度无关"""
+    return hashlib.sha256("".join(digests).encode()).hexdigest()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_manifest(profile: DatasetProfile, mode: str, tables: dict, dialect: str,
+                   path: Optional[str] = None, **extra) -> str:
+    """tables: {表名: {"rows": 行数, "first_id": 起始主键, "digest": 摘要}}"""
+    from faker import VERSION as FAKER_VERSION
+
+    manifest = {
+        "profile": profile.model_dump(),
+        "mode": mode,
+        "tables": tables,
+        "dataset_digest": combine_digests([tables[name]["digest"] for name in sorted(tables)
+                                           if tables[name].get("digest")]),
+        "database": dialect,
+        "git_rev": git_revision(),
+        "python": platform.python_version(),
+        "faker": FAKER_VERSION,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **extra,
+    }
+    path = path or os.path.join(MANIFEST_DIR, f"{profile.name}-{profile.seed}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return path
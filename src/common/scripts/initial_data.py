@@ -1,10 +1,38 @@
+"""
+初始数据（角色、管理员账号及其角色关联）
+
+多个 worker 同时启动时都会执行初始化，这里保证：
+- 已初始化的库只需一次主键查询（app_meta 中的 seed_version 与 SEED_VERSION 相同即跳过）
+- 需要初始化时先取 MySQL 命名锁（GET_LOCK），拿到锁后再检查一次版本，只有一个 worker 真正写入
+- 写入全部是幂等的批量 upsert（已存在的行保持不变），即使锁不可用（如 SQLite）重复执行也不会产生重复数据
+- 角色使用固定 ID：1 为普通用户、2 为管理员，与注册和鉴权逻辑中的 role_id 一致
+
+修改初始数据时递增 SEED_VERSION，下次启动会重新执行一遍 upsert。
+"""
+from contextlib import asynccontextmanager
 from datetime import datetime
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from typing import Optional
+
+from sqlalchemy import exists, insert, inspect, literal, select, text
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.core.base.models import app_meta
 from src.features.user.models import User, Role, user_roles
 from src.common.utils.logger import logger
 from src.core.conf.config import settings
 
+SEED_VERSION = "1"
+SEED_VERSION_KEY = "seed_version"
+INIT_LOCK_NAME = "fastapi_basic:init_database"
+NORMAL_ROLE_ID = 1
+ADMIN_ROLE_ID = 2
+ROLES = [
+    {"id": NORMAL_ROLE_ID, "name": "普通用户", "description": "普通用户角色"},
+    {"id": ADMIN_ROLE_ID, "name": "管理员", "description": "系统管理员角色"},
+]
+
 
 # 1. 获取敏感值（正确方式）
 def get_admin_password():
@@ -13,88 +41,108 @@ def get_admin_password():
     return settings.ADMIN_PASSWORD.get_secret_value()
 
 
-async def init_database(db: AsyncSession):
-    """初始化基础数据，使用事务确保原子性"""
+def insert_ignore(table, dialect_name: str):
+    """主键或唯一键冲突时保持原行不变的 INSERT"""
+    if dialect_name == "mysql":
+        stmt = mysql.insert(table)
+        primary_key = list(table.primary_key.columns)[0]
+        # 把主键更新为自身，相当于 no-op；不用 INSERT IGNORE，避免吞掉其它错误
+        return stmt.on_duplicate_key_update({primary_key.name: primary_key})
+    if dialect_name == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+@asynccontextmanager
+async def init_lock(conn: AsyncConnection, timeout: int = 30):
+    """MySQL 命名锁，锁与连接绑定，必须在同一个连接上释放；其它数据库不加锁（写入本身是幂等的）"""
+    if conn.dialect.name != "mysql":
+        yield
+        return
+    acquired = (await conn.execute(text("SELECT GET_LOCK(:name, :timeout)"),
+                                   {"name": INIT_LOCK_NAME, "timeout": timeout})).scalar()
+    if acquired != 1:
+        raise TimeoutError(f"等待初始化锁超时（{timeout}s）")
     try:
-        logger.info("开始初始化数据库...")
-
-        # 1. 初始化角色表
-        roles_data = [
-            {"name": "普通用户", "description": "普通用户角色"},
-            {"name": "管理员", "description": "系统管理员角色"},
-        ]
-
-        roles_map = {}
-        for role_data in roles_data:
-            # 检查是否已存在
-            existing = await db.execute(
-                select(Role).where(Role.name == role_data["name"])
-            )
-            existing_role = existing.scalar_one_or_none()
-
-            if existing_role is None:
-                new_role = Role(**role_data)
-                db.add(new_role)
-                await db.flush()  # 获取ID
-                roles_map[role_data["name"]] = new_role.id
-                logger.info(f"创建角色: {role_data['name']}")
-            else:
-                roles_map[role_data["name"]] = existing_role.id
-                logger.info(f"角色已存在: {role_data['name']}")
-
-        # 2. 初始化admin用户
-        admin_user = await db.execute(
-            select(User).where(User.username == "admin")
-        )
-        admin_user = admin_user.scalar_one_or_none()
-
-        if admin_user is None:
-            admin_user = User(
-                username="admin",
-                email="admin@example.com",
-                hashed_password=User.make_password(get_admin_password()),  # 使用您的加密方法
-                nickname="系统管理员",
-            )
-            db.add(admin_user)
-            await db.flush()  # 获取用户ID
-            logger.info("创建管理员用户: admin")
-        else:
-            logger.info("管理员用户已存在")
-
-        # 3. 关联用户和角色（管理员角色）
-        if admin_user.id and "管理员" in roles_map:
-            # 检查关联是否已存在
-            existing_link = await db.execute(
-                select(user_roles).where(
-                    user_roles.c.user_id == admin_user.id,
-                    user_roles.c.role_id == roles_map["管理员"]
-                )
-            )
-            existing_link = existing_link.first()
-
-            if existing_link is None:
-                # 直接使用insert语句，避免ORM延迟问题
-                await db.execute(
-                    user_roles.insert().values(
-                        user_id=admin_user.id,
-                        role_id=roles_map["管理员"],
-                        is_deleted=False,
-                        create_time=datetime.now(),
-                        update_time=datetime.now()
-                    )
-                )
-                logger.info("关联用户和角色成功")
+        yield
+    finally:
+        await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": INIT_LOCK_NAME})
+
+
+async def read_seed_version(conn: AsyncConnection) -> Optional[str]:
+    """读取已写入的初始数据版本，app_meta 表不存在（尚未执行迁移）时返回 None"""
+    try:
+        result = await conn.execute(select(app_meta.c.value).where(app_meta.c.key == SEED_VERSION_KEY))
+        return result.scalar()
+    except DBAPIError:
+        await conn.rollback()
+        return None
+
+
+async def write_seed_version(conn: AsyncConnection) -> None:
+    dialect_name = conn.dialect.name
+    values = {"key": SEED_VERSION_KEY, "value": SEED_VERSION, "update_time": datetime.now()}
+    if dialect_name == "mysql":
+        stmt = mysql.insert(app_meta).values(values)
+        stmt = stmt.on_duplicate_key_update(value=stmt.inserted.value, update_time=stmt.inserted.update_time)
+    elif dialect_name == "sqlite":
+        stmt = sqlite.insert(app_meta).values(values)
+        stmt = stmt.on_conflict_do_update(index_elements=[app_meta.c.key],
+                                          set_={"value": stmt.excluded.value, "update_time": stmt.excluded.update_time})
+    else:
+        await conn.execute(app_meta.delete().where(app_meta.c.key == SEED_VERSION_KEY))
+        stmt = insert(app_meta).values(values)
+    await conn.execute(stmt)
+
+
+async def init_database(conn: AsyncConnection):
+    """在调用方的事务中写入初始数据，全部为幂等 upsert"""
+    dialect_name = conn.dialect.name
+    now = datetime.now()
+
+    # 1. 角色（一条多行 INSERT）
+    await conn.execute(insert_ignore(Role.__table__, dialect_name),
+                       [{**role, "create_time": now, "update_time": now, "is_deleted": False} for role in ROLES])
+
+    # 2. 管理员用户（用户名唯一）
+    await conn.execute(insert_ignore(User.__table__, dialect_name), [{
+        "username": "admin",
+        "email": "admin@example.com",
+        "hashed_password": User.make_password(get_admin_password()),
+        "nickname": "系统管理员",
+        "create_time": now,
+        "update_time": now,
+        "is_deleted": False,
+    }])
+
+    # 3. 管理员角色关联（user_roles 没有唯一约束，用 INSERT ... SELECT ... WHERE NOT EXISTS）
+    admin_id = select(User.id).where(User.username == "admin").scalar_subquery()
+    link_exists = exists().where(user_roles.c.user_id == admin_id, user_roles.c.role_id == ADMIN_ROLE_ID)
+    await conn.execute(insert(user_roles).from_select(
+        ["user_id", "role_id", "is_deleted", "create_time", "update_time"],
+        select(admin_id, literal(ADMIN_ROLE_ID), literal(False), literal(now), literal(now)).where(~link_exists),
+    ))
+
+
+async def ensure_initialized(engine) -> bool:
+    """已是最新版本时返回 False（一次查询）；否则在锁内初始化并写入版本标记，返回 True"""
+    async with engine.connect() as conn:
+        if await read_seed_version(conn) == SEED_VERSION:
+            return False
+    async with engine.connect() as conn:
+        async with init_lock(conn):
+            # 拿到锁后再检查一次，其它 worker 可能已经完成了初始化
+            version = await read_seed_version(conn)
+            if version == SEED_VERSION:
+                return False
+            has_marker = version is not None or await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).has_table(app_meta.name))
+            await init_database(conn)
+            if has_marker:
+                await write_seed_version(conn)
             else:
-                logger.info("用户角色关联已存在")
-
-        # 提交所有更改
-        await db.commit()
-        logger.info("数据库初始化成功")
-
-    except Exception as e:
-        # 回滚事务
-        await db.rollback()
-        logger.exception(f"数据库初始化失败: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise
+                logger.warning("app_meta 表不存在，跳过写入初始数据版本，请执行 alembic upgrade head")
+            # 版本标记与初始数据在同一个事务中提交
+            await conn.commit()
+            logger.info(f"初始数据已写入（seed_version: {version} -> {SEED_VERSION}）")
+            return True
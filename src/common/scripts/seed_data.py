@@ -3,9 +3,14 @@ import random
 from datetime import datetime, timedelta
 from typing import List
 import argparse
+import json
 from sqlalchemy import delete
 from sqlalchemy.future import select
-from src.core.server.database import AsyncSessionLocal
+from src.core.server.database import AsyncSessionLocal, engine
+from src.common.scripts.bulk_seed import add_arguments as add_bulk_arguments, bulk_main
+from src.common.scripts.dataset_profiles import (
+    PROFILES, DatasetProfile, get_profile, rows_digest, sample_projects, viewer_count, write_manifest,
+)
 from src.features.user.models import User, Group, Role, user_groups, user_roles
 from src.features.project.models import Project, ProjectType, project_viewers
 from src.features.doc.models import Doc, DocStatus
@@ -14,11 +19,26 @@ import uuid
 
 FAKER_AVAILABLE = True
 
+# 不指定规格时的默认数据量（与此前 ORM 版本一致）
+DEFAULT_COUNTS = {'users': 600, 'projects': 550, 'docs': 650}
+
+
+def resolve_profile(args=None) -> DatasetProfile:
+    """按命令行参数确定数据集规格：--profile 选择预置规格，--users/--projects/--docs/--seed 覆盖其中的值"""
+    name = getattr(args, 'profile', None)
+    profile = get_profile(name) if name else DatasetProfile(name='custom', **DEFAULT_COUNTS)
+    overrides = {key: getattr(args, key, None) for key in ('users', 'projects', 'docs', 'seed')}
+    return profile.model_copy(update={key: value for key, value in overrides.items() if value is not None})
+
 
 class ORMDataGenerator:
-    def __init__(self, locale='zh_CN'):
-        """初始化数据生成器"""
+    def __init__(self, locale='zh_CN', profile: DatasetProfile = None):
+        """初始化数据生成器，随机数全部来自按规格种子初始化的 self.rng，同一规格每次生成的数据相同"""
+        self.profile = profile or resolve_profile()
+        self.rng = random.Random(self.profile.seed)
         self.fake = Faker(locale) if FAKER_AVAILABLE else None
+        if self.fake:
+            self.fake.seed_instance(self.profile.seed)
 
         # 存储生成的实例
         self.users: List[User] = []
@@ -56,13 +76,13 @@ class ORMDataGenerator:
 
         time_between_dates = end_date - start_date
         days_between_dates = time_between_dates.days
-        random_number_of_days = random.randrange(days_between_dates)
+        random_number_of_days = self.rng.randrange(days_between_dates)
         random_date = start_date + timedelta(days=random_number_of_days)
 
         # 添加随机时间
-        random_hour = random.randint(0, 23)
-        random_minute = random.randint(0, 59)
-        random_second = random.randint(0, 59)
+        random_hour = self.rng.randint(0, 23)
+        random_minute = self.rng.randint(0, 59)
+        random_second = self.rng.randint(0, 59)
 
         return random_date.replace(hour=random_hour, minute=random_minute, second=random_second)
 
@@ -79,23 +99,23 @@ class ORMDataGenerator:
 
         for i in range(count):
             # 生成中文姓名
-            surname = random.choice(surnames)
-            given_name = random.choice(given_names)
+            surname = self.rng.choice(surnames)
+            given_name = self.rng.choice(given_names)
             chinese_name = surname + given_name
 
             # 生成用户名（拼音格式）
             username = self._generate_pinyin_username(chinese_name, i)
 
             # 生成邮箱
-            domain = random.choice(['company.com', 'enterprise.cn', 'corp.net', 'test.org'])
+            domain = self.rng.choice(['company.com', 'enterprise.cn', 'corp.net', 'test.org'])
             email = f"{username}@{domain}"
 
             # 生成昵称
-            nickname = chinese_name if random.random() > 0.3 else self._generate_english_nickname()
+            nickname = chinese_name if self.rng.random() > 0.3 else self._generate_english_nickname()
 
             # 生成头像URL（可选）
             avatar = None
-            if random.random() > 0.5:
+            if self.rng.random() > 0.5:
                 avatar = f"https://avatar.example.com/{username}.jpg"
 
             # 创建用户实例
@@ -105,7 +125,6 @@ class ORMDataGenerator:
                 hashed_password=User.make_password(username),  # 密码与用户名相同
                 nickname=nickname,
                 avatar=avatar,
-                is_superuser=(i < 10),  # 前10个用户是超级用户
                 is_deleted=(i % 100 == 0),  # 每100个用户有一个被删除
                 create_time=self._random_datetime(),
                 update_time=self._random_datetime()
@@ -141,7 +160,7 @@ class ORMDataGenerator:
         for i in range(count):
             # 生成用户组名称
             if group_names:
-                name = random.choice(group_names)
+                name = self.rng.choice(group_names)
                 group_names.remove(name)
                 used_names.add(name)
             else:
@@ -154,7 +173,7 @@ class ORMDataGenerator:
                 custom_group_index += 1
 
             # 生成用户组描述
-            description = random.choice(group_descriptions) if random.random() > 0.2 else None
+            description = self.rng.choice(group_descriptions) if self.rng.random() > 0.2 else None
 
             # 创建用户组实例
             group = Group(
@@ -202,7 +221,7 @@ class ORMDataGenerator:
         for i in range(count):
             # 生成角色名称
             if role_names:
-                name = random.choice(role_names)
+                name = self.rng.choice(role_names)
                 role_names.remove(name)
                 used_names.add(name)
             else:
@@ -215,7 +234,7 @@ class ORMDataGenerator:
                 custom_role_index += 1
 
             # 生成角色描述
-            description = random.choice(role_descriptions) if random.random() > 0.2 else None
+            description = self.rng.choice(role_descriptions) if self.rng.random() > 0.2 else None
 
             # 创建角色实例
             role = Role(
@@ -255,7 +274,7 @@ class ORMDataGenerator:
         # 使用索引和随机数字确保唯一性
         base_username = ''.join(parts)
         # 始终添加索引和随机数字以确保唯一性
-        username = f"{base_username}{index}_{random.randint(1, 999)}"
+        username = f"{base_username}{index}_{self.rng.randint(1, 999)}"
 
         return username
 
@@ -264,7 +283,7 @@ class ORMDataGenerator:
         nicknames = ['Alex', 'Chris', 'David', 'Emma', 'Frank', 'Grace',
                      'Henry', 'Ivy', 'Jack', 'Kate', 'Leo', 'Mona', 'Nick',
                      'Olivia', 'Paul', 'Queen', 'Ryan', 'Sara', 'Tom', 'Uma']
-        return random.choice(nicknames)
+        return self.rng.choice(nicknames)
 
     def generate_projects(self, count: int = 550) -> List[Project]:
         """生成项目数据"""
@@ -297,33 +316,33 @@ class ORMDataGenerator:
 
         for i in range(count):
             # 随机选择项目所有者
-            owner = random.choice(active_users) if active_users else self.users[0]
+            owner = self.rng.choice(active_users) if active_users else self.users[0]
 
             # 生成项目名称
-            industry = random.choice(industries)
-            template = random.choice(project_name_templates)
+            industry = self.rng.choice(industries)
+            template = self.rng.choice(project_name_templates)
 
             if '{company}' in template:
                 project_name = template.format(
-                    company=random.choice(company_names),
+                    company=self.rng.choice(company_names),
                     industry=industry,
-                    suffix=random.choice(suffixes),
-                    location=random.choice(locations)
+                    suffix=self.rng.choice(suffixes),
+                    location=self.rng.choice(locations)
                 )
             elif '{location}' in template:
                 project_name = template.format(
-                    location=random.choice(locations),
+                    location=self.rng.choice(locations),
                     industry=industry,
-                    suffix=random.choice(suffixes)
+                    suffix=self.rng.choice(suffixes)
                 )
             else:
                 project_name = template.format(
                     industry=industry,
-                    suffix=random.choice(suffixes)
+                    suffix=self.rng.choice(suffixes)
                 )
 
             # 随机选择项目类型
-            project_type = random.choice([ProjectType.PRIVATE, ProjectType.PUBLIC])
+            project_type = self.rng.choice([ProjectType.PRIVATE, ProjectType.PUBLIC])
 
             # 创建项目实例
             project = Project(
@@ -341,8 +360,8 @@ class ORMDataGenerator:
         print(f"已生成 {len(self.projects)} 个项目实例")
         return self.projects
 
-    async def assign_project_viewers(self, max_viewers_per_project: int = 10) -> None:
-        """为项目分配查看者"""
+    async def assign_project_viewers(self) -> None:
+        """为项目分配查看者，数量区间与热点项目由数据集规格决定"""
         print(f"\n正在为项目分配查看者...")
 
         if not self.projects:
@@ -374,13 +393,16 @@ class ORMDataGenerator:
                 continue
 
             # 随机选择查看者数量
-            num_viewers = random.randint(1, min(max_viewers_per_project, len(available_users)))
-            selected_viewers = random.sample(available_users, num_viewers)
+            num_viewers = viewer_count(self.rng, self.profile, project.id, self.projects[0].id,
+                                       len(available_users))
+            if not num_viewers:
+                continue
+            selected_viewers = self.rng.sample(available_users, num_viewers)
 
             # 创建关联记录
             for viewer in selected_viewers:
                 # 每个查看关系有50%的概率被标记为删除
-                is_deleted = random.random() > 0.5
+                is_deleted = self.rng.random() > 0.5
 
                 if not is_deleted:
                     # 创建关联记录，手动生成递增的id值
@@ -428,31 +450,32 @@ class ORMDataGenerator:
             if not active_projects:
                 continue
 
-            project = random.choice(active_projects)
+            # 按规格的分布选择项目，第一个活跃项目作为热点项目
+            index = sample_projects(self.rng, self.profile, (0, len(active_projects) - 1), 0, 1)[0]
+            project = active_projects[index]
 
             # 随机选择一个用户作为文档所有者
             # 在实际数据库中，应该从项目成员中选择
             if self.users:
-                owner = random.choice([u for u in self.users if not u.is_deleted])
+                owner = self.rng.choice([u for u in self.users if not u.is_deleted])
             else:
                 # 如果没有用户，创建一个虚拟的owner_id
                 owner = None
 
             # 生成文档名称
-            doc_type = random.choice(doc_types)
-            prefix = random.choice(doc_prefixes)
+            doc_type = self.rng.choice(doc_types)
+            prefix = self.rng.choice(doc_prefixes)
 
             # 简化项目名，避免太长
             short_project_name = project.name[:20] if len(project.name) > 20 else project.name
 
-            file_name = f"{prefix}{doc_type}-{short_project_name}-V{random.randint(1, 5)}.{random.randint(0, 3)}"
+            file_name = f"{prefix}{doc_type}-{short_project_name}-V{self.rng.randint(1, 5)}.{self.rng.randint(0, 3)}"
 
             # 生成UUID
-            file_uuid = str(uuid.uuid4())
+            file_uuid = str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
 
             # 文档状态分布
-            status_weights = [0.05, 0.1, 0.8, 0.05]  # 排队中5%，审核中10%，审核成功80%，审核失败5%
-            status_value = random.choices([0, 1, 2, 3], weights=status_weights)[0]
+            status_value = self.rng.choices([0, 1, 2, 3], weights=self.profile.status_weights)[0]
 
             # 创建文档实例
             doc = Doc(
@@ -574,8 +597,8 @@ class ORMDataGenerator:
             group_associations = []
             for user in self.users:
                 # 随机选择1-3个组
-                num_groups = random.randint(1, 3)
-                assigned_group_ids = random.sample(group_ids, num_groups)
+                num_groups = self.rng.randint(1, 3)
+                assigned_group_ids = self.rng.sample(group_ids, num_groups)
                 
                 # 创建关联记录
                 for group_id in assigned_group_ids:
@@ -616,8 +639,8 @@ class ORMDataGenerator:
             role_associations = []
             for user in self.users:
                 # 随机选择1-2个角色
-                num_roles = random.randint(1, 2)
-                assigned_role_ids = random.sample(role_ids, num_roles)
+                num_roles = self.rng.randint(1, 2)
+                assigned_role_ids = self.rng.sample(role_ids, num_roles)
                 
                 # 创建关联记录
                 for role_id in assigned_role_ids:
@@ -651,7 +674,7 @@ class ORMDataGenerator:
         for project in self.projects:
             if project.owner_id is None and self.users:
                 # 随机选择一个用户作为所有者
-                owner = random.choice([u for u in self.users if not u.is_deleted])
+                owner = self.rng.choice([u for u in self.users if not u.is_deleted])
                 project.owner_id = owner.id
 
         total_projects = len(self.projects)
@@ -686,12 +709,12 @@ class ORMDataGenerator:
         for doc in self.docs:
             if doc.project_id is None and self.projects:
                 # 随机选择一个项目
-                project = random.choice([p for p in self.projects if not p.is_deleted])
+                project = self.rng.choice([p for p in self.projects if not p.is_deleted])
                 doc.project_id = project.id
 
             if doc.owner_id is None and self.users:
                 # 随机选择一个用户
-                owner = random.choice([u for u in self.users if not u.is_deleted])
+                owner = self.rng.choice([u for u in self.users if not u.is_deleted])
                 doc.owner_id = owner.id
 
         total_docs = len(self.docs)
@@ -756,6 +779,17 @@ class ORMDataGenerator:
         finally:
             await self.close()
 
+    def manifest_tables(self) -> dict:
+        """manifest 中各表的行数与摘要（ORM 模式的主键由数据库分配，不记录起始主键）"""
+        return {
+            'user': {'rows': len(self.users), 'first_id': None, 'digest': rows_digest(
+                [(u.username, u.email, u.nickname, u.avatar, str(u.create_time)) for u in self.users])},
+            'project': {'rows': len(self.projects), 'first_id': None, 'digest': rows_digest(
+                [(p.name, p.project_type, str(p.create_time)) for p in self.projects])},
+            'doc': {'rows': len(self.docs), 'first_id': None, 'digest': rows_digest(
+                [(d.file_name, d.file_uuid, d.status, str(d.create_time)) for d in self.docs])},
+        }
+
     def print_stats(self):
         """打印统计信息"""
         print("\n" + "=" * 50)
@@ -833,7 +867,8 @@ class ORMDataGenerator:
 async def main_async(args):
     """异步主函数"""
     # 初始化数据生成器
-    generator = ORMDataGenerator(locale='zh_CN')
+    profile = resolve_profile(args)
+    generator = ORMDataGenerator(locale='zh_CN', profile=profile)
 
     try:
         # 清理数据（如果需要）
@@ -843,14 +878,16 @@ async def main_async(args):
 
         # 生成所有数据
         data = await generator.generate_all_data(
-            user_count=args.users,
-            project_count=args.projects,
-            doc_count=args.docs,
+            user_count=profile.users,
+            project_count=profile.projects,
+            doc_count=profile.docs,
             insert_immediately=not args.no_insert
         )
 
         # 打印统计信息
         generator.print_stats()
+        path = write_manifest(profile, 'orm', generator.manifest_tables(), engine.dialect.name, args.manifest)
+        print(f"\n数据集 manifest: {path}")
 
         print("\n" + "=" * 50)
         print("操作完成！")
@@ -864,15 +901,28 @@ async def main_async(args):
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='生成测试数据（ORM版本）')
-    parser.add_argument('--users', type=int, default=600, help='用户数量')
-    parser.add_argument('--projects', type=int, default=550, help='项目数量')
-    parser.add_argument('--docs', type=int, default=650, help='文档数量')
+    parser.add_argument('--profile', choices=list(PROFILES), help='数据集规格（数据量、分布与随机种子）')
+    parser.add_argument('--users', type=int, default=None, help='用户数量，默认 600 或规格中的值')
+    parser.add_argument('--projects', type=int, default=None, help='项目数量，默认 550 或规格中的值')
+    parser.add_argument('--docs', type=int, default=None, help='文档数量，默认 650 或规格中的值')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子，默认使用规格中的种子')
+    parser.add_argument('--manifest', default=None, help='manifest 输出路径，默认 data/datasets/<规格>-<种子>.json')
     parser.add_argument('--no-insert', action='store_true', help='仅生成数据，不插入数据库')
     parser.add_argument('--cleanup', action='store_true', help='清理现有测试数据')
     parser.add_argument('--batch-size', type=int, default=100, help='批量插入大小')
+    add_bulk_arguments(parser)
 
     args = parser.parse_args()
 
+    if args.bulk:
+        # 百万级以上的数据走批量模式
+        profile = resolve_profile(args)
+        report = asyncio.run(bulk_main(profile, args))
+        report['manifest'] = write_manifest(profile, 'bulk', report['tables'], report['database'], args.manifest,
+                                            chunk_size=args.chunk_size, elapsed_s=report['elapsed_s'])
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
     # 运行异步主函数
     asyncio.run(main_async(args))
 
@@ -0,0 +1,123 @@
+"""
+数据变更版本号
+
+每个标签在 Redis 中维护一个单调递增的版本号，标签有两种：
+- 表标签，如 "project"，该表任意一行变化都会递增
+- 实体标签，如 "user:1"，只在该行变化时递增
+
+写操作在会话中登记受影响的标签，事务提交后统一递增（见 get_db），读接口据此生成 ETag 或校验缓存。
+ORM flush 与 insert/update/delete 语句会自动登记表标签，实体标签由 service 层通过 mark 显式登记。
+"""
+import time
+from typing import Awaitable, Callable, Iterable, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_mapper
+
+from src.common.utils.logger import logger
+from src.core.server.dependencies import get_redis
+
+
+class ChangeVersion:
+    CACHE_PREFIX = "change_version"
+    SESSION_KEY = "changed_tags"
+    # 标签发布后的回调，如进程内缓存失效
+    _listeners: List[Callable[[Iterable[str]], Awaitable[None]]] = []
+
+    @staticmethod
+    def subscribe(listener: Callable[[Iterable[str]], Awaitable[None]]) -> None:
+        ChangeVersion._listeners.append(listener)
+
+    @staticmethod
+    def _key(tag: str) -> str:
+        return f"{ChangeVersion.CACHE_PREFIX}:{tag}"
+
+    @staticmethod
+    def _seed() -> str:
+        # 以毫秒时间戳作为初始版本，Redis 数据丢失后重建的版本号不会与旧版本重复
+        return str(int(time.time() * 1000))
+
+    @staticmethod
+    def mark(db, *tags: str) -> None:
+        """在会话中登记受影响的标签，提交后才会生效"""
+        db.info.setdefault(ChangeVersion.SESSION_KEY, set()).update(tags)
+
+    @staticmethod
+    def discard(db) -> None:
+        db.info.pop(ChangeVersion.SESSION_KEY, None)
+
+    @staticmethod
+    async def publish(db) -> None:
+        """事务提交后递增会话中登记的所有标签"""
+        tags = db.info.pop(ChangeVersion.SESSION_KEY, None)
+        if not tags:
+            return
+        try:
+            await ChangeVersion.bump(*tags)
+        except Exception as e:
+            logger.error(f"递增变更版本失败: {tags}, {e}")
+        for listener in ChangeVersion._listeners:
+            try:
+                await listener(tags)
+            except Exception as e:
+                logger.error(f"变更标签回调失败: {tags}, {e}")
+
+    @staticmethod
+    async def bump(*tags: str) -> None:
+        redis_client = await get_redis()
+        seed = ChangeVersion._seed()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.set(ChangeVersion._key(tag), seed, nx=True)
+                pipe.incr(ChangeVersion._key(tag))
+            await pipe.execute()
+
+    @staticmethod
+    async def get_many(tags: Iterable[str]) -> List[str]:
+        """批量获取标签版本号，不存在的标签会被初始化"""
+        tags = list(tags)
+        if not tags:
+            return []
+        redis_client = await get_redis()
+        keys = [ChangeVersion._key(tag) for tag in tags]
+        versions = await redis_client.mget(keys)
+        missing = [key for key, version in zip(keys, versions) if version is None]
+        if missing:
+            seed = ChangeVersion._seed()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key in missing:
+                    pipe.set(key, seed, nx=True)
+                await pipe.execute()
+            versions = await redis_client.mget(keys)
+        return [str(version) for version in versions]
+
+
+change_version = ChangeVersion()
+
+
+# -------------------------
+# 自动登记表标签
+# -------------------------
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tags(session, flush_context):
+    tags = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = object_mapper(obj).persist_selectable.name
+        tags.add(table)
+        if getattr(obj, "id", None) is not None:
+            tags.add(f"{table}:{obj.id}")
+    if tags:
+        session.info.setdefault(ChangeVersion.SESSION_KEY, set()).update(tags)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement_tags(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault(ChangeVersion.SESSION_KEY, set()).add(table.name)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tags(session):
+    session.info.pop(ChangeVersion.SESSION_KEY, None)
@@ -0,0 +1,89 @@
+"""
+条件 GET（ETag / If-None-Match）
+
+ETag 由路由路径、查询参数、调用方（可选）以及相关标签的变更版本号计算得到，
+不需要执行业务查询，因此可以在查询分页数据之前就判断是否返回 304。
+"""
+import hashlib
+from typing import List, Optional
+
+from fastapi import Depends, Request
+from fastapi.responses import Response
+
+from src.common.utils.change_version import change_version
+from src.common.utils.logger import logger
+from src.common.utils.security import get_current_user
+from src.core.base.exceptions import NotModifiedException
+
+
+def make_etag(*parts: str) -> str:
+    digest = hashlib.sha1("|".join(parts).encode()).hexdigest()[:32]
+    # 使用弱 ETag，压缩前后的响应视为同一版本
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [item.strip() for item in if_none_match.split(",")]
+    # 弱比较：忽略 W/ 前缀
+    return etag.removeprefix("W/") in [c.removeprefix("W/") for c in candidates]
+
+
+async def tag_versions(request: Request, tags: List[str]) -> List[str]:
+    """获取标签版本号，同一请求内多次调用只访问一次 Redis"""
+    known = getattr(request.state, "tag_versions", None)
+    if known is None:
+        known = request.state.tag_versions = {}
+    missing = [tag for tag in tags if tag not in known]
+    if missing:
+        known.update(zip(missing, await change_version.get_many(missing)))
+    return [known[tag] for tag in tags]
+
+
+def resolve_tags(request: Request, tags) -> List[str]:
+    """用路径参数填充标签模板，如 "user:{id}" -> "user:1" """
+    return [tag.format(**request.path_params) for tag in tags]
+
+
+def conditional_get(*tags: str, scoped: bool = False):
+    """
+    生成条件 GET 依赖
+
+    Args:
+        tags: 响应依赖的变更标签，可以引用路径参数，如 "user:{id}"
+        scoped: 响应内容是否因调用方而异，为 True 时 ETag 中包含用户ID
+
+    Returns:
+        依赖函数，返回当前 ETag；Redis 不可用时返回 None（不做条件判断）
+    """
+
+    async def dependency(request: Request, payload=Depends(get_current_user)) -> Optional[str]:
+        resolved = resolve_tags(request, tags)
+        try:
+            versions = await tag_versions(request, resolved)
+        except Exception as e:
+            logger.warning(f"获取变更版本失败，跳过条件请求: {e}")
+            return None
+
+        parts = [request.url.path, str(sorted(request.query_params.multi_items()))]
+        parts += [f"{tag}={version}" for tag, version in zip(resolved, versions)]
+        if scoped:
+            parts.append(f"sub={payload.get('sub')}")
+        etag = make_etag(*parts)
+
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            raise NotModifiedException(etag)
+        return etag
+
+    return dependency
+
+
+def with_etag(response: Response, etag: Optional[str]) -> Response:
+    """给响应加上 ETag，并要求客户端每次使用前先校验"""
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,74 @@
+"""
+稀疏字段集（?fields=id,name）
+
+同时裁剪两部分：
+- SQL：只加载请求的列，未请求的 column_property 子查询不再执行，关系是否预加载由 service 根据字段决定
+- JSON：使用收窄后的响应模型，只输出请求的字段
+"""
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional, Set, Type
+
+from fastapi import status
+from pydantic import BaseModel, Field, create_model
+from sqlalchemy import Column, inspect
+from sqlalchemy.orm import defer, load_only
+
+from src.core.base.exceptions import MessageException
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Set[str]]:
+    """
+    解析 fields 参数
+
+    Returns:
+        请求的字段集合；未传 fields 时返回 None，表示返回全部字段
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise MessageException(
+            message=f"不支持的字段: {','.join(sorted(unknown))}",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return requested
+
+
+def loader_options(model, fields: Optional[Iterable[str]]) -> list:
+    """
+    根据请求字段生成 ORM 加载选项：普通列用 load_only，未请求的 column_property 用 defer
+    """
+    if fields is None:
+        return []
+    fields = set(fields)
+    mapper = inspect(model)
+    columns, deferred = [], []
+    for prop in mapper.column_attrs:
+        expr = prop.columns[0]
+        is_table_column = isinstance(expr, Column) and expr.table is mapper.local_table
+        if prop.key in fields and is_table_column:
+            columns.append(getattr(model, prop.key))
+        elif prop.key not in fields and not is_table_column:
+            deferred.append(defer(getattr(model, prop.key)))
+    # 主键总是会被加载，load_only 至少需要一列
+    return [load_only(*(columns or [mapper.primary_key[0]])), *deferred]
+
+
+@lru_cache(maxsize=256)
+def narrow_schema(schema: Type[BaseModel], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """生成只输出指定字段的响应模型，其余字段变为可选并且不参与序列化"""
+    dropped = {
+        name: (Optional[info.annotation], Field(None, exclude=True))
+        for name, info in schema.model_fields.items()
+        if name not in fields
+    }
+    return create_model(f"{schema.__name__}Partial", __base__=schema, **dropped)
+
+
+def to_schema_list(schema: Type[BaseModel], items, fields: Optional[Set[str]]) -> List[BaseModel]:
+    """将 ORM 对象列表转换为响应模型列表，只读取请求的属性，避免触发未加载列的懒加载"""
+    if fields is None:
+        return [schema.model_validate(item) for item in items]
+    narrowed = narrow_schema(schema, frozenset(fields))
+    return [narrowed.model_validate({name: getattr(item, name) for name in fields}) for item in items]
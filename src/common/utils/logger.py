@@ -1,40 +1,225 @@
+"""
+应用日志
+
+业务代码调用 logger.info 时只做格式化并放入有界队列（QueueHandler），控制台与文件写入由后台线程
+（QueueListener）完成，事件循环线程上不再有阻塞的磁盘 I/O。
+
+- 队列满时丢弃新日志并计数（log_records_dropped_total），不阻塞调用方
+- 文件按大小（LOG_ROTATION=size）或时间（LOG_ROTATION=time）轮转；多个 worker 进程写同一个文件，
+  轮转时持有文件锁并重新确认，只有一个进程执行轮转，其余进程发现文件已被替换后重新打开，不会重复轮转或丢失日志
+- LOG_FORMAT=json 时每行输出一条 JSON
+- 每条日志带有当前请求的 request_id（见 request_id.py）
+- LOG_SAMPLING 按级别采样，如 {"INFO": 0.1} 只保留约 10% 的 INFO 日志，WARNING 及以上不建议采样
+"""
+import atexit
+import json
 import os
 import logging
-from src.core.conf.config import BASE_DIR
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from typing import Dict, List
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from src.common.utils.metrics import LOG_RECORDS_DROPPED
+from src.common.utils.request_id import RequestIdFilter
+from src.core.conf.config import BASE_DIR, settings
+
+LOG_DIR = os.path.join(BASE_DIR.parent.parent, "logs")
+
+TEXT_FORMAT = ("%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - "
+               "PID:%(process)d - TID:%(thread)d - RID:%(request_id)s - %(message)s")
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_listeners: List[QueueListener] = []
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "logger": record.name,
+            "level": record.levelname,
+            "file": f"{record.filename}:{record.lineno}",
+            "pid": record.process,
+            "tid": record.thread,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc_info"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """按级别采样，rates 形如 {"INFO": 0.1}，未配置的级别全部保留"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {logging.getLevelName(level.upper()): rate for level, rate in rates.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        return rate is None or random.random() < rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """队列满时丢弃日志并计数，而不是阻塞调用方"""
+
+    def __init__(self, log_queue: queue.Queue, name: str):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_metric = LOG_RECORDS_DROPPED.labels(name)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._dropped_metric.inc()
+
+
+def build_formatter(log_format: str) -> logging.Formatter:
+    if log_format == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+
+
+class SharedFileMixin:
+    """
+    多个进程写同一个轮转文件：
+    - 每次写入前检查文件是否已被其他进程轮转（路径指向的不再是已打开的文件），是则重新打开
+    - 轮转时持有 <文件>.lock 上的排他锁，拿到锁后若发现其他进程刚完成轮转，只重新打开文件
+    """
+
+    def _file_replaced(self) -> bool:
+        try:
+            on_disk = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self.stream.fileno())
+        return (on_disk.st_dev, on_disk.st_ino) != (opened.st_dev, opened.st_ino)
+
+    def _reopen(self) -> None:
+        self.stream.close()
+        self.stream = self._open()
+        self._rolled_over_elsewhere()
+
+    def _rolled_over_elsewhere(self) -> None:
+        """发现其他进程已完成轮转、重新打开文件后调用，用于更新本进程的轮转计划"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.stream is not None and self._file_replaced():
+            self._reopen()
+        super().emit(record)
+
+    def doRollover(self) -> None:
+        if fcntl is None or self.stream is None:
+            super().doRollover()
+            return
+        with open(f"{self.baseFilename}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self._file_replaced():
+                self._reopen()
+            else:
+                super().doRollover()
+
+
+class SharedRotatingFileHandler(SharedFileMixin, RotatingFileHandler):
+    pass
+
+
+class SharedTimedRotatingFileHandler(SharedFileMixin, TimedRotatingFileHandler):
+    def _rolled_over_elsewhere(self) -> None:
+        current_time = int(time.time())
+        rollover_at = self.computeRollover(current_time)
+        while rollover_at <= current_time:
+            rollover_at += self.interval
+        self.rolloverAt = rollover_at
+
+
+def build_file_handler(file_name: str, rotation: str, max_bytes: int, backup_count: int,
+                       directory: str = LOG_DIR) -> logging.Handler:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, file_name)
+    if rotation == "time":
+        return SharedTimedRotatingFileHandler(path, when=settings.LOG_ROTATION_WHEN,
+                                              backupCount=backup_count, encoding="utf-8")
+    return SharedRotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+
+
+def attach_queue(_logger: logging.Logger, handlers: List[logging.Handler],
+                 queue_size: int = None) -> DroppingQueueHandler:
+    """把 handlers 挂到后台线程上，logger 本身只保留一个非阻塞的 QueueHandler"""
+    log_queue = queue.Queue(maxsize=queue_size or settings.LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue, _logger.name)
+    # 在调用方线程上取 contextvar，后台线程中已经拿不到请求上下文
+    queue_handler.addFilter(RequestIdFilter())
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    _logger.addHandler(queue_handler)
+    return queue_handler
+
+
+def stop_listeners() -> None:
+    """停止后台线程，停止前会写完队列中剩余的日志"""
+    while _listeners:
+        _listeners.pop().stop()
 
 
 def setup_logger():
     _logger = logging.getLogger("fastapi")
     _logger.setLevel(logging.INFO)
 
-    # 日志格式
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - "
-        "PID:%(process)d - TID:%(thread)d - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
+    # 避免重复添加 handler
+    if _logger.handlers:
+        return _logger
+
+    formatter = build_formatter(settings.LOG_FORMAT)
 
     # 控制台输出
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
 
-    # 避免重复添加 handler
-    if not _logger.handlers:
-        _logger.addHandler(console_handler)
-
     # === 文件输出 ===
-    log_dir = os.path.join(BASE_DIR.parent.parent, "logs")
-    os.makedirs(log_dir, exist_ok=True)
-
-    log_file_path = os.path.join(log_dir, "app.log")
-
-    file_handler = logging.FileHandler(log_file_path, encoding="utf-8")
+    file_handler = build_file_handler("app.log", settings.LOG_ROTATION,
+                                      settings.LOG_MAX_BYTES, settings.LOG_BACKUP_COUNT)
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
-    _logger.addHandler(file_handler)
 
+    queue_handler = attach_queue(_logger, [console_handler, file_handler])
+    if settings.LOG_SAMPLING:
+        queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+    return _logger
+
+
+def setup_slow_query_logger():
+    """慢查询日志：单独写入 logs/slow_query.log，按大小轮转，不向上传播到应用日志"""
+    _logger = logging.getLogger("fastapi.slow_query")
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+    if _logger.handlers:
+        return _logger
+
+    file_handler = build_file_handler("slow_query.log", "size",
+                                      settings.SLOW_QUERY_LOG_MAX_BYTES, settings.SLOW_QUERY_LOG_BACKUP_COUNT)
+    # 每行一条 JSON 记录
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    attach_queue(_logger, [file_handler])
     return _logger
 
 
 logger = setup_logger()
+slow_query_logger = setup_slow_query_logger()
+atexit.register(stop_listeners)
@@ -0,0 +1,105 @@
+"""
+事件循环延迟监控与阻塞检测
+
+- 延迟：后台协程每隔 interval 休眠一次，实际唤醒时间与预期之差就是调度延迟，记录到 event_loop_lag_seconds
+- 阻塞检测：看门狗线程每隔 threshold/4 通过 call_soon_threadsafe 向事件循环发送一次探测，探测超过 threshold
+  仍未被执行，说明有回调正在阻塞事件循环，此时抓取事件循环线程的调用栈写入日志，并计数 event_loop_blocked_total。
+  探测与延迟采样的 interval 无关，超过 threshold + threshold/4 的阻塞一定会被发现；阻塞在看门狗检查之前结束时，
+  由探测回调补记一次（此时已无法抓取调用栈）。同一次阻塞只记录一次
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from src.common.utils.logger import logger
+from src.common.utils.metrics import EVENT_LOOP_BLOCKED, EVENT_LOOP_LAG
+
+STACK_LIMIT = 30
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.5, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 尚未被事件循环执行的探测的发送时间，以及它是否已经记录过
+        self._ping_sent: Optional[float] = None
+        self._ping_reported = False
+        self._report_lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """在事件循环中调用"""
+        self._loop_thread_id = threading.get_ident()
+        self._loop = asyncio.get_running_loop()
+        self._ping_sent = None
+        self._stop.clear()
+        self._task = self._loop.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            EVENT_LOOP_LAG.observe(lag)
+
+    def _pong(self, sent: float) -> None:
+        """探测回调，在事件循环线程中执行"""
+        blocked_for = time.monotonic() - sent
+        if blocked_for > self.threshold and self._claim_report():
+            self.report(blocked_for, with_stack=False)
+        self._ping_sent = None
+
+    def _claim_report(self) -> bool:
+        """看门狗与探测回调可能同时发现同一次阻塞，只让先到的一方记录"""
+        with self._report_lock:
+            if self._ping_reported:
+                return False
+            self._ping_reported = True
+            return True
+
+    def _watch(self) -> None:
+        check_interval = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(check_interval):
+            sent = self._ping_sent
+            if sent is None:
+                self._ping_reported = False
+                self._ping_sent = now = time.monotonic()
+                try:
+                    self._loop.call_soon_threadsafe(self._pong, now)
+                except RuntimeError:
+                    # 事件循环已关闭
+                    return
+                continue
+            blocked_for = time.monotonic() - sent
+            if blocked_for > self.threshold and self._claim_report():
+                self.report(blocked_for)
+
+    def report(self, blocked_for: float, with_stack: bool = True) -> None:
+        EVENT_LOOP_BLOCKED.inc()
+        if not with_stack:
+            logger.warning(f"事件循环曾阻塞 {blocked_for * 1000:.0f}ms，阻塞已结束，未能抓取调用栈")
+            return
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT)) if frame else "<unknown>"
+        logger.warning(f"事件循环已阻塞 {blocked_for * 1000:.0f}ms，当前调用栈:\n{stack}")
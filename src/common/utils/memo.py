@@ -0,0 +1,339 @@
+"""
+两级缓存（进程内 LRU + Redis）
+
+- 一级：进程内有界 LRU，命中时不访问网络；本地 TTL 较短，限制多 worker 间的数据不一致时间
+- 二级：Redis，多个 worker 共享
+- 单飞：同一进程内同一个键的并发未命中只执行一次加载，其余协程等待同一结果
+- 提前刷新：按 XFetch 算法在过期前按概率提前重新加载，避免热点键同时过期引发击穿
+
+用法：
+    @memoize("user_by_id", ttl=60, key=lambda db, user_id: user_id, tags=lambda db, user_id: [f"user:{user_id}"])
+    async def get_user_by_id(db, user_id): ...
+
+事务提交后 change_version 发布变更标签，带有对应标签的缓存会被删除（本进程 LRU + Redis）。
+"""
+import asyncio
+import functools
+import json
+import math
+import random
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import DateTime, Date
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.common.utils.change_version import change_version
+from src.common.utils.logger import logger
+from src.core.server.dependencies import get_redis
+
+CACHE_PREFIX = "memo"
+
+
+class _Entry:
+    __slots__ = ("value", "expiry", "delta", "tags")
+
+    def __init__(self, value: Any, expiry: float, delta: float, tags: Tuple[str, ...] = ()):
+        self.value = value  # 编码后的值
+        self.expiry = expiry  # 过期时间戳
+        self.delta = delta  # 加载耗时（秒），用于提前刷新
+        self.tags = tags  # 变更标签，只用于进程内缓存
+
+
+class LRUCache:
+    """有界 LRU，超过容量时淘汰最久未使用的键；条目因淘汰、过期、删除或覆盖离开缓存时调用 on_remove"""
+
+    def __init__(self, maxsize: int = 1024, on_remove: Callable[[str, _Entry], None] = None):
+        self.maxsize = maxsize
+        self.on_remove = on_remove
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def _removed(self, key: str, entry: Optional[_Entry]) -> None:
+        if entry is not None and self.on_remove is not None:
+            self.on_remove(key, entry)
+
+    def get(self, key: str) -> Optional[_Entry]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry.expiry <= time.time():
+            del self._data[key]
+            self._removed(key, entry)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: _Entry) -> None:
+        old = self._data.get(key)
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        if old is not None and old is not entry:
+            self._removed(key, old)
+        while len(self._data) > self.maxsize:
+            self._removed(*self._data.popitem(last=False))
+
+    def delete(self, key: str) -> None:
+        self._removed(key, self._data.pop(key, None))
+
+    def clear(self) -> None:
+        data, self._data = self._data, OrderedDict()
+        for key, entry in data.items():
+            self._removed(key, entry)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache:
+    def __init__(
+            self,
+            namespace: str,
+            ttl: int = 60,
+            local_ttl: Optional[int] = None,
+            maxsize: int = 1024,
+            beta: float = 1.0,
+            encode: Callable[[Any], Any] = None,
+            decode: Callable[[Any], Any] = None,
+            cache_none: bool = False,
+    ):
+        """
+        Args:
+            namespace: 缓存命名空间，用作 Redis 键前缀
+            ttl: Redis 中的缓存秒数
+            local_ttl: 进程内缓存秒数，默认 min(ttl, 5)
+            maxsize: 进程内最多缓存的键数
+            beta: 提前刷新系数，越大越早刷新，0 表示关闭
+            encode / decode: 值与 JSON 可序列化结构之间的转换
+            cache_none: 是否缓存 None 结果
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = local_ttl if local_ttl is not None else min(ttl, 5)
+        self.beta = beta
+        self.encode = encode or (lambda value: value)
+        self._decode = decode or (lambda value: value)
+        self.cache_none = cache_none
+        self.local = LRUCache(maxsize, on_remove=self._forget_tags)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 标签 -> 本地缓存中带有该标签的键，只包含仍在 LRU 中的键，大小随 LRU 有界
+        self._local_tags: Dict[str, Set[str]] = {}
+        self.stats = {"local_hit": 0, "redis_hit": 0, "miss": 0, "coalesced": 0, "early_refresh": 0}
+
+    def decode(self, value: Any) -> Any:
+        return self._decode(value) if value is not None else None
+
+    def _redis_key(self, key: str) -> str:
+        return f"{CACHE_PREFIX}:{self.namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{CACHE_PREFIX}:{self.namespace}:tag:{tag}"
+
+    def _should_refresh(self, entry: _Entry) -> bool:
+        """XFetch：越接近过期、加载越慢，提前刷新的概率越大"""
+        if self.beta <= 0:
+            return False
+        return time.time() - entry.delta * self.beta * math.log(random.random() or 1e-12) >= entry.expiry
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]],
+                          tags: Iterable[str] = ()) -> Any:
+        tags = tuple(tags)
+        entry = self.local.get(key)
+        if entry is not None:
+            self.stats["local_hit"] += 1
+            return self.decode(entry.value)
+        entry = await self._redis_get(key)
+        if entry is not None:
+            # 提前刷新只作用于共享的二级缓存，本地缓存过期后回源到 Redis
+            if not self._should_refresh(entry) or key in self._inflight:
+                self.stats["redis_hit"] += 1
+                self._store_local(key, entry, tags)
+                return self.decode(entry.value)
+            self.stats["early_refresh"] += 1
+        return await self._load(key, loader, tags)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], tags: Iterable[str]) -> Any:
+        while key in self._inflight:
+            future = self._inflight[key]
+            self.stats["coalesced"] += 1
+            try:
+                return self.decode(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                # 领头的协程被取消时由当前协程重新加载，自身被取消则继续抛出
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.stats["miss"] += 1
+        try:
+            start = time.perf_counter()
+            value = await loader()
+            delta = time.perf_counter() - start
+            encoded = self.encode(value) if value is not None else None
+            if value is not None or self.cache_none:
+                entry = _Entry(encoded, time.time() + self.ttl, delta)
+                self._store_local(key, entry, tags)
+                await self._redis_set(key, entry, tags)
+            future.set_result(encoded)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 避免没有等待者时出现 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store_local(self, key: str, entry: _Entry, tags: Tuple[str, ...]) -> None:
+        local_entry = _Entry(entry.value, min(entry.expiry, time.time() + self.local_ttl), entry.delta, tags)
+        self.local.set(key, local_entry)
+        for tag in tags:
+            self._local_tags.setdefault(tag, set()).add(key)
+
+    def _forget_tags(self, key: str, entry: _Entry) -> None:
+        for tag in entry.tags:
+            keys = self._local_tags.get(tag)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._local_tags[tag]
+
+    async def _redis_get(self, key: str) -> Optional[_Entry]:
+        try:
+            redis_client = await get_redis()
+            raw = await redis_client.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"读取二级缓存失败 {self.namespace}: {e}")
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return _Entry(data["v"], data["e"], data["d"])
+
+    async def _redis_set(self, key: str, entry: _Entry, tags: Iterable[str]) -> None:
+        try:
+            redis_client = await get_redis()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                payload = json.dumps({"v": entry.value, "e": entry.expiry, "d": entry.delta}, ensure_ascii=False)
+                pipe.setex(self._redis_key(key), self.ttl, payload)
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), key)
+                    pipe.expire(self._tag_key(tag), self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"写入二级缓存失败 {self.namespace}: {e}")
+
+    async def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            self.local.delete(key)
+        try:
+            redis_client = await get_redis()
+            await redis_client.delete(*[self._redis_key(key) for key in keys])
+        except Exception as e:
+            logger.warning(f"删除二级缓存失败 {self.namespace}: {e}")
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        """删除带有任一标签的缓存"""
+        tags = list(tags)
+        keys = set()
+        for tag in tags:
+            keys |= self._local_tags.pop(tag, set())
+        try:
+            redis_client = await get_redis()
+            for tag in tags:
+                members = await redis_client.smembers(self._tag_key(tag))
+                if members:
+                    keys |= set(members)
+                    await redis_client.delete(self._tag_key(tag))
+        except Exception as e:
+            logger.warning(f"读取二级缓存标签失败 {self.namespace}: {e}")
+        if keys:
+            await self.invalidate(*keys)
+
+
+_caches: List[TwoTierCache] = []
+
+
+async def _on_tags_changed(tags: Iterable[str]) -> None:
+    tags = list(tags)
+    for cache in _caches:
+        await cache.invalidate_tags(tags)
+
+
+change_version.subscribe(_on_tags_changed)
+
+
+def _default_key(*args, **kwargs) -> str:
+    # 数据库会话不参与缓存键
+    parts = [str(arg) for arg in args if not isinstance(arg, AsyncSession)]
+    parts += [f"{name}={value}" for name, value in sorted(kwargs.items()) if not isinstance(value, AsyncSession)]
+    return ":".join(parts)
+
+
+def memoize(
+        namespace: str,
+        ttl: int = 60,
+        key: Callable[..., Any] = None,
+        tags: Callable[..., Iterable[str]] = None,
+        **options,
+):
+    """
+    两级缓存装饰器，用于 async 函数
+
+    Args:
+        namespace: 缓存命名空间
+        ttl: 缓存秒数
+        key: 由调用参数生成缓存键，默认拼接除数据库会话外的所有参数
+        tags: 由调用参数生成变更标签，标签发布后缓存失效
+        options: 传给 TwoTierCache 的其他参数
+    """
+
+    def decorator(func):
+        cache = TwoTierCache(namespace, ttl=ttl, **options)
+        _caches.append(cache)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = str(key(*args, **kwargs)) if key else _default_key(*args, **kwargs)
+            cache_tags = tags(*args, **kwargs) if tags else ()
+            return await cache.get_or_load(cache_key, lambda: func(*args, **kwargs), cache_tags)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def orm_codec(model):
+    """
+    生成 ORM 模型的 encode / decode 参数，缓存中只保存列值，读取时构造游离对象（只读使用）
+
+    用法：@memoize("user_by_id", **orm_codec(User))
+    """
+    columns = model.__table__.columns
+
+    def encode(obj) -> dict:
+        data = {}
+        for column in columns:
+            value = getattr(obj, column.key)
+            data[column.key] = value.isoformat() if isinstance(value, (datetime, date)) else value
+        return data
+
+    def decode(data: dict):
+        values = {}
+        for column in columns:
+            value = data.get(column.key)
+            if value is not None and isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif value is not None and isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+            values[column.key] = value
+        return model(**values)
+
+    return {"encode": encode, "decode": decode}
@@ -0,0 +1,135 @@
+"""
+内存分析（tracemalloc）
+
+- 管理接口启动/停止 tracemalloc、拍摄命名快照、查看分配最多的代码位置、对比两个快照
+- 路由峰值：tracemalloc 运行期间按 MEMORY_ROUTE_SAMPLE_RATE 抽样请求，请求开始时重置峰值，结束时读取峰值与起点之差，
+  作为该路由的峰值分配。峰值是进程级的，同一时刻只抽样一个请求，但并发请求的分配仍会计入，结果是近似值，
+  用于找出明显偏大的路由
+"""
+import fnmatch
+import random
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from src.common.utils.metrics import ROUTE_PEAK_ALLOCATION
+
+# 内存中最多保留的快照数，超出时丢弃最早的
+MAX_SNAPSHOTS = 5
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+_route_peaks: Dict[str, dict] = {}
+_sampling = False
+
+
+def start(frames: int = 25) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop() -> None:
+    """停止追踪并清空快照"""
+    tracemalloc.stop()
+    _snapshots.clear()
+
+
+def status() -> dict:
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "current": current,
+        "peak": peak,
+        "overhead": tracemalloc.get_tracemalloc_memory(),
+        "snapshots": list(_snapshots),
+    }
+
+
+def take_snapshot(name: Optional[str] = None) -> str:
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc 未启动")
+    name = name or time.strftime("%Y%m%d-%H%M%S")
+    _snapshots[name] = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+    _snapshots.move_to_end(name)
+    while len(_snapshots) > MAX_SNAPSHOTS:
+        _snapshots.popitem(last=False)
+    return name
+
+
+def get_snapshot(name: str) -> tracemalloc.Snapshot:
+    try:
+        return _snapshots[name]
+    except KeyError:
+        raise KeyError(f"快照 {name} 不存在")
+
+
+def _filter(stats: list, include: Optional[str]) -> list:
+    if not include:
+        return stats
+    return [stat for stat in stats if any(fnmatch.fnmatch(frame.filename, include) for frame in stat.traceback)]
+
+
+def top(name: str, key_type: str = "lineno", limit: int = 20, include: Optional[str] = None) -> List[dict]:
+    """分配最多的代码位置，include 为文件名通配符（如 */src/*）"""
+    stats = _filter(get_snapshot(name).statistics(key_type), include)
+    return [{
+        "size": stat.size,
+        "count": stat.count,
+        "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+    } for stat in stats[:limit]]
+
+
+def diff(base: str, target: str, key_type: str = "lineno", limit: int = 20,
+         include: Optional[str] = None) -> List[dict]:
+    """target 相对 base 的分配变化，按增长量排序"""
+    stats = _filter(get_snapshot(target).compare_to(get_snapshot(base), key_type), include)
+    return [{
+        "size": stat.size,
+        "size_diff": stat.size_diff,
+        "count": stat.count,
+        "count_diff": stat.count_diff,
+        "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+    } for stat in stats[:limit]]
+
+
+# -------------------------
+# 路由峰值分配
+# -------------------------
+def begin_route_sample(sample_rate: float) -> Optional[int]:
+    """决定是否抽样本次请求，抽中时返回起始内存，未抽中返回 None"""
+    global _sampling
+    if _sampling or not tracemalloc.is_tracing() or random.random() >= sample_rate:
+        return None
+    _sampling = True
+    tracemalloc.reset_peak()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def end_route_sample(route: str, start_memory: int) -> None:
+    global _sampling
+    _sampling = False
+    if not tracemalloc.is_tracing():
+        return
+    peak = max(tracemalloc.get_traced_memory()[1] - start_memory, 0)
+    ROUTE_PEAK_ALLOCATION.labels(route).observe(peak)
+    entry = _route_peaks.setdefault(route, {"samples": 0, "max": 0, "total": 0})
+    entry["samples"] += 1
+    entry["max"] = max(entry["max"], peak)
+    entry["total"] += peak
+
+
+def route_peaks() -> List[dict]:
+    """各路由的峰值分配统计，按最大值排序"""
+    return sorted(({
+        "route": route,
+        "samples": entry["samples"],
+        "max": entry["max"],
+        "avg": entry["total"] // entry["samples"],
+    } for route, entry in _route_peaks.items()), key=lambda item: item["max"], reverse=True)
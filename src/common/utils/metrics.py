@@ -0,0 +1,372 @@
+"""
+轻量级指标库（Prometheus 文本格式）
+
+只依赖标准库，提供 Counter / Gauge / Histogram 三种指标。
+
+多 worker 模式：设置 METRICS_MULTIPROC_DIR 后，每个 worker 定期把本进程的指标快照写到该目录下的
+{pid}-{进程启动时间}.json（PID 被新进程复用时不会覆盖旧 worker 的快照），/metrics 由任意 worker 响应时合并所有快照：
+- Counter / Histogram：累加所有 worker；已退出 worker 的快照在抓取时合并进 dead.json 后删除，
+  计数保持单调，目录中的文件数不随 worker 重启次数增长
+- Gauge：只累加存活的 worker
+"""
+import bisect
+import json
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from src.core.conf.config import settings
+
+# 默认的延迟分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+# 快照中拼接标签值的分隔符
+_SEP = "\x1f"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict = {}
+        self._children: Dict[LabelValues, "_Child"] = {}
+
+    def labels(self, *labelvalues) -> "_Child":
+        """按标签值获取子指标，子指标会被缓存，热路径上开销只有一次字典查找"""
+        child = self._children.get(labelvalues)
+        if child is None:
+            key = tuple(str(value) for value in labelvalues)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} 需要标签 {self.labelnames}")
+            child = self._children[labelvalues] = _Child(self, key)
+        return child
+
+    def samples(self) -> Dict[LabelValues, object]:
+        """返回 {标签值元组: 当前值} 的拷贝"""
+        return dict(self._values)
+
+    def snapshot(self) -> dict:
+        return {_SEP.join(key): (list(value) if isinstance(value, list) else value)
+                for key, value in list(self._values.items())}
+
+
+class _Child:
+    __slots__ = ("metric", "key")
+
+    def __init__(self, metric: _Metric, key: LabelValues):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.metric._inc(self.key, amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.metric._inc(self.key, -amount)
+
+    def set(self, value: float) -> None:
+        self.metric._values[self.key] = value
+
+    def observe(self, value: float) -> None:
+        self.metric._observe(self.key, value)
+
+    def get(self) -> float:
+        return self.metric._get(self.key)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _inc(self, key: LabelValues, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _get(self, key: LabelValues) -> float:
+        return self._values.get(key, 0.0)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签：[各分桶计数..., +Inf 计数, sum]，分桶计数非累积，输出时再累加
+
+    def _observe(self, key: LabelValues, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            data[index] += 1
+            data[-1] += value
+
+    def _get(self, key: LabelValues) -> float:
+        """返回观测次数"""
+        data = self._values.get(key)
+        return sum(data[:-1]) if data else 0.0
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            return self._metrics[metric.name]
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", [])),
+                "samples": metric.snapshot(),
+            }
+            for name, metric in list(self._metrics.items())
+        }
+
+    def render(self, multiproc_dir: Optional[str] = None) -> str:
+        """输出 Prometheus 文本格式，指定 multiproc_dir 时合并所有 worker 的快照"""
+        snapshots = [self.snapshot()]
+        if multiproc_dir:
+            own = _snapshot_name(os.getpid(), _process_start(os.getpid()))
+            snapshots += [data for name, data in _read_snapshots(multiproc_dir) if name != own]
+        return _render(_merge(snapshots))
+
+
+DEAD_SNAPSHOT = "dead.json"
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """进程启动时间（/proc/<pid>/stat 的 starttime），与 PID 一起唯一标识一个进程；没有 /proc 的平台返回 None"""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            # 第 2 个字段（进程名）可能包含空格，从最后一个右括号之后开始数
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _snapshot_name(pid: int, start: Optional[str]) -> str:
+    return f"{pid}-{start}.json" if start else f"{pid}.json"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _snapshot_alive(file_name: str) -> bool:
+    """快照对应的进程是否仍在运行：PID 存在，且（能读取 /proc 时）启动时间一致"""
+    pid, _, start = file_name[:-5].partition("-")
+    pid = int(pid)
+    if not _pid_alive(pid):
+        return False
+    return not start or _process_start(pid) == start
+
+
+def _load(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return None
+
+
+def _fold_dead(multiproc_dir: str, file_names: List[str]) -> None:
+    """把已退出 worker 的 Counter / Histogram 合并进 dead.json 并删除其快照；持有目录锁，多个 worker 同时抓取也只合并一次"""
+    lock_file = open(os.path.join(multiproc_dir, "dead.lock"), "a")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        dead_path = os.path.join(multiproc_dir, DEAD_SNAPSHOT)
+        snapshots = [_load(dead_path) or {}]
+        folded = []
+        for file_name in file_names:
+            # 等锁期间可能已被其他 worker 合并
+            data = _load(os.path.join(multiproc_dir, file_name))
+            if data is None:
+                continue
+            snapshots.append({name: metric for name, metric in data.items() if metric["type"] != "gauge"})
+            folded.append(file_name)
+        if not folded:
+            return
+        tmp_path = f"{dead_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(_merge(snapshots), f)
+        os.replace(tmp_path, dead_path)
+        for file_name in folded:
+            try:
+                os.remove(os.path.join(multiproc_dir, file_name))
+            except FileNotFoundError:
+                pass
+    finally:
+        lock_file.close()
+
+
+def _read_snapshots(multiproc_dir: str) -> List[Tuple[str, dict]]:
+    """返回 (文件名, 快照)，已退出 worker 的快照先合并进 dead.json"""
+    if not os.path.isdir(multiproc_dir):
+        return []
+    live, dead = [], []
+    for file_name in os.listdir(multiproc_dir):
+        if not file_name.endswith(".json") or file_name == DEAD_SNAPSHOT:
+            continue
+        try:
+            (live if _snapshot_alive(file_name) else dead).append(file_name)
+        except ValueError:
+            continue
+    if dead:
+        _fold_dead(multiproc_dir, dead)
+
+    snapshots = []
+    for file_name in live + [DEAD_SNAPSHOT]:
+        data = _load(os.path.join(multiproc_dir, file_name))
+        if data is not None:
+            snapshots.append((file_name, data))
+    return snapshots
+
+
+def _merge(snapshots: List[dict]) -> dict:
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for key, value in metric["samples"].items():
+                if metric["type"] == "histogram":
+                    current = target["samples"].get(key)
+                    target["samples"][key] = [a + b for a, b in zip(current, value)] if current else list(value)
+                else:
+                    target["samples"][key] = target["samples"].get(key, 0.0) + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labelnames: Sequence[str], key: str, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    values = key.split(_SEP) if labelnames else []
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _render(metrics: dict) -> str:
+    lines = []
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labelnames"]
+        for key, value in sorted(metric["samples"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(labelnames, key)} {_format_value(value)}")
+                continue
+            cumulative = 0.0
+            for bound, count in zip(list(metric["buckets"]) + [float("inf")], value[:-1]):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else repr(float(bound))
+                lines.append(f"{name}_bucket{_labels(labelnames, key, [('le', le)])} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_labels(labelnames, key)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_labels(labelnames, key)} {_format_value(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_snapshot(multiproc_dir: str) -> None:
+    """把本进程的指标快照写入共享目录（先写临时文件再原子替换）"""
+    os.makedirs(multiproc_dir, exist_ok=True)
+    path = os.path.join(multiproc_dir, _snapshot_name(os.getpid(), _process_start(os.getpid())))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(REGISTRY.snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+
+# -------------------------
+# 公共指标
+# -------------------------
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP 请求总数", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时", ("method", "route"))
+HTTP_REQUESTS_IN_PROGRESS = REGISTRY.gauge(
+    "http_requests_in_progress", "正在处理的 HTTP 请求数", ("method",))
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds", "SQL 语句执行耗时", ("operation",))
+REDIS_COMMAND_DURATION = REGISTRY.histogram(
+    "redis_command_duration_seconds", "Redis 命令耗时", ("command",))
+SMTP_SEND_DURATION = REGISTRY.histogram(
+    "smtp_send_duration_seconds", "发送邮件耗时", ("result",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+RESPONSE_CACHE_REQUESTS = REGISTRY.counter(
+    "response_cache_requests_total", "响应缓存查询次数", ("route", "result"))
+EVENT_LOOP_LAG = REGISTRY.histogram(
+    "event_loop_lag_seconds", "事件循环调度延迟",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+EVENT_LOOP_BLOCKED = REGISTRY.counter(
+    "event_loop_blocked_total", "事件循环被单个回调阻塞超过阈值的次数")
+ROUTE_PEAK_ALLOCATION = REGISTRY.histogram(
+    "route_peak_allocation_bytes", "抽样请求的峰值内存分配（仅 tracemalloc 运行时）", ("route",),
+    buckets=(64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2, 256 * 1024 ** 2))
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total", "日志队列已满被丢弃的日志条数", ("logger",))
+
+
+def render_metrics() -> str:
+    return REGISTRY.render(settings.METRICS_MULTIPROC_DIR)
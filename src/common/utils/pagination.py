@@ -2,6 +2,20 @@
 import math
 from fastapi import Query
 from sqlalchemy import select, func
+from src.common.utils.tracing import span
+
+
+def build_page_queries(query, page_num: int, page_size: int):
+    """
+    构造分页用的两条语句（不执行）
+    :return: (总数查询, 当前页查询)
+    """
+    if query._distinct or query._group_by_clauses:
+        count_query = select(func.count()).select_from(query.subquery())
+    else:
+        # 普通过滤查询直接替换查询列为 count(*)，避免子查询中带上 column_property 等相关子查询
+        count_query = query.with_only_columns(func.count(), maintain_column_froms=True).order_by(None)
+    return count_query, query.offset((page_num - 1) * page_size).limit(page_size)
 
 
 async def paginate(
@@ -18,14 +32,16 @@ async def paginate(
     :param page_size: 一页总条数
     :return:
     """
+    count_query, page_query = build_page_queries(query, page_num, page_size)
     # 总数
-    count_query = select(func.count()).select_from(query.subquery())
-    total_items = (await db.execute(count_query)).scalar()
+    with span("paginate.count"):
+        total_items = (await db.execute(count_query)).scalar()
     total_pages = math.ceil(total_items / page_size) if total_items else 0
 
     # 这里由于执行了查询, 因此需要await
-    items = await db.execute(query.offset((page_num - 1) * page_size).limit(page_size))
-    items = items.scalars().all()
+    with span("paginate.page", page_num=page_num, page_size=page_size):
+        items = await db.execute(page_query)
+        items = items.scalars().all()
     return {
         "list": items,
         "total": total_items,
@@ -0,0 +1,207 @@
+"""
+采样分析器（在线 worker 上按需运行）
+
+采样线程按固定间隔读取事件循环线程的调用栈（sys._current_frames），不需要在被测代码中插桩：
+- wall 模式：每次采样记一次。事件循环空闲（停在 selector 上）记为 <idle>；同时遍历所有 asyncio 任务的
+  await 链（coroutine.cr_await），记录挂起中的任务正在等待什么，这部分栈以 <task> 开头
+- cpu 模式：只在事件循环线程的 CPU 时间（pthread_getcpuclockid）有增长时采样，按增长的 CPU 时间加权，
+  不统计挂起的任务
+
+安全限制：时长、采样间隔有上下限，栈深度与不同栈的数量有上限；采样自身耗时超过 max_overhead 比例时自动拉长间隔。
+结果可以输出为 collapsed 栈（flamegraph.pl / speedscope 直接读取）或 pstats 文件（snakeviz / pstats 读取）。
+"""
+import asyncio
+import marshal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+Frame = Tuple[str, int, str]  # (文件, 首行号, 函数名)，与 pstats 的键一致
+Stack = Tuple[Frame, ...]
+
+IDLE_FRAME: Frame = ("~", 0, "<idle>")
+TASK_FRAME: Frame = ("~", 0, "<task>")
+TRUNCATED_FRAME: Frame = ("~", 0, "<truncated>")
+# 事件循环空闲时停留的 Python 函数：标准事件循环停在 selectors 的 select 上，uvloop 的循环是 C 实现，
+# 空闲时 Python 栈的叶子是 run_until_complete / run_forever 的调用方
+_IDLE_FUNCTIONS = {"select", "run_forever", "run_until_complete"}
+_IDLE_FILES = ("selectors.py", "asyncio/runners.py")
+
+MAX_STACK_DEPTH = 64
+MAX_DISTINCT_STACKS = 10000
+
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def thread_stack(frame, max_depth: int = MAX_STACK_DEPTH) -> Stack:
+    """从叶子帧回溯到根，返回根在前的栈"""
+    stack = []
+    while frame is not None and len(stack) < max_depth:
+        stack.append(_frame_key(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def task_stack(task: asyncio.Task, max_depth: int = MAX_STACK_DEPTH) -> Stack:
+    """沿 cr_await 链得到挂起任务的逻辑调用栈"""
+    stack = [TASK_FRAME]
+    coro = task.get_coro()
+    while coro is not None and len(stack) < max_depth:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_key(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return tuple(stack)
+
+
+def _is_idle(stack: Stack) -> bool:
+    if not stack:
+        return False
+    filename, _, name = stack[-1]
+    return name in _IDLE_FUNCTIONS or filename.replace("\\", "/").endswith(_IDLE_FILES)
+
+
+def _thread_cpu_clock(thread_id: int):
+    """返回读取指定线程 CPU 时间的函数，平台不支持时返回 None"""
+    try:
+        clock_id = time.pthread_getcpuclockid(thread_id)
+        time.clock_gettime(clock_id)
+    except (AttributeError, OSError):
+        return None
+    return lambda: time.clock_gettime(clock_id)
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id: int, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 interval: float = 0.01, mode: str = "wall", max_overhead: float = 0.02):
+        if mode not in ("wall", "cpu"):
+            raise ValueError("mode 只支持 wall / cpu")
+        self.thread_id = thread_id
+        self.loop = loop
+        self.interval = interval
+        self.mode = mode
+        self.max_overhead = max_overhead
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.elapsed = 0.0
+        self.sampling_time = 0.0
+
+    def run(self, duration: float) -> "SamplingProfiler":
+        """在当前（非事件循环）线程中阻塞运行 duration 秒"""
+        cpu_clock = _thread_cpu_clock(self.thread_id) if self.mode == "cpu" else None
+        if self.mode == "cpu" and cpu_clock is None:
+            raise RuntimeError("当前平台不支持线程 CPU 时钟")
+        last_cpu = cpu_clock() if cpu_clock else 0.0
+        interval = self.interval
+        start = time.perf_counter()
+        deadline = start + duration
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+            sample_start = time.perf_counter()
+            if cpu_clock:
+                cpu_now = cpu_clock()
+                weight, last_cpu = cpu_now - last_cpu, cpu_now
+                if weight > 0:
+                    self._sample_thread(weight)
+            else:
+                self._sample_thread(1)
+                self._sample_tasks()
+            self.sample_count += 1
+            cost = time.perf_counter() - sample_start
+            self.sampling_time += cost
+            # 采样耗时占比过高时拉长间隔
+            if cost > interval * self.max_overhead:
+                interval = min(cost / self.max_overhead, 1.0)
+        self.elapsed = time.perf_counter() - start
+        self.interval = interval
+        return self
+
+    def _add(self, stack: Stack, weight: float) -> None:
+        if stack not in self.samples and len(self.samples) >= MAX_DISTINCT_STACKS:
+            stack = (TRUNCATED_FRAME,)
+        self.samples[stack] += weight
+
+    def _sample_thread(self, weight: float) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = thread_stack(frame)
+        self._add((IDLE_FRAME,) if _is_idle(stack) else stack, weight)
+
+    def _sample_tasks(self) -> None:
+        if self.loop is None:
+            return
+        try:
+            tasks = list(asyncio.all_tasks(self.loop))
+        except RuntimeError:
+            # 事件循环线程正在修改任务集合，跳过这一次
+            return
+        for task in tasks:
+            if not task.done():
+                self._add(task_stack(task), 1)
+
+    # -------------------------
+    # 输出
+    # -------------------------
+    def collapsed(self) -> str:
+        """每行：根;...;叶 权重"""
+        lines = []
+        for stack, weight in self.samples.most_common():
+            names = ";".join(f"{name} ({filename}:{lineno})" if lineno else name
+                             for filename, lineno, name in stack)
+            lines.append(f"{names} {int(weight) if self.mode == 'wall' else int(weight * 1e6)}")
+        return "\n".join(lines) + "\n"
+
+    def pstats(self) -> bytes:
+        """marshal 后的 pstats 字典，可以直接用 pstats.Stats / snakeviz 打开"""
+        # wall 模式下一次采样代表的平均时长（间隔可能被自动拉长过）
+        unit = (self.elapsed / self.sample_count if self.sample_count else 0.0) if self.mode == "wall" else 1.0
+        stats: Dict[Frame, list] = {}
+        for stack, weight in self.samples.items():
+            seconds = weight * unit
+            seen = set()
+            for depth, frame in enumerate(stack):
+                entry = stats.setdefault(frame, [0, 0, 0.0, 0.0, {}])
+                if frame not in seen:
+                    # 递归调用只计一次累计时间
+                    entry[0] += 1
+                    entry[1] += 1
+                    entry[3] += seconds
+                    seen.add(frame)
+                if depth == len(stack) - 1:
+                    entry[2] += seconds
+                if depth:
+                    caller = stack[depth - 1]
+                    entry[4][caller] = entry[4].get(caller, 0) + 1
+        return marshal.dumps({frame: tuple(entry) for frame, entry in stats.items()})
+
+    def summary(self) -> dict:
+        return {
+            "mode": self.mode,
+            "samples": self.sample_count,
+            "elapsed": round(self.elapsed, 3),
+            "interval": round(self.interval, 4),
+            "overhead": round(self.sampling_time / self.elapsed, 4) if self.elapsed else 0.0,
+        }
+
+
+_profile_lock = threading.Lock()
+
+
+def try_acquire_profile_lock() -> bool:
+    """同一个 worker 同时只允许一个分析任务"""
+    return _profile_lock.acquire(blocking=False)
+
+
+def release_profile_lock() -> None:
+    _profile_lock.release()
@@ -0,0 +1,74 @@
+"""
+单个请求内的 SQL 统计
+
+RequestContext 中间件在请求开始时创建 QueryStats 并放入 contextvar，SQLAlchemy 的 cursor 事件在同一上下文中执行
+（greenlet_spawn 会沿用调用方的 contextvars），据此累计查询次数、数据库耗时，以及按语句形状（去掉字面量和参数后的 SQL）
+统计的重复执行次数。同一形状的 SELECT 在一次请求中执行次数过多通常意味着 N+1 查询。
+"""
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\([^)]+\)s|%s|:\w+|\?|__\[POSTCOMPILE_\w+\]")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """把 SQL 归一为语句形状：去掉注释，字面量与占位符统一替换为 ?，IN 列表折叠为 IN (...)"""
+    shape = _COMMENT.sub("", statement)
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """一次请求的 SQL 统计"""
+
+    __slots__ = ("scope", "query_count", "db_time", "shapes")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.query_count = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+
+    @property
+    def route(self) -> Optional[str]:
+        """路由模板，路由匹配前为原始路径"""
+        if self.scope is None:
+            return None
+        return getattr(self.scope.get("route"), "path", self.scope.get("path"))
+
+    def record(self, statement: str, duration: float) -> None:
+        self.query_count += 1
+        self.db_time += duration
+        self.shapes[normalize_sql(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """返回执行次数不少于 threshold 的 SELECT 形状，疑似 N+1"""
+        return [(shape, count) for shape, count in self.shapes.most_common()
+                if count >= threshold and shape[:6].upper() == "SELECT"]
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """当前请求的 SQL 统计，不在请求上下文中时返回 None"""
+    return _query_stats.get()
+
+
+def bind_query_stats(stats: QueryStats):
+    """把统计对象绑定到当前上下文，返回用于 reset_query_stats 的 token"""
+    return _query_stats.set(stats)
+
+
+def reset_query_stats(token) -> None:
+    _query_stats.reset(token)
@@ -0,0 +1,49 @@
+"""
+请求追踪ID
+
+RequestIdMiddleware 在请求开始时把 ID 写入 contextvar，之后同一请求上下文中的日志（RequestIdFilter）、
+SQL（语句末尾的注释）、Redis 调用追踪和慢查询日志都可以取到同一个 ID，用于串联一次请求的所有记录。
+"""
+import logging
+import re
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# 只接受常见 ID 字符，避免日志注入与 SQL 注释被提前闭合
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def accept_request_id(value: Optional[str]) -> str:
+    """沿用调用方传入的合法 ID，否则生成新的"""
+    if value and _VALID_REQUEST_ID.match(value):
+        return value
+    return new_request_id()
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def bind_request_id(request_id: str):
+    """绑定到当前上下文，返回用于 reset_request_id 的 token"""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token) -> None:
+    _request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """给每条日志加上 request_id 字段，不在请求中时为 -"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        return True
@@ -0,0 +1,134 @@
+"""
+路由级响应缓存（Redis）
+
+缓存键由路由、查询/路径参数、调用方（可选）以及标签版本号组成。写操作提交后标签版本递增（见 change_version），
+旧键自然失效，不需要扫描删除，过期数据由 TTL 回收。
+
+用法：
+    cache: RouteCache = Depends(response_cache(ttl=30, tags=("project", "user")))
+    cached = await cache.get()
+    if cached:
+        return cached
+    ...
+    return await cache.set(BaseResponse.success(data=data))
+
+请求头 Cache-Control: no-cache 或 X-Cache-Bypass: 1 跳过读缓存（仍会写入新结果），Cache-Control: no-store 既不读也不写。
+"""
+import hashlib
+import json
+from collections import defaultdict
+from typing import Dict, Optional
+
+from fastapi import Depends, Request
+from fastapi.responses import Response
+
+from src.common.utils.conditional import resolve_tags, tag_versions
+from src.common.utils.logger import logger
+from src.common.utils.metrics import RESPONSE_CACHE_REQUESTS
+from src.common.utils.security import get_current_user
+from src.core.conf.config import settings
+from src.core.server.dependencies import get_redis
+
+CACHE_PREFIX = "response_cache"
+
+
+def response_cache_stats() -> Dict[str, dict]:
+    """返回本进程各路由的命中次数与命中率（多 worker 汇总见 /metrics 的 response_cache_requests_total）"""
+    counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hit": 0, "miss": 0, "bypass": 0})
+    for (route, result), value in RESPONSE_CACHE_REQUESTS.samples().items():
+        counters[route][result] = int(value)
+    stats = {}
+    for route, counter in counters.items():
+        lookups = counter["hit"] + counter["miss"]
+        stats[route] = {**counter, "hit_ratio": round(counter["hit"] / lookups, 4) if lookups else 0.0}
+    return stats
+
+
+class RouteCache:
+    """单个请求的缓存句柄"""
+
+    def __init__(self, route: str, key: Optional[str], ttl: int, read: bool, write: bool):
+        self.route = route
+        self.key = key
+        self.ttl = ttl
+        self.read = read and key is not None
+        self.write = write and key is not None
+
+    async def get(self) -> Optional[Response]:
+        if not self.read:
+            RESPONSE_CACHE_REQUESTS.labels(self.route, "bypass").inc()
+            return None
+        try:
+            redis_client = await get_redis()
+            raw = await redis_client.get(self.key)
+        except Exception as e:
+            logger.warning(f"读取响应缓存失败: {e}")
+            return None
+        if raw is None:
+            RESPONSE_CACHE_REQUESTS.labels(self.route, "miss").inc()
+            return None
+        RESPONSE_CACHE_REQUESTS.labels(self.route, "hit").inc()
+        entry = json.loads(raw)
+        return Response(
+            content=entry["body"],
+            status_code=entry["status"],
+            media_type=entry["media_type"],
+            headers={"X-Cache": "HIT"},
+        )
+
+    async def set(self, response: Response) -> Response:
+        """缓存 200 响应，并原样返回"""
+        response.headers["X-Cache"] = "MISS" if self.read else "BYPASS"
+        if not self.write or response.status_code != 200:
+            return response
+        entry = {
+            "status": response.status_code,
+            "media_type": response.media_type,
+            "body": response.body.decode(),
+        }
+        try:
+            redis_client = await get_redis()
+            await redis_client.setex(self.key, self.ttl, json.dumps(entry, ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"写入响应缓存失败: {e}")
+        return response
+
+
+def response_cache(ttl: int = None, tags=(), scoped: bool = False):
+    """
+    生成响应缓存依赖
+
+    Args:
+        ttl: 缓存秒数，默认取 RESPONSE_CACHE_DEFAULT_TTL
+        tags: 响应依赖的变更标签，可以引用路径参数，如 "user:{id}"
+        scoped: 响应内容是否因调用方而异，为 True 时缓存键中包含用户ID
+    """
+    ttl = ttl or settings.RESPONSE_CACHE_DEFAULT_TTL
+
+    async def dependency(request: Request, payload=Depends(get_current_user)) -> RouteCache:
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        cache_control = request.headers.get("Cache-Control", "").lower()
+        no_store = "no-store" in cache_control
+        bypass = no_store or "no-cache" in cache_control or request.headers.get("X-Cache-Bypass") == "1"
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return RouteCache(route, None, ttl, read=False, write=False)
+
+        resolved = resolve_tags(request, tags)
+        try:
+            versions = await tag_versions(request, resolved)
+        except Exception as e:
+            logger.warning(f"获取变更版本失败，跳过响应缓存: {e}")
+            return RouteCache(route, None, ttl, read=False, write=False)
+
+        parts = [
+            request.method,
+            request.url.path,
+            str(sorted(request.query_params.multi_items())),
+            *[f"{tag}={version}" for tag, version in zip(resolved, versions)],
+        ]
+        if scoped:
+            parts.append(f"sub={payload.get('sub')}")
+        digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+        return RouteCache(route, f"{CACHE_PREFIX}:{digest}", ttl, read=not bypass, write=not no_store)
+
+    return dependency
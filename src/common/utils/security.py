@@ -6,6 +6,7 @@ from typing import Optional
 from src.core.conf.config import settings
 from src.common.utils.logger import logger
 from src.core.server.dependencies import get_redis
+from src.common.utils.tracing import span
 
 security = HTTPBearer()
 
@@ -54,8 +55,10 @@ def get_current_user(request: Request):
 
 async def require_authentication(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    redis_client = await get_redis()
-    if await redis_client.get(f"token_blacklist:{token}"):
+    with span("auth.blacklist_lookup"):
+        redis_client = await get_redis()
+        blacklisted = await redis_client.get(f"token_blacklist:{token}")
+    if blacklisted:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="token已注销",
@@ -0,0 +1,309 @@
+"""
+轻量级链路追踪
+
+只依赖标准库，数据模型与 OpenTelemetry 保持一致（trace_id / span_id / parent_span_id / 纳秒时间戳 / attributes），
+导出格式为 OTLP/JSON 的 resourceSpans，可以直接交给 OpenTelemetry Collector 的 otlphttp/file 接收。
+
+- 头部采样：TracingMiddleware 在请求开始时按 TRACING_SAMPLE_RATE 决定整条链路是否采样。调用方传入的 traceparent
+  只沿用 trace_id，其中的采样标记仅在 TRACING_TRUST_PARENT 开启（调用方都是可信的内部服务）时才生效，
+  否则任何客户端都能绕过采样率强制记录。未采样的请求里 span() 直接返回空操作对象，开销只有一次 contextvar 读取
+- 导出：一条链路的根 span 结束后整体放入有界队列，由后台线程批量写入 TRACING_EXPORT_PATH（每行一个 OTLP/JSON 文档），
+  配置了 TRACING_OTLP_ENDPOINT 时改为 POST 到该地址；队列满时直接丢弃，不阻塞请求
+
+用法：
+    with span("paginate.count"):
+        ...
+
+    @traced("email.send")
+    async def send_email(...):
+        ...
+"""
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+from typing import List, Optional
+
+from src.core.conf.config import BASE_DIR, settings
+
+SERVICE_NAME = "fastapi_basic"
+
+
+class _Trace:
+    """一条链路中已结束的 span，根 span 结束时统一导出"""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error", "_token")
+
+    def __init__(self, trace: _Trace, name: str, parent_id: Optional[str] = None, attributes: dict = None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error = None
+        self._token = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def end(self, end_ns: int = None) -> None:
+        self.end_ns = end_ns or time.time_ns()
+        self.trace.spans.append(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.end()
+
+    def traceparent(self) -> str:
+        """W3C traceparent 头"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+class _NoopSpan:
+    """未采样时使用的空操作 span"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def end(self, end_ns: int = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def span(name: str, **attributes):
+    """
+    在当前链路下创建子 span，不在采样链路中时返回空操作对象
+
+    作为上下文管理器使用时会成为当前 span；跨越 yield 的依赖（如 get_db）不进入上下文，手动调用 end()，
+    避免之后的 span 都挂到它下面
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **attributes) -> None:
+    """补录一个已经结束的 span（用于事件回调里只知道起止时间的场景，如 SQL cursor 事件）"""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    child.start_ns = start_ns
+    child.end(end_ns)
+
+
+def traced(name: str = None):
+    """把异步函数包装在 span 中"""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def parse_traceparent(value: Optional[str]):
+    """解析 W3C traceparent，返回 (trace_id, parent_span_id, sampled)，格式不合法时返回 None"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def start_trace(name: str, traceparent: Optional[str] = None, sample_rate: float = None, trust_parent: bool = None,
+                **attributes):
+    """
+    开始一条链路的根 span，按头部采样决定是否记录，未采样时返回 NOOP_SPAN
+
+    traceparent 合法时沿用其 trace_id 与父 span；只有 trust_parent（默认取 TRACING_TRUST_PARENT）为真时才沿用它的采样标记，
+    否则仍按本地采样率决定
+    """
+    trace_id, parent_id, sampled = parse_traceparent(traceparent) or (None, None, None)
+    if trust_parent is None:
+        trust_parent = settings.TRACING_TRUST_PARENT
+    if sampled is None or not trust_parent:
+        rate = settings.TRACING_SAMPLE_RATE if sample_rate is None else sample_rate
+        sampled = random.random() < rate
+    if not sampled:
+        return NOOP_SPAN
+    return Span(_Trace(trace_id or os.urandom(16).hex()), name, parent_id, attributes)
+
+
+def finish_trace(root: Span) -> None:
+    """根 span 结束后导出整条链路"""
+    if isinstance(root, Span):
+        exporter.export(root.trace.spans)
+
+
+# -------------------------
+# 导出
+# -------------------------
+def _attribute_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span]) -> dict:
+    """转换为 OTLP/JSON 的 ExportTraceServiceRequest"""
+    otlp_spans = []
+    for item in spans:
+        data = {
+            "traceId": item.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": 1,
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns),
+            "attributes": [{"key": key, "value": _attribute_value(value)} for key, value in item.attributes.items()],
+            "status": {"code": 2, "message": item.error} if item.error else {"code": 1},
+        }
+        if item.parent_id:
+            data["parentSpanId"] = item.parent_id
+        otlp_spans.append(data)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "src.common.utils.tracing"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+class BatchExporter:
+    """后台线程批量导出，队列满时丢弃"""
+
+    def __init__(self, max_queue_size: int = 2048, batch_size: int = 64, interval: float = 2.0):
+        # 队列元素是一条链路的全部 span，batch_size 指一次最多写出的链路数
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._drain()
+            if batch:
+                try:
+                    self.write(batch)
+                except Exception:
+                    # 导出失败不影响业务，这一批直接丢弃
+                    self.dropped += 1
+
+    def _drain(self) -> List[Span]:
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.interval
+        for _ in range(self.batch_size):
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.extend(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> None:
+        """同步导出队列中剩余的链路（关闭时调用）"""
+        batch: List[Span] = []
+        while True:
+            try:
+                batch.extend(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.write(batch)
+
+    def write(self, spans: List[Span]) -> None:
+        payload = json.dumps(to_otlp(spans), ensure_ascii=False)
+        if settings.TRACING_OTLP_ENDPOINT:
+            request = urllib.request.Request(
+                settings.TRACING_OTLP_ENDPOINT, data=payload.encode(),
+                headers={"Content-Type": "application/json"}, method="POST",
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+            return
+        path = settings.TRACING_EXPORT_PATH or os.path.join(BASE_DIR.parent.parent, "logs", "traces.jsonl")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(payload + "\n")
+
+
+exporter = BatchExporter()
@@ -0,0 +1,134 @@
+"""
+线上流量采集（requests.jsonl 格式）
+
+TrafficCaptureMiddleware 按 TRAFFIC_CAPTURE_SAMPLE_RATE 抽样记录请求，每行一条 JSON，由后台线程写入
+TRAFFIC_CAPTURE_PATH（默认 data/traffic/requests.jsonl，按大小轮转），benchmarks/replay.py 读取同样的格式回放：
+
+    {"v": 1, "ts": 1735689600.123, "method": "GET", "path": "/api/v1/project/list", "route": "/api/v1/project/list",
+     "query": {"page_num": ["1"]}, "content_type": "application/json", "body_size": 42,
+     "body_shape": {"name": "str:12", "viewers": {"$list": 3, "item": "int"}}, "auth": true,
+     "status": 200, "duration_ms": 12.3, "request_id": "..."}
+
+脱敏规则：
+- 不记录任何请求头，只记录是否带了 Authorization（auth），回放时由回放工具自己登录
+- 查询参数与请求体中键名包含 password / token / secret / code / email 等敏感词的值替换为 ***
+- 请求体默认只记录形状（字段类型、字符串长度、列表长度），TRAFFIC_CAPTURE_BODIES=true 时才额外记录脱敏后的原文；
+  非 JSON 请求体（如文件上传）只记录类型与大小
+"""
+import json
+import logging
+import os
+import random
+from typing import Optional
+from urllib.parse import parse_qs
+
+from src.common.utils.logger import attach_queue, build_file_handler
+from src.core.conf.config import BASE_DIR, settings
+
+FORMAT_VERSION = 1
+DEFAULT_CAPTURE_PATH = os.path.join(BASE_DIR.parent.parent, "data", "traffic", "requests.jsonl")
+SENSITIVE_KEYS = ("password", "passwd", "token", "access", "refresh", "secret", "code", "authorization",
+                  "email", "key", "cookie")
+REDACTED = "***"
+MAX_SHAPE_DEPTH = 8
+
+
+def is_sensitive(key: str) -> bool:
+    key = key.lower()
+    return any(word in key for word in SENSITIVE_KEYS)
+
+
+def value_shape(value, depth: int = 0):
+    """把 JSON 值替换为形状描述：字符串为 str:长度，列表为 {"$list": 长度, "item": 首个元素的形状}"""
+    if depth >= MAX_SHAPE_DEPTH:
+        return "..."
+    if isinstance(value, dict):
+        return {key: value_shape(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, list):
+        return {"$list": len(value), "item": value_shape(value[0], depth + 1) if value else None}
+    if isinstance(value, str):
+        return f"str:{len(value)}"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "null"
+
+
+def redact(value):
+    """递归替换敏感键的值"""
+    if isinstance(value, dict):
+        return {key: REDACTED if is_sensitive(key) else redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def sanitize_query(query_string: bytes) -> dict:
+    query = parse_qs(query_string.decode("latin-1"), keep_blank_values=True)
+    return {key: [REDACTED] * len(values) if is_sensitive(key) else values for key, values in query.items()}
+
+
+def build_record(scope, route: str, body: bytes, body_size: int, truncated: bool, status: int,
+                 duration: float, started: float, capture_body: bool, request_id: Optional[str] = None) -> dict:
+    headers = dict(scope.get("headers") or [])
+    content_type = headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip() or None
+    record = {
+        "v": FORMAT_VERSION,
+        "ts": round(started, 3),
+        "method": scope["method"],
+        "path": scope["path"],
+        "route": route,
+        "query": sanitize_query(scope.get("query_string", b"")),
+        "content_type": content_type,
+        "body_size": body_size,
+        "body_shape": None,
+        "auth": b"authorization" in headers,
+        "status": status,
+        "duration_ms": round(duration * 1000, 3),
+        "request_id": request_id,
+    }
+    if body and content_type == "application/json":
+        if truncated:
+            record["body_shape"] = "truncated"
+        else:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                record["body_shape"] = "invalid"
+            else:
+                record["body_shape"] = value_shape(payload)
+                if capture_body:
+                    record["body"] = redact(payload)
+    return record
+
+
+_traffic_logger: Optional[logging.Logger] = None
+
+
+def get_traffic_logger() -> logging.Logger:
+    """采集开启时才创建，写入独立文件，不向上传播到应用日志"""
+    global _traffic_logger
+    if _traffic_logger is None:
+        _logger = logging.getLogger("fastapi.traffic")
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        if not _logger.handlers:
+            # 多个 worker 写同一个文件，轮转方式与应用日志相同（见 logger.py）
+            path = os.path.abspath(settings.TRAFFIC_CAPTURE_PATH or DEFAULT_CAPTURE_PATH)
+            file_handler = build_file_handler(os.path.basename(path), "size", settings.TRAFFIC_CAPTURE_MAX_BYTES,
+                                              settings.TRAFFIC_CAPTURE_BACKUP_COUNT, directory=os.path.dirname(path))
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            attach_queue(_logger, [file_handler])
+        _traffic_logger = _logger
+    return _traffic_logger
+
+
+def should_capture(sample_rate: float) -> bool:
+    return sample_rate >= 1 or random.random() < sample_rate
+
+
+def write_record(record: dict) -> None:
+    get_traffic_logger().info(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
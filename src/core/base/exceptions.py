@@ -1,6 +1,6 @@
 import traceback
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from src.common.utils.logger import logger
@@ -35,6 +35,14 @@ class MessageException(Exception):
         super().__init__(self.message)
 
 
+class NotModifiedException(Exception):
+    """条件请求命中（If-None-Match 与当前 ETag 一致），直接返回 304"""
+
+    def __init__(self, etag: str):
+        self.etag = etag
+        super().__init__(etag)
+
+
 # -------------------------
 # 1. FastAPI 全局 404 处理
 # -------------------------
@@ -77,6 +85,12 @@ def register_exception_handlers(app: FastAPI):
     async def message_exception_handler(request: Request, exc: MessageException):
         return BaseResponse.error(exc.message, status_code=exc.status_code)
 
+    @app.exception_handler(NotModifiedException)
+    async def not_modified_exception_handler(request: Request, exc: NotModifiedException):
+        # 304 不能携带响应体
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": exc.etag, "Cache-Control": "private, no-cache"})
+
     # 由于注册了这个，那么所有 404、405、500（FastAPI 内部抛的）都会先走这里
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(request: Request, exc: StarletteHTTPException):
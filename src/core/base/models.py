@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Boolean, func
+from sqlalchemy import Column, DateTime, Boolean, String, Table, func
 from src.core.server.database import Base
 
 
@@ -8,3 +8,13 @@ class BaseDBModel(Base):
     create_time = Column(DateTime, default=func.now(), nullable=False)
     update_time = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     is_deleted = Column(Boolean, default=False, nullable=False)
+
+
+# 系统元数据（键值对），目前只记录初始数据版本（seed_version），启动时据此判断是否需要初始化
+app_meta = Table(
+    'app_meta',
+    Base.metadata,
+    Column('key', String(64), primary_key=True),
+    Column('value', String(255), nullable=False),
+    Column('update_time', DateTime, default=func.now(), onupdate=func.now(), nullable=False),
+)
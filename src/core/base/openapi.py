@@ -0,0 +1,72 @@
+"""
+预生成的 OpenAPI 文档
+
+FastAPI 默认在第一次访问 /docs、/openapi.json 时才生成文档（遍历全部路由与模型，耗时几十到上百毫秒），
+冷启动后的第一个文档请求要承担这部分开销。这里改为优先读取构建时预生成的文件：
+
+    python -m src.common.scripts.build_openapi      # 写入 OPENAPI_SCHEMA_PATH（默认 data/openapi.json）
+
+文件中记录了生成时的指纹（src 下源码内容 + 已注册的路由），指纹与当前进程不一致（代码改了、开关改变了路由）
+时忽略文件、按 FastAPI 默认方式现场生成，不会返回过期的文档。
+生产环境可以设置 OPENAPI_ENABLED=false，不注册 /docs、/redoc、/openapi.json。
+"""
+import hashlib
+import json
+import os
+from typing import Optional
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from src.common.utils.logger import logger
+from src.core.conf.config import BASE_DIR
+
+SRC_DIR = BASE_DIR.parent
+DEFAULT_SCHEMA_PATH = os.path.join(SRC_DIR.parent, "data", "openapi.json")
+
+
+def schema_fingerprint(app: FastAPI) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(SRC_DIR.rglob("*.py")):
+        digest.update(str(path.relative_to(SRC_DIR)).encode())
+        digest.update(path.read_bytes())
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            digest.update(f"{route.path} {sorted(route.methods)} {route.include_in_schema}".encode())
+    return digest.hexdigest()
+
+
+def load_schema(app: FastAPI, path: str) -> Optional[dict]:
+    """读取预生成的文档，不存在、损坏或指纹不一致时返回 None"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            prebuilt = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取预生成的 OpenAPI 文档失败: {e}")
+        return None
+    if prebuilt.get("fingerprint") != schema_fingerprint(app):
+        logger.info("预生成的 OpenAPI 文档已过期，改为现场生成")
+        return None
+    return prebuilt["schema"]
+
+
+def build_schema(app: FastAPI, path: str) -> dict:
+    schema = FastAPI.openapi(app)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": schema_fingerprint(app), "schema": schema}, f, ensure_ascii=False)
+    return schema
+
+
+def install_prebuilt_openapi(app: FastAPI, path: Optional[str] = None) -> None:
+    """替换 app.openapi：第一次调用时优先使用预生成的文档，结果照常缓存在 app.openapi_schema"""
+    path = path or DEFAULT_SCHEMA_PATH
+
+    def openapi() -> dict:
+        if app.openapi_schema is None:
+            app.openapi_schema = load_schema(app, path) or FastAPI.openapi(app)
+        return app.openapi_schema
+
+    app.openapi = openapi
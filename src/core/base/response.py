@@ -2,6 +2,7 @@ from fastapi import status
 from fastapi.responses import JSONResponse
 from typing import Any, Dict, Optional, Union
 from pydantic import BaseModel
+from src.common.utils.tracing import span
 
 
 class Resp(BaseModel):
@@ -25,9 +26,10 @@ class BaseResponse:
         status_code: int = status.HTTP_200_OK,
         **extra: Any,
     ) -> JSONResponse:
-        body = Resp(success=True, message=message, data=data, code=status_code).model_dump()
-        body.update(extra)
-        return JSONResponse(content=body, status_code=status_code)
+        with span("response.serialize"):
+            body = Resp(success=True, message=message, data=data, code=status_code).model_dump()
+            body.update(extra)
+            return JSONResponse(content=body, status_code=status_code)
 
     @staticmethod
     def error(
@@ -36,14 +38,15 @@ class BaseResponse:
         status_code: int = status.HTTP_400_BAD_REQUEST,
         **extra: Any,
     ) -> JSONResponse:
-        body = Resp(
-            success=False,
-            message=message,
-            data=data,
-            code=status_code,
-        ).model_dump()
-        body.update(extra)
-        return JSONResponse(content=body, status_code=status_code)
+        with span("response.serialize"):
+            body = Resp(
+                success=False,
+                message=message,
+                data=data,
+                code=status_code,
+            ).model_dump()
+            body.update(extra)
+            return JSONResponse(content=body, status_code=status_code)
 
     @staticmethod
     def created(data: Any = None, message: str = "创建成功", **extra):
@@ -37,3 +37,4 @@ class BaseRequestSchema(BaseModel):
     page_num: int = 1
     page_size: int = 10
     q: str | None = None
+    fields: str | None = None  # 逗号分隔的返回字段，如 fields=id,name，不传返回全部字段
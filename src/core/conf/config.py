@@ -2,6 +2,7 @@ from pathlib import Path
 from pydantic import SecretStr, Field
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, Optional
 
 BASE_DIR = Path(__file__).parent.parent
 
@@ -10,6 +11,13 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     PORT: int = 8000
     LOG_LEVEL: str = "info"
+    LOG_FORMAT: str = "text"  # text / json
+    LOG_ROTATION: str = "size"  # size：按 LOG_MAX_BYTES 轮转；time：按 LOG_ROTATION_WHEN 轮转
+    LOG_MAX_BYTES: int = 50 * 1024 * 1024
+    LOG_ROTATION_WHEN: str = "midnight"
+    LOG_BACKUP_COUNT: int = 10
+    LOG_QUEUE_SIZE: int = 10000  # 日志队列上限，写满后丢弃新日志
+    LOG_SAMPLING: Dict[str, float] = {}  # 按级别采样，如 {"INFO": 0.1}
 
     SECRET_KEY: str = "Q1w2e3r4"  # 请使用强密钥
     ALGORITHM: str = "HS256"
@@ -22,6 +30,7 @@ class Settings(BaseSettings):
     MYSQL_USER: str = "root"
     MYSQL_PASSWD: str = "root"
     MYSQL_DB: str = "fastapi_basic"
+    DATABASE_URL: Optional[str] = None  # 设置后覆盖上面的 MySQL 配置，如基准测试使用 sqlite+aiosqlite:///bench.db
     # 数据库连接池配置
     POOL_SIZE: int = 20
     MAX_OVERFLOW: int = 40
@@ -40,6 +49,105 @@ class Settings(BaseSettings):
     REDIS_PASSWD: str = "foobared"
     REDIS_DB: int = 1
 
+    # 响应压缩配置
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    COMPRESSION_LEVEL: int = 6  # 压缩级别, 会按算法截断到各自范围(gzip 1-9, br 0-11, zstd 1-22)
+    COMPRESSION_THREAD_THRESHOLD: int = 256 * 1024  # 超过该字节数的响应放到线程池压缩, 避免阻塞事件循环
+    COMPRESSION_EXCLUDED_TYPES: list = [
+        "image/", "video/", "audio/", "text/event-stream",
+        "application/zip", "application/gzip", "application/octet-stream",
+    ]
+
+    # 响应缓存配置
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_DEFAULT_TTL: int = 60  # 未指定 ttl 的路由默认缓存秒数
+
+    # 指标配置
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # 多 worker 部署时各 worker 共享的指标快照目录
+    METRICS_FLUSH_INTERVAL: float = 5.0  # 多 worker 模式下写快照的间隔（秒）
+
+    # SQL 统计配置
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5  # 一次请求中同一 SELECT 形状执行达到该次数时告警
+
+    # 慢查询日志配置
+    SLOW_QUERY_THRESHOLD_MS: Optional[float] = 500  # 超过该耗时的语句写入慢查询日志，None 表示关闭
+    SLOW_QUERY_EXPLAIN: bool = True  # 是否异步抓取慢 SELECT 的执行计划
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
+
+    # 请求追踪配置
+    SQL_COMMENT_REQUEST_ID: bool = True  # SQL 末尾追加 /* request_id=... */ 注释
+    REDIS_TRACE: bool = False  # 逐条记录 Redis 命令与耗时（带 request_id）
+
+    # 链路追踪配置
+    TRACING_ENABLED: bool = True
+    TRACING_SAMPLE_RATE: float = 0.01  # 头部采样率
+    TRACING_TRUST_PARENT: bool = False  # 是否沿用调用方 traceparent 的采样标记，只在调用方都是可信内部服务时开启
+    TRACING_EXPORT_PATH: Optional[str] = None  # 默认 logs/traces.jsonl
+    TRACING_OTLP_ENDPOINT: Optional[str] = None  # 如 http://127.0.0.1:4318/v1/traces，配置后不再写文件
+
+    # 采样分析配置
+    PROFILER_ENABLED: bool = True
+    PROFILER_MAX_DURATION: float = 30.0  # 单次采样最长时长（秒）
+    PROFILER_MIN_INTERVAL: float = 0.001  # 最小采样间隔（秒）
+    PROFILER_MAX_OVERHEAD: float = 0.02  # 采样耗时占比上限，超过时自动拉长间隔
+    MEMORY_ROUTE_SAMPLE_RATE: float = 0.1  # tracemalloc 运行时抽样统计路由峰值分配的比例
+
+    # 流量采集配置（回放工具见 benchmarks/replay.py）
+    TRAFFIC_CAPTURE_ENABLED: bool = False
+    TRAFFIC_CAPTURE_PATH: Optional[str] = None  # 默认 data/traffic/requests.jsonl
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = 1.0
+    TRAFFIC_CAPTURE_BODIES: bool = False  # 是否记录脱敏后的 JSON 请求体原文，关闭时只记录形状
+    TRAFFIC_CAPTURE_MAX_BODY: int = 64 * 1024  # 超过该大小的请求体只记录大小
+    TRAFFIC_CAPTURE_MAX_BYTES: int = 100 * 1024 * 1024
+    TRAFFIC_CAPTURE_BACKUP_COUNT: int = 5
+
+    # 事件循环监控配置
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.5  # 延迟采样间隔（秒）
+    LOOP_BLOCK_THRESHOLD_MS: float = 100  # 单次阻塞超过该时长时记录调用栈
+
+    # 启动预热与优雅下线配置（/readyz 在预热完成前返回 503）
+    DB_WARMUP_CONNECTIONS: int = 5  # 启动时预先建立的数据库连接数，不超过 POOL_SIZE，0 为不预热
+    REDIS_WARMUP_CONNECTIONS: int = 2  # 启动时预先建立的 Redis 连接数，0 为不预热
+    WARMUP_TIMEOUT: float = 10.0  # 预热超时（秒），超时后照常就绪，未建立的连接由首个请求按需创建
+    # True 时预热完成后才开始接收请求；False 时后台预热，期间由就绪门控返回 503。
+    # 多 worker 共享监听 socket，后台预热的新 worker 会抢到连接并返回 503，所以默认阻塞
+    WARMUP_BLOCKING: bool = True
+    READINESS_GATE_ENABLED: bool = True  # 预热完成前，业务请求直接返回 503
+    # 收到 SIGTERM 后继续服务、仅让 /readyz 返回 503 的时间（秒），应覆盖负载均衡健康检查的间隔 × 失败次数；
+    # 容器的停止超时需大于 SHUTDOWN_PRESTOP_DELAY + SHUTDOWN_DRAIN_TIMEOUT
+    SHUTDOWN_PRESTOP_DELAY: float = 5.0
+    SHUTDOWN_DRAIN_TIMEOUT: float = 20.0  # 停止接收连接后，等待进行中请求完成的最长时间（秒）
+
+    # 文档上传配置
+    DOC_STORAGE_DIR: Optional[str] = None  # 文件存储目录，默认 data/docs
+    DOC_UPLOAD_MAX_BYTES: int = 512 * 1024 * 1024  # 单个文件大小上限
+    DOC_UPLOAD_CHUNK_SIZE: int = 256 * 1024  # 攒满该大小才写一次磁盘，单个上传占用的缓冲不超过它加一个网络包
+    DOC_UPLOAD_MAX_CONCURRENT: int = 512  # 单个 worker 同时进行的上传数上限，超过时返回 503
+    DOC_UPLOAD_IO_THREADS: int = 32  # 写文件与计算哈希使用的线程数上限，与其它 to_thread 调用互不占用
+    # 分片上传（断点续传）配置，整个文件仍受 DOC_UPLOAD_MAX_BYTES 限制
+    DOC_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024  # 建议客户端使用的分片大小（除最后一片外）
+    DOC_MULTIPART_MAX_PART_SIZE: int = 64 * 1024 * 1024  # 单个分片大小上限
+    DOC_MULTIPART_MAX_PARTS: int = 10000
+    DOC_MULTIPART_TTL: int = 24 * 3600  # 未完成的上传在最后一次活动后保留多久（秒），过期后分片由后台任务清理
+    DOC_MULTIPART_GC_INTERVAL: float = 600  # 清理过期分片的间隔（秒），0 为不清理
+
+    # 接口文档配置
+    OPENAPI_ENABLED: bool = True  # 生产环境可关闭，不注册 /docs、/redoc、/openapi.json
+    OPENAPI_SCHEMA_PATH: Optional[str] = None  # 预生成文档路径，默认 data/openapi.json（python -m src.common.scripts.build_openapi）
+
+    # 服务进程配置（python -m src.core.server.launcher）
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_WORKERS: int = 0  # 0 为按可用 CPU 数（含容器 CPU 配额）自动选择
+    SERVER_BACKLOG: int = 2048  # 监听队列长度，实际上限还受 net.core.somaxconn 限制
+    SERVER_KEEPALIVE_TIMEOUT: int = 75  # 需大于前置负载均衡的空闲超时（如 Nginx/ALB 的 60s），否则会出现偶发 502
+    SERVER_MAX_REQUESTS: int = 20000  # 单个 worker 处理该数量请求后重启，限制内存增长，0 为不限制
+    SERVER_MAX_REQUESTS_JITTER: int = 2000  # 每个 worker 的上限额外加上 [0, jitter] 的随机数，避免同时重启
+    SERVER_READY_TIMEOUT: float = 60.0  # 滚动重启时等待新 worker 就绪的最长时间（秒）
+
     # 超管信息
     SUPER_USER_LIST: list = ["admin"]
     ADMIN_PASSWORD: SecretStr = Field(
@@ -0,0 +1,179 @@
+"""
+响应压缩中间件
+
+根据请求头 Accept-Encoding 协商压缩算法，支持 zstd / br / gzip：
+- gzip 使用标准库，始终可用
+- br 需要安装 brotli，zstd 需要安装 zstandard，未安装时自动跳过
+
+以下响应不压缩：体积小于阈值、已带 Content-Encoding、类型在排除列表中、流式响应（多个 body 分片）。
+"""
+import gzip
+from typing import Callable, Dict, Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+
+def _clamp(value: int, low: int, high: int) -> int:
+    return max(low, min(high, value))
+
+
+def _gzip_compress(body: bytes, level: int) -> bytes:
+    # mtime=0 保证相同内容的压缩结果一致
+    return gzip.compress(body, compresslevel=_clamp(level, 1, 9), mtime=0)
+
+
+def _brotli_compress(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=_clamp(level, 0, 11))
+
+
+def _zstd_compress(body: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=_clamp(level, 1, 22)).compress(body)
+
+
+def available_encodings() -> Dict[str, Callable[[bytes, int], bytes]]:
+    """按服务端偏好顺序返回当前环境可用的压缩算法"""
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = _zstd_compress
+    if brotli is not None:
+        encodings["br"] = _brotli_compress
+    encodings["gzip"] = _gzip_compress
+    return encodings
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """解析 Accept-Encoding，返回 {编码: q值}"""
+    result = {}
+    for item in header.split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[coding] = q
+    return result
+
+
+class CompressionMiddleware:
+    def __init__(
+            self,
+            app: ASGIApp,
+            minimum_size: int = 1024,
+            level: int = 6,
+            thread_threshold: int = 256 * 1024,
+            excluded_types: Optional[list] = None,
+    ):
+        """
+        Args:
+            app: 下游 ASGI 应用
+            minimum_size: 小于该字节数的响应不压缩
+            level: 压缩级别
+            thread_threshold: 超过该字节数时在线程池中压缩
+            excluded_types: 不压缩的 Content-Type 前缀
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.thread_threshold = thread_threshold
+        self.excluded_types = tuple(excluded_types or ())
+        self.encodings = available_encodings()
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """选出客户端接受且 q 值最高的算法，q 值相同时按服务端偏好"""
+        accepted = parse_accept_encoding(accept_encoding)
+        if not accepted:
+            return None
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = None, 0.0
+        for coding in self.encodings:
+            q = accepted.get(coding, wildcard)
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """拦截单个请求的响应消息，决定是否压缩"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.compress = middleware.encodings[encoding]
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or content_type.startswith(self.middleware.excluded_types):
+                self.passthrough = True
+            return
+
+        if message["type"] != "http.response.body" or self.start_message is None:
+            await self.downstream(message)
+            return
+
+        if self.passthrough:
+            await self._flush_start()
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        if message.get("more_body", False) or len(body) < self.middleware.minimum_size:
+            # 流式响应或小响应直接透传
+            self.passthrough = True
+            await self._flush_start()
+            await self.downstream(message)
+            return
+
+        if len(body) >= self.middleware.thread_threshold:
+            compressed = await anyio.to_thread.run_sync(self.compress, body, self.middleware.level)
+        else:
+            compressed = self.compress(body, self.middleware.level)
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if len(compressed) < len(body):
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(compressed))
+            body = compressed
+        await self._flush_start()
+        await self.downstream({"type": "http.response.body", "body": body, "more_body": False})
+
+    async def _flush_start(self) -> None:
+        if self.start_message is not None:
+            message, self.start_message = self.start_message, None
+            await self.downstream(message)
@@ -0,0 +1,48 @@
+"""
+就绪门控与进行中请求计数中间件
+
+所有 HTTP 请求计入进行中的请求数；预热完成前（gate_until_ready=True 时），除探针和指标接口外的请求直接返回 503，
+带 Retry-After 与 Connection: close，客户端会换一个连接重试。
+下线期间（见 lifecycle.py）请求照常处理，响应加上 Connection: close，长连接在负载均衡摘除实例前逐步断开。
+"""
+from fastapi import status
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.base.response import BaseResponse
+from src.core.server.lifecycle import Lifecycle, lifecycle as default_lifecycle
+
+DEFAULT_EXEMPT_PATHS = ("/healthz", "/readyz", "/metrics")
+
+
+class LifecycleMiddleware:
+    def __init__(self, app: ASGIApp, state: Lifecycle = default_lifecycle, gate_until_ready: bool = True,
+                 exempt_paths: tuple = DEFAULT_EXEMPT_PATHS, retry_after: int = 1):
+        self.app = app
+        self.state = state
+        self.gate_until_ready = gate_until_ready
+        self.exempt_paths = exempt_paths
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["path"] not in self.exempt_paths and self.gate_until_ready and not self.state.ready:
+            response = BaseResponse.error("服务启动中", status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response.headers["Retry-After"] = str(self.retry_after)
+            response.headers["Connection"] = "close"
+            await response(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.state.draining:
+                MutableHeaders(scope=message)["Connection"] = "close"
+            await send(message)
+
+        self.state.request_started()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.state.request_finished()
@@ -0,0 +1,23 @@
+"""
+路由峰值分配抽样中间件，只在 tracemalloc 运行时生效（见 memory_profile.py）
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.common.utils.memory_profile import begin_route_sample, end_route_sample
+from src.core.middleware.metrics import route_template
+
+
+class MemoryProfileMiddleware:
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.1):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        start_memory = begin_route_sample(self.sample_rate) if scope["type"] == "http" else None
+        if start_memory is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_route_sample(route_template(scope), start_memory)
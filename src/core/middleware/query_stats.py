@@ -0,0 +1,54 @@
+"""
+请求级 SQL 统计中间件
+
+- 请求结束后如果同一 SELECT 形状的执行次数达到 SQL_N_PLUS_ONE_THRESHOLD，记录疑似 N+1 的告警
+- DEBUG 模式下在响应头中加入 Server-Timing：db（数据库耗时、查询次数）与 app（除数据库外的处理耗时）
+"""
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.common.utils.logger import logger
+from src.common.utils.query_stats import QueryStats, bind_query_stats, reset_query_stats
+from src.core.middleware.metrics import route_template
+
+
+def server_timing(db_time: float, query_count: int, total_time: float) -> str:
+    """生成 Server-Timing 头，耗时单位为毫秒"""
+    app_time = max(total_time - db_time, 0.0)
+    return (f'db;dur={db_time * 1000:.2f};desc="{query_count} queries", '
+            f'app;dur={app_time * 1000:.2f}')
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 5, server_timing: bool = False):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = bind_query_stats(stats)
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(
+                    stats.db_time, stats.query_count, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_query_stats(token)
+            for shape, count in stats.repeated(self.n_plus_one_threshold):
+                logger.warning(
+                    f"疑似 N+1 查询: {scope['method']} {route_template(scope)} 同一语句执行 {count} 次"
+                    f"（本次请求共 {stats.query_count} 次查询）: {shape}"
+                )
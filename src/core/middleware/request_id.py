@@ -0,0 +1,34 @@
+"""
+请求追踪ID中间件
+
+透传请求头 X-Request-ID（不合法或缺失时生成），绑定到 contextvar，并在响应头中回写同一个 ID。
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.common.utils.request_id import REQUEST_ID_HEADER, accept_request_id, bind_request_id, reset_request_id
+
+
+class RequestIdMiddleware:
+    def __init__(self, app: ASGIApp, header_name: str = REQUEST_ID_HEADER):
+        self.app = app
+        self.header_name = header_name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = accept_request_id(Headers(scope=scope).get(self.header_name))
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = bind_request_id(request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[self.header_name] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request_id(token)
@@ -0,0 +1,51 @@
+"""
+链路追踪中间件
+
+为每个请求创建根 span（按头部采样），响应头回写 traceparent，请求结束后导出整条链路。
+根 span 的属性里带上 request_id，便于和日志、慢查询记录关联。
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.common.utils.request_id import current_request_id
+from src.common.utils.tracing import Span, finish_trace, start_trace
+from src.core.middleware.metrics import route_template
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp, sample_rate: float = None, trust_parent: bool = None):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.trust_parent = trust_parent
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root = start_trace(
+            f"HTTP {scope['method']}",
+            traceparent=Headers(scope=scope).get("traceparent"),
+            sample_rate=self.sample_rate,
+            trust_parent=self.trust_parent,
+        )
+        if not isinstance(root, Span):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                MutableHeaders(scope=message)["traceparent"] = root.traceparent()
+            await send(message)
+
+        try:
+            with root:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_template(scope)
+            root.name = f"HTTP {scope['method']} {route}"
+            root.set_attribute("http.method", scope["method"])
+            root.set_attribute("http.route", route)
+            root.set_attribute("request_id", current_request_id() or "-")
+            finish_trace(root)
@@ -0,0 +1,60 @@
+"""
+流量采集中间件，按采样率记录脱敏后的请求（格式见 traffic_capture.py），写入在后台线程完成
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.common.utils.request_id import current_request_id
+from src.common.utils.traffic_capture import build_record, should_capture, write_record
+from src.core.middleware.metrics import route_template
+
+DEFAULT_EXCLUDED_PREFIXES = ("/metrics", "/api/v1/monitor", "/docs", "/redoc", "/openapi.json")
+
+
+class TrafficCaptureMiddleware:
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0, max_body: int = 64 * 1024,
+                 capture_body: bool = False, excluded_prefixes: tuple = DEFAULT_EXCLUDED_PREFIXES):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+        self.capture_body = capture_body
+        self.excluded_prefixes = excluded_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] != "http" or scope["path"].startswith(self.excluded_prefixes)
+                or not should_capture(self.sample_rate)):
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        body_size = 0
+        status_code = 500
+        started_at = time.time()
+        start = time.perf_counter()
+
+        async def receive_wrapper() -> Message:
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                # 只缓存 max_body 以内的请求体，超出部分只计大小
+                if body_size < self.max_body:
+                    chunks.append(body[:self.max_body - body_size])
+                body_size += len(body)
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            record = build_record(scope, route_template(scope), b"".join(chunks), body_size,
+                                  body_size > self.max_body, status_code, duration, started_at,
+                                  self.capture_body, current_request_id())
+            write_record(record)
@@ -1,20 +1,33 @@
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 from src.core.conf.config import settings
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase
+from src.common.utils.tracing import span
+from src.core.server.instrumentation import install_sql_instrumentation
+from src.core.server.slow_query import slow_query_log
 
-DATABASE_URL = f"mysql+aiomysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+DATABASE_URL = settings.DATABASE_URL or f"mysql+aiomysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
 
-engine: AsyncEngine = create_async_engine(
-    DATABASE_URL,
-    echo=settings.DEBUG,  # True 时会打印所有 SQL，开发必开，生产必关
-    future=True,  # 开启 SQLAlchemy 2.0 新风格（必须开！旧风格已废弃）
+# 连接池参数只对 MySQL 有意义，SQLite（基准测试、本地调试）使用 SQLAlchemy 默认的连接池
+pool_options = {} if DATABASE_URL.startswith("sqlite") else dict(
     pool_size=settings.POOL_SIZE,  # 连接池常驻连接数（默认 5，推荐 10~20）
     max_overflow=settings.MAX_OVERFLOW,  # 允许临时额外创建的连接数（默认 10，推荐 10~30）
     pool_pre_ping=True,  # 【强烈建议加上】每次取连接前 ping 一下，防止连接断开
     pool_timeout=30,  # 获取连接超时时间（秒）
     pool_recycle=3600,  # 连接回收时间（秒），MySQL 默认 8 小时断开，建议设 3600
 )
+
+engine: AsyncEngine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.DEBUG,  # True 时会打印所有 SQL，开发必开，生产必关；生产排查用慢查询日志
+    future=True,  # 开启 SQLAlchemy 2.0 新风格（必须开！旧风格已废弃）
+    **pool_options,
+)
+# SQL 耗时埋点与慢查询日志
+install_sql_instrumentation(engine.sync_engine)
+slow_query_log.configure(engine, settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_EXPLAIN)
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -30,12 +43,24 @@ class Base(DeclarativeBase):
 
 # 依赖注入：每次请求一个独立的 session
 async def get_db() -> AsyncGenerator[AsyncSession, None]:  # 异步依赖
+    # 延迟导入，避免与 dependencies 循环引用
+    from src.common.utils.change_version import change_version
+    # 会话 span 跨越 yield，不作为当前 span，否则路由里的 span 都会挂到它下面
+    session_span = span("db.session")
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
+            with span("db.commit"):
+                await session.commit()
+            # 提交成功后再递增变更版本，保证读到新版本号时数据已可见
+            await change_version.publish(session)
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
+            session_span.end()
+
+
+# 不经过依赖注入、需要自行控制会话时长的场景（如长时间上传前后各用一个短事务，上传期间不占用连接）
+session_scope = asynccontextmanager(get_db)
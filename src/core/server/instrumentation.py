@@ -0,0 +1,104 @@
+"""
+客户端层埋点：SQLAlchemy 与 Redis
+
+- SQL：通过 before/after_cursor_execute 事件统计每条语句的耗时，累计到当前请求的 QueryStats，超过阈值的写入慢查询日志
+- SQL 注释：在语句末尾追加 /* request_id=... */，数据库侧的慢日志、processlist 也能关联到请求
+- Redis：InstrumentedRedis 在 execute_command / pipeline.execute 外层计时，REDIS_TRACE 开启时逐条记录命令
+- 链路追踪：请求被采样时，每条 SQL 与 Redis 命令补录为当前 span 的子 span
+"""
+import logging
+import time
+
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.common.utils.metrics import DB_QUERY_DURATION, REDIS_COMMAND_DURATION
+from src.common.utils.query_stats import current_query_stats, normalize_sql
+from src.common.utils.request_id import current_request_id
+from src.common.utils.tracing import current_span, record_span, span
+from src.core.conf.config import settings
+from src.core.server.slow_query import slow_query_log
+
+_SQL_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+redis_trace_logger = logging.getLogger("fastapi.redis")
+
+
+def sql_operation(statement: str) -> str:
+    """取语句的第一个关键字作为操作类型"""
+    head = statement.lstrip()[:6].upper()
+    return head if head in _SQL_OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _comment_request_id(conn, cursor, statement, parameters, context, executemany):
+    # executemany 不加注释：pymysql 依赖正则识别 INSERT ... VALUES 来合并为多行插入
+    request_id = current_request_id()
+    if request_id and not executemany:
+        statement = f"{statement} /* request_id={request_id} */"
+    return statement, parameters
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+    DB_QUERY_DURATION.labels(sql_operation(statement)).observe(duration)
+    stats = current_query_stats()
+    if stats is not None:
+        stats.record(statement, duration)
+    if current_span() is not None:
+        _record_span(f"db.{sql_operation(statement).lower()}", duration, **{"db.statement": normalize_sql(statement)})
+    slow_query_log.observe(statement, parameters, duration, executemany)
+
+
+def _record_span(name: str, duration: float, **attributes) -> None:
+    end_ns = time.time_ns()
+    record_span(name, end_ns - int(duration * 1e9), end_ns, **attributes)
+
+
+def install_sql_instrumentation(engine: Engine) -> None:
+    """在同步引擎上注册事件（AsyncEngine 需要传入 engine.sync_engine）"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    if settings.SQL_COMMENT_REQUEST_ID:
+        event.listen(engine, "before_cursor_execute", _comment_request_id, retval=True)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        with span("redis.PIPELINE", **{"redis.commands": len(self.command_stack)}):
+            start = time.perf_counter()
+            try:
+                return await super().execute(raise_on_error)
+            finally:
+                REDIS_COMMAND_DURATION.labels("PIPELINE").observe(time.perf_counter() - start)
+
+
+class InstrumentedRedis(redis.Redis):
+    """记录每个命令耗时的 Redis 客户端"""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            duration = time.perf_counter() - start
+            command = str(args[0]).upper()
+            REDIS_COMMAND_DURATION.labels(command).observe(duration)
+            if current_span() is not None:
+                _record_span(f"redis.{command}", duration)
+            if settings.REDIS_TRACE:
+                # request_id 由日志过滤器附加
+                redis_trace_logger.info(f"redis {command} {duration * 1000:.2f}ms")
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
@@ -0,0 +1,246 @@
+"""
+生产环境启动入口
+
+    python -m src.core.server.launcher                 # 按 Settings 启动多 worker
+    python -m src.core.server.launcher --workers 4     # 覆盖 SERVER_WORKERS
+    python -m src.core.server.launcher --reload        # 本地开发：单进程，代码变更自动重载
+
+- worker 数默认取可用 CPU 数（CPU 亲和性与 cgroup v2 配额中较小者），容器限制了 --cpus 时不会按宿主机核数启动
+- 固定使用 uvloop 事件循环与 httptools 解析器（均在 requirements.txt 中），未安装时直接报错，不会悄悄退回到较慢的实现
+- keep-alive 超时、监听队列长度、单 worker 最大请求数见 config.py 中的「服务进程配置」；
+  最大请求数对每个 worker 加上随机抖动，避免所有 worker 同时重启
+- 主进程监控 worker，退出的 worker（包括达到最大请求数的）会被重新拉起
+- 向主进程发送 SIGHUP 滚动重启：逐个启动新 worker（重新导入代码），等它预热完成、写入就绪标记后再停止对应的旧 worker，
+  旧 worker 先处理完进行中的请求再退出（SHUTDOWN_DRAIN_TIMEOUT），整个过程始终有 worker 在接收请求
+- SIGTTIN / SIGTTOU 增减一个 worker
+- SIGTERM / SIGINT 优雅退出：先向 worker 发送 SIGUSR1 进入下线状态（/readyz 返回 503，请求照常处理），
+  等待 SHUTDOWN_PRESTOP_DELAY 让负载均衡摘除实例，再向 worker 发送 SIGTERM（见 lifecycle.py）。
+  滚动重启与达到最大请求数时只替换单个 worker，同一实例的其余 worker 仍在服务，不经过下线状态
+"""
+import argparse
+import contextlib
+import copy
+import math
+import os
+import random
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import uvicorn
+from uvicorn import Config, Server
+from uvicorn.supervisors.multiprocess import Multiprocess, Process
+
+from src.common.utils.logger import logger
+from src.core.conf.config import settings
+from src.core.server.lifecycle import READY_DIR_ENV, lifecycle
+
+APP = "src.main:app"
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+DRAIN_SIGNAL = signal.SIGUSR1
+
+
+def available_cpus(cpu_max_path: str = CGROUP_CPU_MAX) -> int:
+    """本进程可用的 CPU 数：CPU 亲和性（taskset / cpuset）与 cgroup v2 CPU 配额（docker --cpus）中较小者"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows 没有 sched_getaffinity
+        count = os.cpu_count() or 1
+    try:
+        with open(cpu_max_path) as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            count = min(count, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, count)
+
+
+def worker_count(configured: int = 0) -> int:
+    """配置了正数时直接使用，否则每个可用 CPU 一个 worker（异步 worker 不需要 2N+1）"""
+    return configured if configured > 0 else available_cpus()
+
+
+def build_config(workers: int, host: Optional[str] = None, port: Optional[int] = None) -> Config:
+    return Config(
+        APP,
+        host=host or settings.SERVER_HOST,
+        port=port or settings.PORT,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_TIMEOUT,
+        limit_max_requests=settings.SERVER_MAX_REQUESTS or None,
+        # uvicorn 先在该时限内等待连接处理完毕，再执行 lifespan 关闭（下线等待与释放连接池）
+        timeout_graceful_shutdown=settings.SHUTDOWN_DRAIN_TIMEOUT,
+        log_level=settings.LOG_LEVEL,
+    )
+
+
+def jittered_config(config: Config, jitter: int, rng: random.Random = random) -> Config:
+    """复制一份配置，最大请求数加上 [0, jitter] 的随机数"""
+    config = copy.copy(config)
+    if config.limit_max_requests and jitter > 0:
+        config.limit_max_requests += rng.randint(0, jitter)
+    return config
+
+
+class WorkerServer(Server):
+    """收到 DRAIN_SIGNAL 时进入下线状态，但不停止服务，真正退出仍由随后的 SIGTERM 触发"""
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        if threading.current_thread() is not threading.main_thread():
+            with super().capture_signals():
+                yield
+            return
+        original = signal.signal(DRAIN_SIGNAL, lambda sig, frame: lifecycle.begin_draining())
+        try:
+            with super().capture_signals():
+                yield
+        finally:
+            signal.signal(DRAIN_SIGNAL, original)
+
+
+class RollingMultiprocess(Multiprocess):
+    """在 uvicorn 的 Multiprocess 基础上：每个 worker 使用独立抖动的最大请求数，SIGHUP 时先起新 worker 再停旧 worker"""
+
+    def __init__(self, config: Config, sockets: list, ready_dir: str, max_requests_jitter: int = 0,
+                 ready_timeout: float = 60.0, prestop_delay: float = 0.0):
+        super().__init__(config, target=WorkerServer(config).run, sockets=sockets)
+        self.ready_dir = ready_dir
+        self.max_requests_jitter = max_requests_jitter
+        self.ready_timeout = ready_timeout
+        self.prestop_delay = prestop_delay
+
+    def spawn(self) -> Process:
+        config = jittered_config(self.config, self.max_requests_jitter)
+        process = Process(config, WorkerServer(config).run, self.sockets)
+        # 早于该时间的同名标记属于使用过同一个 PID 的旧 worker
+        process.spawned_at = time.time()
+        process.start()
+        return process
+
+    def _remove_marker(self, process: Process) -> None:
+        try:
+            os.remove(os.path.join(self.ready_dir, str(process.pid)))
+        except OSError:
+            pass
+
+    def retire(self, process: Process) -> None:
+        """停止 worker（SIGTERM，worker 内部完成优雅下线）并清理它的就绪标记"""
+        process.terminate()
+        process.join()
+        self._remove_marker(process)
+
+    def is_ready(self, process: Process) -> bool:
+        """就绪标记存在，且是在该 worker 启动之后写入的"""
+        try:
+            return os.path.getmtime(os.path.join(self.ready_dir, str(process.pid))) >= process.spawned_at
+        except OSError:
+            return False
+
+    def wait_ready(self, process: Process) -> bool:
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline:
+            if self.is_ready(process):
+                return True
+            if not process.process.is_alive():
+                return False
+            time.sleep(0.1)
+        return False
+
+    def init_processes(self) -> None:
+        for _ in range(self.processes_num):
+            self.processes.append(self.spawn())
+
+    def restart_all(self) -> None:
+        for idx, old in enumerate(list(self.processes)):
+            new = self.spawn()
+            if not self.wait_ready(new):
+                # 新代码起不来时保留其余旧 worker，服务不中断
+                logger.error(f"新 worker [{new.pid}] 未在 {self.ready_timeout}s 内就绪，终止滚动重启")
+                self.retire(new)
+                return
+            self.retire(old)
+            self.processes[idx] = new
+            logger.info(f"worker [{old.pid}] 已替换为 [{new.pid}]（{idx + 1}/{len(self.processes)}）")
+
+    def keep_subprocess_alive(self) -> None:
+        if self.should_exit.is_set():
+            return
+        for idx, process in enumerate(self.processes):
+            if process.is_alive():
+                continue
+            process.kill()  # 可能是卡死而不是退出
+            process.join()
+            # 自行退出（达到最大请求数、崩溃）的 worker 也要清理标记，否则复用该 PID 的新 worker 会被误判为已就绪
+            self._remove_marker(process)
+            if self.should_exit.is_set():
+                return
+            logger.info(f"worker [{process.pid}] 已退出，重新启动")
+            self.processes[idx] = self.spawn()
+
+    def terminate_all(self) -> None:
+        """整个实例退出：先让所有 worker 进入下线状态并继续服务 prestop_delay 秒，再发送 SIGTERM"""
+        if self.prestop_delay > 0:
+            for process in self.processes:
+                try:
+                    os.kill(process.pid, DRAIN_SIGNAL)
+                except (ProcessLookupError, TypeError):
+                    pass
+            logger.info(f"worker 已进入下线状态，{self.prestop_delay}s 后停止")
+            time.sleep(self.prestop_delay)
+        super().terminate_all()
+
+    def handle_ttin(self) -> None:
+        self.processes_num += 1
+        self.processes.append(self.spawn())
+
+    def handle_ttou(self) -> None:
+        if self.processes_num <= 1:
+            return
+        self.processes_num -= 1
+        self.retire(self.processes.pop())
+
+
+def run(workers: Optional[int] = None, host: Optional[str] = None, port: Optional[int] = None,
+        reload: bool = False) -> None:
+    if reload:
+        uvicorn.run(APP, host=host or settings.SERVER_HOST, port=port or settings.PORT, reload=True,
+                    log_level=settings.LOG_LEVEL)
+        return
+
+    workers = worker_count(settings.SERVER_WORKERS if workers is None else workers)
+    config = build_config(workers, host, port)
+    connections = settings.POOL_SIZE + settings.MAX_OVERFLOW
+    logger.info(f"启动 {workers} 个 worker（可用 CPU {available_cpus()}），"
+                f"数据库连接上限每个 worker {connections}，合计 {connections * workers}")
+
+    # 子进程以 spawn 方式启动，继承环境变量，就绪后在该目录写入标记
+    ready_dir = tempfile.mkdtemp(prefix="fastapi-ready-")
+    os.environ[READY_DIR_ENV] = ready_dir
+    try:
+        sock = config.bind_socket()
+        RollingMultiprocess(config, [sock], ready_dir, settings.SERVER_MAX_REQUESTS_JITTER,
+                            settings.SERVER_READY_TIMEOUT, settings.SHUTDOWN_PRESTOP_DELAY).run()
+    finally:
+        shutil.rmtree(ready_dir, ignore_errors=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="启动 API 服务")
+    parser.add_argument("--workers", type=int, help="worker 数，默认 SERVER_WORKERS（0 为按可用 CPU 数）")
+    parser.add_argument("--host", help="默认 SERVER_HOST")
+    parser.add_argument("--port", type=int, help="默认 PORT")
+    parser.add_argument("--reload", action="store_true", help="开发模式：单进程，代码变更自动重载")
+    args = parser.parse_args(argv)
+    run(args.workers, args.host, args.port, args.reload)
+
+
+if __name__ == "__main__":
+    main()
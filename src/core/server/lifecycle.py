@@ -0,0 +1,148 @@
+"""
+启动预热与优雅下线
+
+启动：
+- 预先建立 DB_WARMUP_CONNECTIONS 个数据库连接（并发打开、各执行一次 SELECT 1 后归还连接池）和
+  REDIS_WARMUP_CONNECTIONS 个 Redis 连接（并发 PING），首批请求不再承担 TCP 与认证握手
+- 预热完成（或超时、失败）后标记为就绪；在此之前 /readyz 返回 503，开启 READINESS_GATE_ENABLED 时业务请求也返回 503
+
+下线（由 launcher.py 启动时）：
+1. 主进程收到 SIGTERM 后先向各 worker 发送 SIGUSR1，worker 标记为下线中：/readyz 返回 503，
+   业务请求照常处理但响应带 Connection: close，客户端的长连接逐步断开
+2. 持续 SHUTDOWN_PRESTOP_DELAY 秒，让负载均衡的健康检查发现 503 并摘除实例，期间到达的请求不会失败
+3. 再向 worker 发送 SIGTERM：uvicorn 关闭监听 socket，在 SHUTDOWN_DRAIN_TIMEOUT 内等待进行中的请求完成，
+   最后执行 lifespan 关闭，释放数据库连接池与 Redis 连接
+直接用 uvicorn 启动时没有第 1、2 步，收到 SIGTERM 即从第 3 步开始。
+
+进行中的请求由 LifecycleMiddleware 计数（在 /readyz 中展示），状态只在本进程内有效，每个 worker 各自预热、各自下线。
+由 launcher.py 启动时，就绪后在 APP_READY_DIR 下写入以 PID 命名的文件，滚动重启据此判断新 worker 已可接收请求。
+"""
+import asyncio
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.common.utils.logger import logger
+
+READY_DIR_ENV = "APP_READY_DIR"
+
+
+class Lifecycle:
+    """本进程的就绪、下线状态与进行中的请求数"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, ready: bool = True) -> None:
+        """未经过 lifespan（如测试、基准测试直接驱动 ASGI 应用）时视为就绪；lifespan 启动时以 ready=False 重置"""
+        self.ready = ready
+        self.draining = False
+        self.in_flight = 0
+        self.warmup = {}
+
+    def request_started(self) -> None:
+        self.in_flight += 1
+
+    def request_finished(self) -> None:
+        self.in_flight = max(self.in_flight - 1, 0)
+
+    def accepting(self) -> bool:
+        return self.ready and not self.draining
+
+    def begin_draining(self) -> None:
+        """进入下线状态：/readyz 返回 503，请求照常处理；可在信号处理函数中调用"""
+        self.draining = True
+
+    def status(self) -> dict:
+        return {"ready": self.ready, "draining": self.draining, "in_flight": self.in_flight,
+                "warmup": self.warmup}
+
+
+lifecycle = Lifecycle()
+
+
+def notify_ready() -> None:
+    """通知 launcher 本 worker 已就绪（未通过 launcher 启动时不做任何事）"""
+    ready_dir = os.environ.get(READY_DIR_ENV)
+    if ready_dir:
+        try:
+            open(os.path.join(ready_dir, str(os.getpid())), "w").close()
+        except OSError as e:
+            logger.warning(f"写入就绪标记失败: {e}")
+
+
+def pool_capacity(engine: AsyncEngine) -> Optional[int]:
+    """连接池常驻连接数，StaticPool / NullPool 等没有 size() 的连接池返回 None"""
+    size = getattr(engine.sync_engine.pool, "size", None)
+    return size() if callable(size) else None
+
+
+async def warm_up_database(engine: AsyncEngine, connections: int) -> int:
+    """同时占用 connections 个连接，迫使连接池真正建立它们，执行 SELECT 1 后一起归还"""
+    capacity = pool_capacity(engine)
+    if capacity is not None:
+        connections = min(connections, capacity)
+    if connections <= 0:
+        return 0
+    # 每个连接单独建立；asyncio.wait 被取消（预热超时）时不会取消这些任务，它们建立的连接在 finally 中统一归还
+    tasks = [asyncio.ensure_future(engine.connect().start()) for _ in range(connections)]
+    try:
+        await asyncio.wait(tasks)
+        conns = [task.result() for task in tasks]
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in conns))
+    finally:
+        cleanup = asyncio.ensure_future(_close_connections(tasks))
+        if all(task.done() for task in tasks):
+            await cleanup
+        else:
+            # 超时时不等待还在建立的连接，由后台任务在它们建立后归还
+            _pending_cleanups.add(cleanup)
+            cleanup.add_done_callback(_pending_cleanups.discard)
+    return connections
+
+
+_pending_cleanups = set()
+
+
+async def _close_connections(tasks) -> None:
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, AsyncConnection):
+            await result.close()
+
+
+async def warm_up_redis(client, connections: int) -> int:
+    """并发 PING，每个未完成的命令占用一个连接，连接随后留在连接池中复用"""
+    if connections <= 0:
+        return 0
+    await asyncio.gather(*(client.ping() for _ in range(connections)))
+    return connections
+
+
+async def _timed(name: str, coro, timeout: float) -> dict:
+    started = time.perf_counter()
+    try:
+        opened = await asyncio.wait_for(coro, timeout)
+        result = {"connections": opened}
+    except Exception as e:
+        logger.warning(f"{name} 预热失败: {type(e).__name__}: {e}")
+        result = {"connections": 0, "error": f"{type(e).__name__}: {e}"}
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+async def warm_up(engine: AsyncEngine, redis_client, db_connections: int, redis_connections: int,
+                  timeout: float) -> dict:
+    """数据库与 Redis 同时预热；失败或超时只记录日志，仍然标记为就绪，缺少的连接由请求按需创建"""
+    database, redis = await asyncio.gather(
+        _timed("数据库连接池", warm_up_database(engine, db_connections), timeout),
+        _timed("Redis 连接池", warm_up_redis(redis_client, redis_connections), timeout),
+    )
+    lifecycle.warmup = {"database": database, "redis": redis}
+    lifecycle.ready = True
+    notify_ready()
+    logger.info(f"连接预热完成：数据库 {database['connections']} 个（{database['elapsed_ms']}ms），"
+                f"Redis {redis['connections']} 个（{redis['elapsed_ms']}ms）")
+    return lifecycle.warmup
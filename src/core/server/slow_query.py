@@ -0,0 +1,114 @@
+"""
+慢查询日志
+
+超过 SLOW_QUERY_THRESHOLD_MS 的语句以 JSON 行写入 logs/slow_query.log，记录归一化后的 SQL、参数形状（只有类型和长度，
+不落具体值）、耗时和发起请求的路由。慢 SELECT 的执行计划在独立连接上异步抓取，同一语句形状只抓取一次，
+抓取结果以 event=explain 的记录写入同一文件，通过 fingerprint 与慢查询记录关联。
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.common.utils.logger import logger, slow_query_logger
+from src.common.utils.query_stats import current_query_stats, normalize_sql
+from src.common.utils.request_id import current_request_id
+
+# 已抓取过执行计划的语句形状数量上限
+EXPLAIN_CACHE_SIZE = 1000
+# 同时进行的 EXPLAIN 数量上限，超出时直接跳过，避免慢查询风暴时再给数据库加压
+MAX_PENDING_EXPLAINS = 2
+
+
+def _value_shape(value) -> str:
+    name = type(value).__name__
+    if isinstance(value, (str, bytes, list, tuple, set)):
+        return f"{name}[{len(value)}]"
+    return name
+
+
+def param_shapes(parameters, executemany: bool = False):
+    """只保留参数的类型与长度"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {"rows": len(parameters), "row": param_shapes(parameters[0]) if parameters else None}
+    if isinstance(parameters, dict):
+        return {key: _value_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_value_shape(value) for value in parameters]
+    return None
+
+
+def fingerprint(shape: str) -> str:
+    return hashlib.sha1(shape.encode()).hexdigest()[:16]
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.engine: Optional[AsyncEngine] = None
+        self.threshold: Optional[float] = None
+        self.explain = False
+        self._explained: OrderedDict = OrderedDict()
+        self._pending: set = set()
+
+    def configure(self, engine: AsyncEngine, threshold_ms: Optional[float], explain: bool = True) -> None:
+        self.engine = engine
+        self.threshold = threshold_ms / 1000 if threshold_ms else None
+        self.explain = explain
+
+    def observe(self, statement: str, parameters, duration: float, executemany: bool = False) -> None:
+        """由 cursor 事件调用，未超过阈值时立即返回"""
+        if self.threshold is None or duration < self.threshold:
+            return
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+        shape = normalize_sql(statement)
+        stats = current_query_stats()
+        record = {
+            "event": "slow_query",
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "fingerprint": fingerprint(shape),
+            "duration_ms": round(duration * 1000, 2),
+            "route": stats.route if stats else None,
+            "request_id": current_request_id(),
+            "sql": shape,
+            "params": param_shapes(parameters, executemany),
+        }
+        slow_query_logger.warning(json.dumps(record, ensure_ascii=False))
+        if self.explain and not executemany and shape[:6].upper() == "SELECT":
+            self._schedule_explain(shape, statement, parameters)
+
+    def _schedule_explain(self, shape: str, statement: str, parameters) -> None:
+        key = fingerprint(shape)
+        if key in self._explained or len(self._pending) >= MAX_PENDING_EXPLAINS or self.engine is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._explained[key] = True
+        if len(self._explained) > EXPLAIN_CACHE_SIZE:
+            self._explained.popitem(last=False)
+        # 使用空上下文，EXPLAIN 不计入当前请求的 SQL 统计
+        task = loop.create_task(self._explain(key, statement, parameters), context=contextvars.Context())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _explain(self, key: str, statement: str, parameters) -> None:
+        prefix = "EXPLAIN QUERY PLAN " if self.engine.dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.exec_driver_sql(prefix + statement, parameters)
+                plan = [dict(row._mapping) for row in result]
+        except Exception as e:
+            logger.warning(f"抓取执行计划失败: {e}")
+            return
+        record = {"event": "explain", "fingerprint": key, "plan": plan}
+        slow_query_logger.warning(json.dumps(record, ensure_ascii=False, default=str))
+
+
+slow_query_log = SlowQueryLog()
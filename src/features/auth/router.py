@@ -82,9 +82,8 @@ async def login(payload: LoginInputSchema, db: DbSession):
     if not user.check_password(payload.password):
         return BaseResponse.error("密码错误")
 
-    user_role = await db.execute(user_roles.select().where(user_roles.c.user_id == user.id))
-    user_role = user_role.fetchone()
-    is_superuser = user_role.role_id == 2 if user_role else False
+    role_id = await auth_service.get_user_role_id(db, user.id)
+    is_superuser = role_id == 2
     # 2. 准备 token 数据
     token_data = {
         "sub": str(user.id),  # 用户ID作为主题
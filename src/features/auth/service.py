@@ -1,7 +1,8 @@
 from typing import Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from src.features.user.models import User
+from src.features.user.models import User, user_roles
+from src.common.utils.memo import memoize
 from src.common.utils.logger import logger
 
 
@@ -37,4 +38,16 @@ class AuthService:
             return None
 
 
+    @staticmethod
+    @memoize("user_role_id", ttl=300,
+             key=lambda db, user_id: user_id,
+             tags=lambda db, user_id: [f"user:{user_id}"])
+    async def get_user_role_id(db: AsyncSession, user_id: int) -> Union[int, None]:
+        """获取用户的角色ID，没有关联角色时返回None"""
+        result = await db.execute(
+            select(user_roles.c.role_id).where(user_roles.c.user_id == user_id).limit(1)
+        )
+        return result.scalar_one_or_none()
+
+
 auth_service = AuthService()
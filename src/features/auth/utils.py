@@ -1,8 +1,8 @@
 import random
-import aiosmtplib
-from email.mime.text import MIMEText
-from email.utils import formataddr
+import time
 from src.common.utils.logger import logger
+from src.common.utils.metrics import SMTP_SEND_DURATION
+from src.common.utils.tracing import span
 from src.core.conf.config import settings
 from src.core.server.dependencies import get_redis
 
@@ -42,6 +42,11 @@ class EmailVerification:
 
     @staticmethod
     async def send_email(email, code):
+        # SMTP 客户端只在发送邮件时用到，延迟导入以缩短启动时间
+        import aiosmtplib
+        from email.mime.text import MIMEText
+        from email.utils import formataddr
+
         mail_text = f'''
         感谢您注册我们的服务！
 
@@ -56,18 +61,22 @@ class EmailVerification:
         msg["To"] = email
         msg["Subject"] = "您的注册验证码"
 
+        start = time.perf_counter()
         try:
-            response = await aiosmtplib.send(
-                msg,
-                hostname=settings.EMAIL_HOST,
-                port=587,
-                start_tls=True,
-                username=settings.EMAIL_HOST_USER,
-                password=settings.EMAIL_HOST_PASSWORD,
-            )
+            with span("smtp.send", **{"smtp.host": settings.EMAIL_HOST}):
+                response = await aiosmtplib.send(
+                    msg,
+                    hostname=settings.EMAIL_HOST,
+                    port=587,
+                    start_tls=True,
+                    username=settings.EMAIL_HOST_USER,
+                    password=settings.EMAIL_HOST_PASSWORD,
+                )
+            SMTP_SEND_DURATION.labels("success").observe(time.perf_counter() - start)
             logger.info(f"邮件发送成功: {response}")
             return True
         except Exception as e:
+            SMTP_SEND_DURATION.labels("failure").observe(time.perf_counter() - start)
             logger.error(f"邮件发送失败: {e}")
             return False
 
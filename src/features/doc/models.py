@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, select, text
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, Enum, select, text
 from sqlalchemy.orm import relationship, column_property
 from src.core.base.models import BaseDBModel
 
@@ -17,6 +17,8 @@ class Doc(BaseDBModel):
     id = Column(Integer, primary_key=True, index=True)
     file_name = Column(String(255), comment="文档名称", index=True)
     file_uuid = Column(String(255), unique=True, comment="文档唯一标识")
+    file_size = Column(BigInteger, comment="文件大小（字节）")
+    file_hash = Column(String(64), index=True, comment="文件内容 SHA-256")
 
     # 文档所有者, 外键关联users表
     owner = relationship("User", back_populates="doc")
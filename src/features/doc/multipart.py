@@ -0,0 +1,263 @@
+"""
+分片上传（断点续传）
+
+协议（均需登录，只有发起人可以操作同一个上传）：
+1. POST   /api/v1/doc/multipart/initiate                       发起上传，返回 upload_id 与建议的分片大小
+2. PUT    /api/v1/doc/multipart/{upload_id}/parts/{part_number} 上传一个分片（请求体为原始内容），分片可以并行、乱序、重传
+3. GET    /api/v1/doc/multipart/{upload_id}                    查询已上传的分片（大小与 SHA-256），断线后据此续传
+4. POST   /api/v1/doc/multipart/{upload_id}/complete           按分片号顺序拼接，逐个核对分片的大小与 SHA-256，
+                                                                 声明了整体 SHA-256 时一并校验，写入 QUEUEING 状态的文档记录
+5. DELETE /api/v1/doc/multipart/{upload_id}                    放弃上传并删除分片（正在合并时返回 409）
+
+状态保存在 Redis（多 worker 共享）：
+- doc_multipart:{upload_id}        上传信息（JSON）
+- doc_multipart:{upload_id}:parts  哈希表，分片号 -> "大小:SHA-256"
+已上传分片的总大小不能超过声明的 file_size 与 DOC_UPLOAD_MAX_BYTES，超出的分片直接返回 413。
+两个键在每次上传分片时续期 DOC_MULTIPART_TTL，过期即视为放弃；分片文件保存在 DOC_STORAGE_DIR/.multipart/{upload_id}/，
+后台任务定期删除 Redis 中已没有上传信息的分片目录（见 collect_orphans）。
+"""
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import List, Optional
+
+import anyio
+from fastapi import status
+
+from src.common.utils.logger import logger
+from src.core.base.exceptions import MessageException
+from src.core.conf.config import settings
+from src.core.server.dependencies import get_redis
+from src.features.doc.storage import io_limiter, storage_dir, too_large
+
+# 刚创建的分片目录可能还没来得及写入 Redis，清理时跳过最近修改过的目录
+GC_GRACE_SECONDS = 300
+COMPLETE_LOCK_SECONDS = 600
+
+
+def multipart_dir() -> str:
+    return os.path.join(storage_dir(), ".multipart")
+
+
+def part_path(upload_id: str, part_number: int) -> str:
+    return os.path.join(multipart_dir(), upload_id, f"{part_number:05d}")
+
+
+class MultipartUpload:
+    CACHE_PREFIX = "doc_multipart"
+
+    @staticmethod
+    def _meta_key(upload_id: str) -> str:
+        return f"{MultipartUpload.CACHE_PREFIX}:{upload_id}"
+
+    @staticmethod
+    def _parts_key(upload_id: str) -> str:
+        return f"{MultipartUpload.CACHE_PREFIX}:{upload_id}:parts"
+
+    @staticmethod
+    def _lock_key(upload_id: str) -> str:
+        return f"{MultipartUpload.CACHE_PREFIX}:{upload_id}:lock"
+
+    @staticmethod
+    async def initiate(user_id: int, project_id: int, file_name: str, file_size: Optional[int] = None,
+                       sha256: Optional[str] = None) -> dict:
+        if file_size is not None and file_size > settings.DOC_UPLOAD_MAX_BYTES:
+            raise MessageException(f"文件大小不能超过 {settings.DOC_UPLOAD_MAX_BYTES} 字节",
+                                   status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        upload_id = uuid.uuid4().hex
+        meta = {
+            "user_id": user_id,
+            "project_id": project_id,
+            "file_name": file_name,
+            "file_size": file_size,
+            "sha256": sha256.lower() if sha256 else None,
+            "create_time": int(time.time()),
+        }
+        redis_client = await get_redis()
+        await redis_client.setex(MultipartUpload._meta_key(upload_id), settings.DOC_MULTIPART_TTL,
+                                 json.dumps(meta))
+        return {"upload_id": upload_id, **meta}
+
+    @staticmethod
+    async def get(upload_id: str, user_id: int) -> dict:
+        """读取上传信息，不存在（已完成、已放弃或过期）返回 404，不是发起人返回 403"""
+        redis_client = await get_redis()
+        raw = await redis_client.get(MultipartUpload._meta_key(upload_id))
+        if raw is None:
+            raise MessageException("上传不存在或已过期", status_code=status.HTTP_404_NOT_FOUND)
+        meta = json.loads(raw)
+        if meta["user_id"] != user_id:
+            raise MessageException("无权操作该上传", status_code=status.HTTP_403_FORBIDDEN)
+        return {"upload_id": upload_id, **meta}
+
+    @staticmethod
+    async def record_part(upload_id: str, part_number: int, size: int, sha256: str) -> None:
+        """登记分片并为上传续期"""
+        redis_client = await get_redis()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(MultipartUpload._parts_key(upload_id), str(part_number), f"{size}:{sha256}")
+            pipe.expire(MultipartUpload._parts_key(upload_id), settings.DOC_MULTIPART_TTL)
+            pipe.expire(MultipartUpload._meta_key(upload_id), settings.DOC_MULTIPART_TTL)
+            await pipe.execute()
+
+    @staticmethod
+    async def remove_part(upload_id: str, part_number: int) -> None:
+        redis_client = await get_redis()
+        await redis_client.hdel(MultipartUpload._parts_key(upload_id), str(part_number))
+        await anyio.to_thread.run_sync(_remove_quietly, part_path(upload_id, part_number), limiter=io_limiter())
+
+    @staticmethod
+    def size_limit(upload: dict) -> int:
+        """整个上传允许的总大小：声明了 file_size 时以它为准，且都不超过 DOC_UPLOAD_MAX_BYTES"""
+        return min(upload["file_size"] or settings.DOC_UPLOAD_MAX_BYTES, settings.DOC_UPLOAD_MAX_BYTES)
+
+    @staticmethod
+    async def part_budget(upload: dict, part_number: int) -> int:
+        """本分片最多可以写入的字节数：单个分片上限与整个上传剩余额度中较小的一个，重传的分片不计入旧内容"""
+        parts = await MultipartUpload.list_parts(upload["upload_id"])
+        used = sum(part["size"] for part in parts if part["part_number"] != part_number)
+        remaining = MultipartUpload.size_limit(upload) - used
+        if remaining <= 0:
+            raise too_large(MultipartUpload.size_limit(upload))
+        return min(settings.DOC_MULTIPART_MAX_PART_SIZE, remaining)
+
+    @staticmethod
+    async def check_total(upload: dict, part_number: int, size: int) -> bool:
+        """
+        分片写完、换入正式路径之前核对总大小（写入期间其他分片可能已经登记），超出时抛出 413；
+        返回该分片号此前是否已经登记过
+        """
+        parts = await MultipartUpload.list_parts(upload["upload_id"])
+        used = sum(part["size"] for part in parts if part["part_number"] != part_number)
+        if used + size > MultipartUpload.size_limit(upload):
+            raise too_large(MultipartUpload.size_limit(upload))
+        return any(part["part_number"] == part_number for part in parts)
+
+    @staticmethod
+    async def commit_part(upload: dict, part_number: int, temp_path: str, size: int, sha256: str) -> None:
+        """
+        把校验通过的临时文件换入正式分片路径并登记。换入前核对总大小与合并锁，失败时只删除临时文件，
+        已上传的同号分片不受影响；并行上传的新分片同时通过核对而超出总额度时，换入后撤回这个新分片并返回 413，
+        磁盘占用始终不超过总额度加上正在上传的分片
+        """
+        upload_id = upload["upload_id"]
+        try:
+            replaced = await MultipartUpload.check_total(upload, part_number, size)
+            await MultipartUpload.ensure_unlocked(upload_id)
+        except BaseException:
+            await anyio.to_thread.run_sync(_remove_quietly, temp_path, limiter=io_limiter())
+            raise
+        await anyio.to_thread.run_sync(os.replace, temp_path, part_path(upload_id, part_number),
+                                       limiter=io_limiter())
+        await MultipartUpload.record_part(upload_id, part_number, size, sha256)
+        if replaced:
+            return
+        parts = await MultipartUpload.list_parts(upload_id)
+        if sum(part["size"] for part in parts) > MultipartUpload.size_limit(upload):
+            await MultipartUpload.remove_part(upload_id, part_number)
+            raise too_large(MultipartUpload.size_limit(upload))
+
+    @staticmethod
+    async def list_parts(upload_id: str) -> List[dict]:
+        redis_client = await get_redis()
+        parts = await redis_client.hgetall(MultipartUpload._parts_key(upload_id))
+        result = []
+        for number, value in parts.items():
+            size, sha256 = value.split(":", 1)
+            result.append({"part_number": int(number), "size": int(size), "sha256": sha256})
+        return sorted(result, key=lambda part: part["part_number"])
+
+    @staticmethod
+    async def lock(upload_id: str) -> None:
+        """防止同一个上传被并发完成，或在合并期间被放弃"""
+        redis_client = await get_redis()
+        if not await redis_client.set(MultipartUpload._lock_key(upload_id), 1, ex=COMPLETE_LOCK_SECONDS, nx=True):
+            raise MessageException("该上传正在合并中", status_code=status.HTTP_409_CONFLICT)
+
+    @staticmethod
+    async def ensure_unlocked(upload_id: str) -> None:
+        """合并期间不再接收分片，避免客户端以为已上传的分片被合并后删除"""
+        redis_client = await get_redis()
+        if await redis_client.exists(MultipartUpload._lock_key(upload_id)):
+            raise MessageException("该上传正在合并中", status_code=status.HTTP_409_CONFLICT)
+
+    @staticmethod
+    async def unlock(upload_id: str) -> None:
+        redis_client = await get_redis()
+        await redis_client.delete(MultipartUpload._lock_key(upload_id))
+
+    @staticmethod
+    async def discard(upload_id: str) -> None:
+        """删除 Redis 状态与分片文件"""
+        redis_client = await get_redis()
+        await redis_client.delete(MultipartUpload._meta_key(upload_id), MultipartUpload._parts_key(upload_id),
+                                  MultipartUpload._lock_key(upload_id))
+        await anyio.to_thread.run_sync(shutil.rmtree, os.path.join(multipart_dir(), upload_id), True,
+                                       limiter=io_limiter())
+
+    @staticmethod
+    def check_parts(parts: List[dict], file_size: Optional[int]) -> int:
+        """分片号必须从 1 开始连续，返回总大小"""
+        if not parts:
+            raise MessageException("还没有上传任何分片", status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        missing = sorted(set(range(1, parts[-1]["part_number"] + 1)) - {part["part_number"] for part in parts})
+        if missing:
+            raise MessageException(f"缺少分片: {missing[:20]}", status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        total = sum(part["size"] for part in parts)
+        if total > settings.DOC_UPLOAD_MAX_BYTES:
+            raise MessageException(f"文件大小不能超过 {settings.DOC_UPLOAD_MAX_BYTES} 字节",
+                                   status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if file_size is not None and total != file_size:
+            raise MessageException(f"分片总大小 {total} 与声明的文件大小 {file_size} 不一致",
+                                   status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return total
+
+
+multipart_upload = MultipartUpload()
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _stale_dirs(root: str, grace: float) -> List[str]:
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return []
+    deadline = time.time() - grace
+    return [entry.name for entry in entries if entry.is_dir() and entry.stat().st_mtime < deadline]
+
+
+async def collect_orphans(grace: float = GC_GRACE_SECONDS) -> int:
+    """删除 Redis 中已没有上传信息（过期或被放弃）的分片目录，返回删除的数量；多个 worker 同时执行也没有问题"""
+    root = multipart_dir()
+    names = await anyio.to_thread.run_sync(_stale_dirs, root, grace, limiter=io_limiter())
+    if not names:
+        return 0
+    redis_client = await get_redis()
+    removed = 0
+    for name in names:
+        if await redis_client.exists(MultipartUpload._meta_key(name)):
+            continue
+        await anyio.to_thread.run_sync(shutil.rmtree, os.path.join(root, name), True, limiter=io_limiter())
+        removed += 1
+    return removed
+
+
+async def collect_orphans_periodically(interval: float):
+    """后台定期清理过期分片"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await collect_orphans()
+            if removed:
+                logger.info(f"已清理 {removed} 个过期的分片上传")
+        except Exception as e:
+            logger.warning(f"清理过期分片失败: {e}")
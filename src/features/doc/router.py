@@ -1,14 +1,30 @@
-from fastapi import APIRouter, Depends, status
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Path, Query, Request, status
 from src.common.utils.pagination import paginate
-from src.common.utils.security import require_authentication, login_required
+from src.common.utils.fieldsets import parse_fields, to_schema_list
+from src.common.utils.conditional import conditional_get, with_etag
+from src.common.utils.response_cache import response_cache, RouteCache
+from src.common.utils.security import require_authentication, login_required, get_current_user
+from src.core.conf.config import settings
+from src.core.server.database import session_scope
 from src.core.server.dependencies import DbSession
+from src.core.base.exceptions import MessageException
 from src.core.base.response import BaseResponse
-from src.core.base.schema import BaseRequestSchema
-from src.features.doc.schema import DocListOutputSchema, DocListData
+from src.core.base.schema import BaseRequestSchema, BaseResponseSchema
+from src.features.doc.multipart import multipart_upload, part_path
+from src.features.doc.schema import (DocListOutputSchema, DocListData, DocUploadOutputSchema, DocUploadData,
+                                     MultipartInitiateInputSchema, MultipartInitiateOutputSchema,
+                                     MultipartPartOutputSchema, MultipartStatusOutputSchema,
+                                     MultipartCompleteInputSchema)
 from src.features.doc.service import doc_service
+from src.features.doc.storage import assemble_files, file_path, remove_file, save_stream, too_large, upload_slot
 
 router = APIRouter()
 
+UPLOAD_ID = Path(..., pattern=r"^[0-9a-f]{32}$", description="上传id")
+
 
 @router.get("/list",
             response_model=DocListOutputSchema,
@@ -18,11 +34,199 @@ router = APIRouter()
             # require_authentication和admin_required都不需要拿到注入依赖的返回值，因此可以放到路由装饰器中
             dependencies=[Depends(require_authentication), Depends(login_required)],
             )
-async def list_docs(db: DbSession, params: BaseRequestSchema = Depends()):
+async def list_docs(db: DbSession,
+                    params: BaseRequestSchema = Depends(),
+                    etag=Depends(conditional_get("doc", "project", "user")),
+                    cache: RouteCache = Depends(response_cache(ttl=30, tags=("doc", "project", "user")))):
     """
     获取项目列表接口
     """
-    query = doc_service.get_doc_list(params.q)
+    cached = await cache.get()
+    if cached:
+        return with_etag(cached, etag)
+    fields = parse_fields(params.fields, DocListData)
+    query = doc_service.get_doc_list(params.q, fields)
     data = await paginate(db, query, params.page_num, params.page_size)
-    data["list"] = [DocListData.model_validate(item) for item in data["list"]]
-    return BaseResponse.success(data=data)
+    data["list"] = to_schema_list(DocListData, data["list"], fields)
+    return with_etag(await cache.set(BaseResponse.success(data=data)), etag)
+
+
+
+@router.post("/upload",
+             response_model=DocUploadOutputSchema,
+             status_code=status.HTTP_201_CREATED,
+             summary="上传文档",
+             description="请求体为文件原始内容（Content-Type: application/octet-stream），边接收边写入磁盘并计算 SHA-256，"
+                         "可通过请求头 X-Content-SHA256 校验内容（需登录）",
+             dependencies=[Depends(require_authentication), Depends(login_required)],
+             )
+async def upload_doc(request: Request,
+                     project_id: int = Query(..., description="所属项目id"),
+                     file_name: str = Query(..., min_length=1, max_length=255, description="文件名称"),
+                     content_length: Optional[int] = Header(None),
+                     content_sha256: Optional[str] = Header(None, alias="X-Content-SHA256"),
+                     user=Depends(get_current_user)):
+    """
+    上传文档接口：只在开始前校验权限、结束后写入文档记录时各用一个短事务，接收文件期间不占用数据库连接
+    """
+    if content_length is not None and content_length > settings.DOC_UPLOAD_MAX_BYTES:
+        raise too_large(settings.DOC_UPLOAD_MAX_BYTES)
+    user_id = int(user["sub"])
+    async with upload_slot():
+        async with session_scope() as db:
+            if not await doc_service.check_project_access(db, project_id, user_id, user["is_superuser"]):
+                raise MessageException("项目不存在或无权上传", status_code=status.HTTP_403_FORBIDDEN)
+
+        file_uuid = uuid.uuid4().hex
+        path = file_path(file_uuid)
+        file_size, file_hash = await save_stream(request.stream(), path)
+
+    try:
+        if file_size == 0:
+            raise MessageException("文件内容为空", status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if content_sha256 and content_sha256.lower() != file_hash:
+            raise MessageException("文件内容与 X-Content-SHA256 不一致", status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        async with session_scope() as db:
+            doc = await doc_service.create_doc(db, file_name, file_uuid, file_size, file_hash, project_id, user_id)
+            data = DocUploadData.model_validate(doc).model_dump()
+    except Exception:
+        await remove_file(path)
+        raise
+    return BaseResponse.created(data=data, message="上传成功")
+
+
+@router.post("/multipart/initiate",
+             response_model=MultipartInitiateOutputSchema,
+             status_code=status.HTTP_201_CREATED,
+             summary="发起分片上传",
+             description="大文件分片上传（断点续传）：发起后按分片号并行上传分片，全部上传后调用 complete 合并（需登录）",
+             dependencies=[Depends(require_authentication), Depends(login_required)],
+             )
+async def initiate_multipart(data: MultipartInitiateInputSchema, db: DbSession, user=Depends(get_current_user)):
+    """
+    发起分片上传接口
+    """
+    user_id = int(user["sub"])
+    if not await doc_service.check_project_access(db, data.project_id, user_id, user["is_superuser"]):
+        raise MessageException("项目不存在或无权上传", status_code=status.HTTP_403_FORBIDDEN)
+    upload = await multipart_upload.initiate(user_id, data.project_id, data.file_name, data.file_size, data.sha256)
+    return BaseResponse.created(data={
+        "upload_id": upload["upload_id"],
+        "part_size": settings.DOC_MULTIPART_PART_SIZE,
+        "max_part_size": settings.DOC_MULTIPART_MAX_PART_SIZE,
+        "max_parts": settings.DOC_MULTIPART_MAX_PARTS,
+        "expires_in": settings.DOC_MULTIPART_TTL,
+    })
+
+
+@router.put("/multipart/{upload_id}/parts/{part_number}",
+            response_model=MultipartPartOutputSchema,
+            status_code=status.HTTP_200_OK,
+            summary="上传分片",
+            description="请求体为分片原始内容，同一分片号重复上传时覆盖，可通过请求头 X-Content-SHA256 校验分片内容（需登录）",
+            dependencies=[Depends(require_authentication), Depends(login_required)],
+            )
+async def upload_part(request: Request,
+                      upload_id: str = UPLOAD_ID,
+                      part_number: int = Path(..., ge=1, le=settings.DOC_MULTIPART_MAX_PARTS, description="分片号"),
+                      content_length: Optional[int] = Header(None),
+                      content_sha256: Optional[str] = Header(None, alias="X-Content-SHA256"),
+                      user=Depends(get_current_user)):
+    """
+    上传分片接口：分片先写入临时文件再原子替换，中断的分片不会覆盖已上传的内容
+    """
+    if content_length is not None and content_length > settings.DOC_MULTIPART_MAX_PART_SIZE:
+        raise too_large(settings.DOC_MULTIPART_MAX_PART_SIZE)
+    upload = await multipart_upload.get(upload_id, int(user["sub"]))
+    await multipart_upload.ensure_unlocked(upload_id)
+    # 整个上传的额度在上传分片时就扣减，而不是等到 complete 才发现超出
+    max_bytes = await multipart_upload.part_budget(upload, part_number)
+    if content_length is not None and content_length > max_bytes:
+        raise too_large(max_bytes)
+    # 每个请求写入自己的临时文件，校验全部通过后才替换正式分片，校验失败或中断都不会动到已上传的同号分片
+    temp_path = f"{part_path(upload_id, part_number)}.{uuid.uuid4().hex}"
+    async with upload_slot():
+        size, sha256 = await save_stream(request.stream(), temp_path, max_bytes=max_bytes)
+    if size == 0 or (content_sha256 and content_sha256.lower() != sha256):
+        await remove_file(temp_path)
+        message = "分片内容为空" if size == 0 else "分片内容与 X-Content-SHA256 不一致"
+        raise MessageException(message, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    await multipart_upload.commit_part(upload, part_number, temp_path, size, sha256)
+    return BaseResponse.success(data={"part_number": part_number, "size": size, "sha256": sha256})
+
+
+@router.get("/multipart/{upload_id}",
+            response_model=MultipartStatusOutputSchema,
+            status_code=status.HTTP_200_OK,
+            summary="查询分片上传进度",
+            description="返回已上传的分片，断线后只需补传缺少或校验不一致的分片（需登录）",
+            dependencies=[Depends(require_authentication), Depends(login_required)],
+            )
+async def get_multipart(upload_id: str = UPLOAD_ID, user=Depends(get_current_user)):
+    """
+    查询分片上传进度接口
+    """
+    upload = await multipart_upload.get(upload_id, int(user["sub"]))
+    upload["parts"] = await multipart_upload.list_parts(upload_id)
+    return BaseResponse.success(data=upload)
+
+
+@router.post("/multipart/{upload_id}/complete",
+             response_model=DocUploadOutputSchema,
+             status_code=status.HTTP_201_CREATED,
+             summary="完成分片上传",
+             description="按分片号顺序合并分片并校验整个文件的 SHA-256，成功后创建文档记录（需登录）",
+             dependencies=[Depends(require_authentication), Depends(login_required)],
+             )
+async def complete_multipart(data: MultipartCompleteInputSchema = None,
+                             upload_id: str = UPLOAD_ID,
+                             user=Depends(get_current_user)):
+    """
+    完成分片上传接口：合并期间不占用数据库连接，也不再接收分片；
+    校验失败时保留分片，客户端可以对照各分片的 SHA-256 重传后再次完成
+    """
+    user_id = int(user["sub"])
+    upload = await multipart_upload.get(upload_id, user_id)
+    expected_sha256 = (data.sha256 if data and data.sha256 else upload["sha256"] or "").lower()
+    await multipart_upload.lock(upload_id)
+    try:
+        parts = await multipart_upload.list_parts(upload_id)
+        multipart_upload.check_parts(parts, upload["file_size"])
+        path = file_path(upload_id)
+        # 每个分片都按 Redis 中登记的大小与 SHA-256 校验，未声明整体哈希时也不会接受损坏或被替换的分片
+        file_size, file_hash = await assemble_files(
+            [(part_path(upload_id, part["part_number"]), part["size"], part["sha256"]) for part in parts], path)
+        try:
+            if expected_sha256 and expected_sha256 != file_hash:
+                raise MessageException("合并后的文件与 SHA-256 不一致", status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            async with session_scope() as db:
+                if not await doc_service.check_project_access(db, upload["project_id"], user_id, user["is_superuser"]):
+                    raise MessageException("项目不存在或无权上传", status_code=status.HTTP_403_FORBIDDEN)
+                doc = await doc_service.create_doc(db, upload["file_name"], upload_id, file_size, file_hash,
+                                                   upload["project_id"], user_id)
+                result = DocUploadData.model_validate(doc).model_dump()
+        except Exception:
+            await remove_file(path)
+            raise
+    except Exception:
+        await multipart_upload.unlock(upload_id)
+        raise
+    await multipart_upload.discard(upload_id)
+    return BaseResponse.created(data=result, message="上传成功")
+
+
+@router.delete("/multipart/{upload_id}",
+               response_model=BaseResponseSchema,
+               status_code=status.HTTP_200_OK,
+               summary="放弃分片上传",
+               description="删除已上传的分片（需登录）",
+               dependencies=[Depends(require_authentication), Depends(login_required)],
+               )
+async def abort_multipart(upload_id: str = UPLOAD_ID, user=Depends(get_current_user)):
+    """
+    放弃分片上传接口：正在合并时返回 409；持有合并锁后再删除，期间 complete 与上传分片都会被拒绝
+    """
+    await multipart_upload.get(upload_id, int(user["sub"]))
+    await multipart_upload.lock(upload_id)
+    await multipart_upload.discard(upload_id)
+    return BaseResponse.success(message="已取消上传")
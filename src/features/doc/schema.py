@@ -1,7 +1,7 @@
 from datetime import datetime
 from pydantic import BaseModel, Field, ConfigDict, field_serializer
 from typing import Optional, List
-from src.core.base.schema import BaseListSchema
+from src.core.base.schema import BaseListSchema, BaseSchema
 
 
 class DocListData(BaseModel):
@@ -24,4 +24,65 @@ class DocListData(BaseModel):
 
 
 class DocListOutputSchema(BaseListSchema[DocListData]):
-    pass
\ No newline at end of file
+    pass
+
+
+class DocUploadData(BaseModel):
+    id: int = Field(..., description="文档id")
+    file_name: str = Field(..., description="文件名称")
+    file_uuid: str = Field(..., description="文档唯一标识")
+    file_size: int = Field(..., description="文件大小（字节）")
+    file_hash: str = Field(..., description="文件内容 SHA-256")
+    status: int = Field(..., description="文档状态：0-排队中")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DocUploadOutputSchema(BaseSchema):
+    data: DocUploadData
+
+
+class MultipartInitiateInputSchema(BaseModel):
+    project_id: int = Field(..., description="所属项目id")
+    file_name: str = Field(..., min_length=1, max_length=255, description="文件名称")
+    file_size: Optional[int] = Field(None, gt=0, description="文件大小（字节），完成时校验分片总大小")
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$", description="整个文件的 SHA-256，完成时校验")
+
+
+class MultipartInitiateData(BaseModel):
+    upload_id: str = Field(..., description="上传id")
+    part_size: int = Field(..., description="建议的分片大小（字节），最后一个分片可以更小")
+    max_part_size: int = Field(..., description="单个分片的大小上限（字节）")
+    max_parts: int = Field(..., description="分片数量上限，分片号从 1 开始")
+    expires_in: int = Field(..., description="最后一次上传分片后保留的秒数")
+
+
+class MultipartInitiateOutputSchema(BaseSchema):
+    data: MultipartInitiateData
+
+
+class MultipartPartData(BaseModel):
+    part_number: int = Field(..., description="分片号")
+    size: int = Field(..., description="分片大小（字节）")
+    sha256: str = Field(..., description="分片内容 SHA-256")
+
+
+class MultipartPartOutputSchema(BaseSchema):
+    data: MultipartPartData
+
+
+class MultipartStatusData(BaseModel):
+    upload_id: str = Field(..., description="上传id")
+    project_id: int = Field(..., description="所属项目id")
+    file_name: str = Field(..., description="文件名称")
+    file_size: Optional[int] = Field(None, description="声明的文件大小（字节）")
+    parts: List[MultipartPartData] = Field(..., description="已上传的分片，按分片号排序")
+
+
+class MultipartStatusOutputSchema(BaseSchema):
+    data: MultipartStatusData
+
+
+class MultipartCompleteInputSchema(BaseModel):
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$",
+                                  description="整个文件的 SHA-256，未传时使用发起上传时声明的值")
@@ -1,15 +1,53 @@
-from sqlalchemy import select
-from src.features.doc.models import Doc
+from typing import Iterable, Optional
+from sqlalchemy import exists, or_, select
+from src.features.doc.models import Doc, DocStatus
+from src.features.project.models import Project, project_viewers
+from src.common.utils.fieldsets import loader_options
+from src.core.server.dependencies import DbSession
 
 
 class DocService:
 
     @staticmethod
-    def get_doc_list(q: str):
+    def get_doc_list(q: str, fields: Optional[Iterable[str]] = None):
         query = select(Doc).where(Doc.is_deleted == 0)
         if q:
             query = query.where(Doc.name.ilike(f"%{q}%"))
+        # 未请求的 project_name / owner_name 子查询不会执行
+        query = query.options(*loader_options(Doc, fields))
         return query
 
+    @staticmethod
+    async def check_project_access(db: DbSession, project_id: int, user_id: int, is_superuser: bool = False) -> bool:
+        """
+        项目存在，且用户是管理员、项目所有者或可见人员
+        """
+        query = select(Project.id).where(Project.is_deleted == 0, Project.id == project_id)
+        if not is_superuser:
+            is_viewer = exists().where(
+                project_viewers.c.project_id == Project.id,
+                project_viewers.c.user_id == user_id,
+                project_viewers.c.is_deleted.is_(False),
+            )
+            query = query.where(or_(Project.owner_id == user_id, is_viewer))
+        result = await db.execute(query)
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def create_doc(db: DbSession, file_name: str, file_uuid: str, file_size: int, file_hash: str,
+                         project_id: int, owner_id: int) -> Doc:
+        doc = Doc(
+            file_name=file_name,
+            file_uuid=file_uuid,
+            file_size=file_size,
+            file_hash=file_hash,
+            project_id=project_id,
+            owner_id=owner_id,
+            status=DocStatus.QUEUEING.value,
+        )
+        db.add(doc)
+        await db.flush()  # 获取文档ID
+        return doc
+
 
 doc_service = DocService()
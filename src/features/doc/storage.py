@@ -0,0 +1,202 @@
+"""
+文档文件存储
+
+上传的请求体边接收边写入 DOC_STORAGE_DIR（默认 data/docs）：
+- 网络上收到的数据块大小不一（通常几十 KB），先在内存中攒到 DOC_UPLOAD_CHUNK_SIZE 的整数倍再写一次磁盘，
+  单个上传占用的内存不超过一个块加一个网络包，与文件大小无关
+- 写入与 SHA-256 计算放在同一次线程调用中（两者都会释放 GIL），事件循环只负责收数据；
+  线程数由独立的 CapacityLimiter 限制，大量并发上传不会占满 anyio 默认的线程池
+- 先写入 .part 临时文件，完成后 fsync 并原子重命名，中途失败或超出大小限制时删除临时文件
+- 文件按 file_uuid 前两位分目录存放，避免单个目录下文件过多
+"""
+import hashlib
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+import anyio
+from fastapi import status
+
+from src.core.base.exceptions import MessageException
+from src.core.conf.config import BASE_DIR, settings
+
+DEFAULT_STORAGE_DIR = os.path.join(BASE_DIR.parent.parent, "data", "docs")
+
+_io_limiter: Optional[anyio.CapacityLimiter] = None
+_active_uploads = 0
+
+
+def storage_dir() -> str:
+    return settings.DOC_STORAGE_DIR or DEFAULT_STORAGE_DIR
+
+
+def file_path(file_uuid: str) -> str:
+    return os.path.join(storage_dir(), file_uuid[:2], file_uuid)
+
+
+def io_limiter() -> anyio.CapacityLimiter:
+    # CapacityLimiter 需要在事件循环中创建
+    global _io_limiter
+    if _io_limiter is None:
+        _io_limiter = anyio.CapacityLimiter(settings.DOC_UPLOAD_IO_THREADS)
+    return _io_limiter
+
+
+@asynccontextmanager
+async def upload_slot():
+    """占用一个上传名额，超过 DOC_UPLOAD_MAX_CONCURRENT 时直接返回 503，而不是排队占用内存和连接"""
+    global _active_uploads
+    if _active_uploads >= settings.DOC_UPLOAD_MAX_CONCURRENT:
+        raise MessageException("上传任务过多，请稍后重试", status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    _active_uploads += 1
+    try:
+        yield
+    finally:
+        _active_uploads -= 1
+
+
+def too_large(max_bytes: int) -> MessageException:
+    return MessageException(f"文件大小不能超过 {max_bytes} 字节",
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+
+class ChunkWriter:
+    """把任意大小的数据块攒成固定大小后写入临时文件，同时计算 SHA-256"""
+
+    def __init__(self, path: str, chunk_size: int, max_bytes: int):
+        self.path = path
+        self.temp_path = f"{path}.part"
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self._pending = []
+        self._pending_size = 0
+        self._file = None
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.temp_path, "wb")
+
+    def _write(self, data) -> None:
+        self.hasher.update(data)
+        self._file.write(data)
+
+    def _finish(self, data) -> None:
+        if data:
+            self._write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.temp_path, self.path)
+
+    def _discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+    async def _run(self, func, *args) -> None:
+        await anyio.to_thread.run_sync(func, *args, limiter=io_limiter())
+
+    async def write(self, data: bytes) -> None:
+        if not data:
+            return
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise too_large(self.max_bytes)
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._pending_size < self.chunk_size:
+            return
+
+        buffered = b"".join(self._pending)
+        cut = len(buffered) - len(buffered) % self.chunk_size
+        self._pending = [buffered[cut:]] if cut < len(buffered) else []
+        self._pending_size = len(buffered) - cut
+        if self._file is None:
+            await self._run(self._open)
+        await self._run(self._write, memoryview(buffered)[:cut])
+
+    async def close(self) -> Tuple[int, str]:
+        """写入剩余数据并重命名为正式文件，返回 (大小, SHA-256)"""
+        if self._file is None:
+            await self._run(self._open)
+        await self._run(self._finish, b"".join(self._pending))
+        self._pending = []
+        return self.size, self.hasher.hexdigest()
+
+    async def abort(self) -> None:
+        await self._run(self._discard)
+
+
+async def save_stream(stream, path: str, max_bytes: Optional[int] = None,
+                      chunk_size: Optional[int] = None) -> Tuple[int, str]:
+    """把异步字节流写入 path，返回 (大小, SHA-256)；超过 max_bytes 抛出 413，任何异常都会删除临时文件"""
+    writer = ChunkWriter(path, chunk_size or settings.DOC_UPLOAD_CHUNK_SIZE, max_bytes or settings.DOC_UPLOAD_MAX_BYTES)
+    try:
+        async for data in stream:
+            await writer.write(data)
+        return await writer.close()
+    except BaseException:
+        # 包括客户端断开（ClientDisconnect）与请求被取消
+        with anyio.CancelScope(shield=True):
+            await writer.abort()
+        raise
+
+
+def _assemble(parts: List[Tuple[str, int, str]], path: str, chunk_size: int) -> Tuple[int, str]:
+    temp_path = f"{path}.part"
+    hasher = hashlib.sha256()
+    size = 0
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with open(temp_path, "wb") as out:
+            for index, (part_path, part_size, part_sha256) in enumerate(parts, start=1):
+                part_hasher = hashlib.sha256()
+                written = 0
+                try:
+                    with open(part_path, "rb") as f:
+                        while data := f.read(chunk_size):
+                            hasher.update(data)
+                            part_hasher.update(data)
+                            out.write(data)
+                            written += len(data)
+                except FileNotFoundError:
+                    # 分片文件丢失与内容不一致一样处理，客户端重传该分片即可
+                    written = -1
+                if written != part_size or part_hasher.hexdigest() != part_sha256:
+                    raise MessageException(f"第 {index} 个分片与登记的大小或 SHA-256 不一致，请重新上传该分片",
+                                           status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                size += written
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return size, hasher.hexdigest()
+
+
+async def assemble_files(parts: List[Tuple[str, int, str]], path: str,
+                         chunk_size: int = 1024 * 1024) -> Tuple[int, str]:
+    """
+    按顺序拼接分片文件并计算整体 SHA-256，返回 (大小, SHA-256)，整个过程在一个线程中完成；
+    parts 为 (分片路径, 登记的大小, 登记的 SHA-256)，任一分片缺失或与登记的不一致时抛出 422 且不留下文件
+    """
+    return await anyio.to_thread.run_sync(_assemble, parts, path, chunk_size, limiter=io_limiter())
+
+
+async def remove_file(path: str) -> None:
+    def _remove():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    await anyio.to_thread.run_sync(_remove, limiter=io_limiter())
@@ -0,0 +1,192 @@
+import asyncio
+import threading
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from src.common.utils import memory_profile
+from src.common.utils.metrics import render_metrics
+from src.common.utils.profiler import SamplingProfiler, release_profile_lock, try_acquire_profile_lock
+from src.common.utils.security import require_authentication, admin_required
+from src.core.base.exceptions import MessageException
+from src.core.base.response import BaseResponse
+from src.core.conf.config import settings
+from src.core.server.lifecycle import lifecycle
+
+router = APIRouter()
+# 诊断接口，仅管理员可用
+debug_router = APIRouter()
+# 存活与就绪探针，始终注册
+health_router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics",
+            response_class=PlainTextResponse,
+            summary="Prometheus 指标",
+            include_in_schema=False,
+            )
+async def metrics():
+    """
+    Prometheus 抓取接口（多 worker 时合并 METRICS_MULTIPROC_DIR 下的所有快照）
+    """
+    return PlainTextResponse(render_metrics(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+
+@health_router.get("/healthz", summary="存活探针", include_in_schema=False)
+async def healthz():
+    """
+    进程能处理请求即返回 200，不检查依赖
+    """
+    return JSONResponse({"status": "ok"})
+
+
+@health_router.get("/readyz", summary="就绪探针", include_in_schema=False)
+async def readyz():
+    """
+    连接预热完成且未在下线时返回 200，否则返回 503，负载均衡据此决定是否转发流量
+    """
+    status_code = status.HTTP_200_OK if lifecycle.accepting() else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(lifecycle.status(), status_code=status_code)
+
+
+@debug_router.post("/profile",
+                   status_code=status.HTTP_200_OK,
+                   summary="采样分析当前 worker",
+                   description="对处理本请求的 worker 进行限时采样分析，返回 collapsed 栈或 pstats 文件（需管理员权限）",
+                   dependencies=[Depends(require_authentication), Depends(admin_required)],
+                   )
+async def profile(duration: float = Query(10, gt=0, description="采样时长（秒）"),
+                  interval: float = Query(0.01, description="采样间隔（秒）"),
+                  mode: str = Query("wall", pattern="^(wall|cpu)$", description="wall：墙钟时间；cpu：CPU 时间"),
+                  output: str = Query("collapsed", pattern="^(collapsed|pstats)$", description="输出格式")):
+    """
+    采样分析接口
+    """
+    if duration > settings.PROFILER_MAX_DURATION:
+        raise MessageException(f"采样时长不能超过 {settings.PROFILER_MAX_DURATION} 秒",
+                               status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if not try_acquire_profile_lock():
+        raise MessageException("已有采样分析正在运行", status_code=status.HTTP_409_CONFLICT)
+    try:
+        # 本接口运行在事件循环线程上，采样线程读取的就是这个线程
+        profiler = SamplingProfiler(
+            threading.get_ident(),
+            loop=asyncio.get_running_loop(),
+            interval=max(interval, settings.PROFILER_MIN_INTERVAL),
+            mode=mode,
+            max_overhead=settings.PROFILER_MAX_OVERHEAD,
+        )
+        try:
+            await anyio.to_thread.run_sync(profiler.run, duration)
+        except RuntimeError as e:
+            raise MessageException(str(e), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    finally:
+        release_profile_lock()
+
+    headers = {f"X-Profile-{key.capitalize()}": str(value) for key, value in profiler.summary().items()}
+    if output == "pstats":
+        headers["Content-Disposition"] = f'attachment; filename="profile-{mode}.prof"'
+        return Response(profiler.pstats(), media_type="application/octet-stream", headers=headers)
+    return PlainTextResponse(profiler.collapsed(), headers=headers)
+
+
+@debug_router.post("/memory/start",
+                   summary="启动 tracemalloc",
+                   dependencies=[Depends(require_authentication), Depends(admin_required)],
+                   )
+async def memory_start(frames: int = Query(25, ge=1, le=100, description="每次分配记录的栈深度")):
+    """
+    启动内存追踪（有明显的 CPU 与内存开销，排查结束后请停止）
+    """
+    memory_profile.start(frames)
+    return BaseResponse.success(data=memory_profile.status())
+
+
+@debug_router.post("/memory/stop",
+                   summary="停止 tracemalloc",
+                   dependencies=[Depends(require_authentication), Depends(admin_required)],
+                   )
+async def memory_stop():
+    """
+    停止内存追踪并清空快照
+    """
+    memory_profile.stop()
+    return BaseResponse.success(data=memory_profile.status())
+
+
+@debug_router.get("/memory/status",
+                  summary="内存追踪状态",
+                  dependencies=[Depends(require_authentication), Depends(admin_required)],
+                  )
+async def memory_status():
+    """
+    当前追踪状态、已追踪内存与已有快照
+    """
+    return BaseResponse.success(data=memory_profile.status())
+
+
+@debug_router.post("/memory/snapshot",
+                   summary="拍摄内存快照",
+                   dependencies=[Depends(require_authentication), Depends(admin_required)],
+                   )
+async def memory_snapshot(name: Optional[str] = Query(None, max_length=64, description="快照名称，默认按时间命名")):
+    """
+    拍摄快照（最多保留最近 5 个）
+    """
+    try:
+        name = await anyio.to_thread.run_sync(memory_profile.take_snapshot, name)
+    except RuntimeError as e:
+        raise MessageException(str(e), status_code=status.HTTP_409_CONFLICT)
+    return BaseResponse.success(data={"name": name})
+
+
+@debug_router.get("/memory/top",
+                  summary="分配最多的代码位置",
+                  dependencies=[Depends(require_authentication), Depends(admin_required)],
+                  )
+async def memory_top(snapshot: str = Query(..., description="快照名称"),
+                     key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+                     limit: int = Query(20, ge=1, le=200),
+                     include: Optional[str] = Query(None, description="文件名通配符，如 */src/*")):
+    """
+    查看快照中分配最多的代码位置
+    """
+    try:
+        data = await anyio.to_thread.run_sync(memory_profile.top, snapshot, key_type, limit, include)
+    except KeyError as e:
+        raise MessageException(e.args[0], status_code=status.HTTP_404_NOT_FOUND)
+    return BaseResponse.success(data=data)
+
+
+@debug_router.get("/memory/diff",
+                  summary="对比两个内存快照",
+                  dependencies=[Depends(require_authentication), Depends(admin_required)],
+                  )
+async def memory_diff(base: str = Query(..., description="基准快照"),
+                      target: str = Query(..., description="对比快照"),
+                      key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+                      limit: int = Query(20, ge=1, le=200),
+                      include: Optional[str] = Query(None, description="文件名通配符，如 */src/*")):
+    """
+    target 相对 base 增长最多的分配位置
+    """
+    try:
+        data = await anyio.to_thread.run_sync(memory_profile.diff, base, target, key_type, limit, include)
+    except KeyError as e:
+        raise MessageException(e.args[0], status_code=status.HTTP_404_NOT_FOUND)
+    return BaseResponse.success(data=data)
+
+
+@debug_router.get("/memory/routes",
+                  summary="各路由峰值内存分配",
+                  dependencies=[Depends(require_authentication), Depends(admin_required)],
+                  )
+async def memory_routes():
+    """
+    tracemalloc 运行期间抽样得到的各路由峰值分配（字节）
+    """
+    return BaseResponse.success(data=memory_profile.route_peaks())
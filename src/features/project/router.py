@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, status
 from src.common.utils.pagination import paginate
+from src.common.utils.fieldsets import parse_fields, to_schema_list
+from src.common.utils.conditional import conditional_get, with_etag
+from src.common.utils.response_cache import response_cache, RouteCache
 from src.core.base.response import BaseResponse
 from src.core.base.exceptions import MessageException
 from src.core.base.schema import BaseRequestSchema, BaseResponseSchema
@@ -25,25 +28,30 @@ router = APIRouter()
             )
 async def list_viewers(db: DbSession,
                        user=Depends(get_current_user),
-                       params: BaseRequestSchema = Depends()):
+                       params: BaseRequestSchema = Depends(),
+                       cache: RouteCache = Depends(response_cache(ttl=30, tags=("user",), scoped=True))):
     """
     获取项目列表接口
     """
+    cached = await cache.get()
+    if cached:
+        return cached
     logger.info(f"user_id:{user['sub']}")
     is_superuser = user["is_superuser"]
+    fields = parse_fields(params.fields, ViewerUserItemData)
     if is_superuser:
-        query = user_service.get_user_list(q=params.q)  # 管理员的可见用户是所有人
+        query = user_service.get_user_list(q=params.q, fields=fields)  # 管理员的可见用户是所有人
     else:
-        # 注意：需要将user["id"]转换为整数
-        query = user_service.get_user_list(user_id=int(user["sub"]), q=params.q)  # 非管理员的可见用户只有自己
+        # 非管理员的可见用户只有自己。注意：需要将user["id"]转换为整数
+        query = user_service.get_user_list(user_id=int(user["sub"]), q=params.q, fields=fields)
 
     # 使用分页函数处理查询
     data = await paginate(db, query, params.page_num, params.page_size)
 
     # 将查询结果转换为ViewerUserItemData列表
-    data["list"] = [ViewerUserItemData.model_validate(item) for item in data["list"]]
+    data["list"] = to_schema_list(ViewerUserItemData, data["list"], fields)
 
-    return BaseResponse.success(data=data)
+    return await cache.set(BaseResponse.success(data=data))
 
 
 @router.put("/update/viewers/{project_id}",
@@ -103,11 +111,19 @@ async def create_project(db: DbSession,
             # require_authentication和admin_required都不需要拿到注入依赖的返回值，因此可以放到路由装饰器中
             dependencies=[Depends(require_authentication), Depends(login_required)],
             )
-async def list_projects(db: DbSession, params: BaseRequestSchema = Depends()):
+async def list_projects(db: DbSession,
+                        params: BaseRequestSchema = Depends(),
+                        etag=Depends(conditional_get("project", "project_viewers", "user", "doc")),
+                        cache: RouteCache = Depends(response_cache(ttl=30, tags=("project", "project_viewers",
+                                                                                  "user", "doc")))):
     """
     获取项目列表接口
     """
-    query = project_service.get_project_list(params.q)
+    cached = await cache.get()
+    if cached:
+        return with_etag(cached, etag)
+    fields = parse_fields(params.fields, ProjectListData)
+    query = project_service.get_project_list(params.q, fields)
     data = await paginate(db, query, params.page_num, params.page_size)
-    data["list"] = [ProjectListData.model_validate(item) for item in data["list"]]
-    return BaseResponse.success(data=data)
+    data["list"] = to_schema_list(ProjectListData, data["list"], fields)
+    return with_etag(await cache.set(BaseResponse.success(data=data)), etag)
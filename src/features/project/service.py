@@ -1,4 +1,4 @@
-from typing import Set
+from typing import Iterable, Optional, Set
 from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
 from datetime import datetime, timezone
@@ -6,17 +6,26 @@ from src.features.project.models import Project, project_viewers
 from src.features.user.models import User
 from src.core.server.dependencies import DbSession
 from src.features.project.schema import CreateProjectInputSchema
+from src.common.utils.change_version import change_version
+from src.common.utils.memo import memoize
+from src.common.utils.fieldsets import loader_options
 
 
 class ProjectService:
 
     @staticmethod
-    def get_project_list(q: str):
+    def get_project_list(q: str, fields: Optional[Iterable[str]] = None):
+        """
+        :param q: 按项目名称模糊搜索
+        :param fields: 需要返回的字段，None 表示全部；未请求的列、document_count 子查询和 viewers 都不会加载
+        """
         query = select(Project).where(Project.is_deleted == 0)
         if q:
             query = query.where(Project.name.ilike(f"%{q}%"))
-        # 使用selectinload预加载viewers关系，避免在异步环境中访问关系时出现MissingGreenlet错误
-        query = query.options(selectinload(Project.viewers))
+        if fields is None or "viewers" in fields:
+            # 使用selectinload预加载viewers关系，避免在异步环境中访问关系时出现MissingGreenlet错误
+            query = query.options(selectinload(Project.viewers))
+        query = query.options(*loader_options(Project, fields))
         return query
 
     @staticmethod
@@ -50,6 +59,9 @@ class ProjectService:
         return project
 
     @staticmethod
+    @memoize("project_owner", ttl=60,
+             key=lambda db, project_id, user_id: f"{project_id}:{user_id}",
+             tags=lambda db, project_id, user_id: [f"project:{project_id}"])
     async def check_project_owner(db: DbSession, project_id: int, user_id: int) -> bool:
         """
         检查指定用户是否为指定项目的所有者
@@ -63,7 +75,7 @@ class ProjectService:
         return result.scalar_one_or_none() is not None
 
     @staticmethod
-    async def update_project_viewers(db: DbSession, project_id: int, viewer_ids: list[int]) -> Project:
+    async def update_project_viewers(db: DbSession, project_id: int, viewer_ids: list[int]) -> bool:
         # 1. 首先查出当前项目有哪些可见用户
         query = select(project_viewers.c.user_id).where(
             (project_viewers.c.project_id == project_id) &
@@ -76,6 +88,9 @@ class ProjectService:
         to_add = new_ids - current_ids  # 需要新增或恢复的
         to_remove = current_ids - new_ids  # 需要软删除的
 
+        # 可见人员变化只影响该项目，表级标签由写语句自动登记
+        change_version.mark(db, f"project:{project_id}")
+
         # ====================== 执行新增 / 恢复 ======================
         # 2. 软删除：从有到无
         if to_remove:
@@ -138,6 +153,7 @@ class ProjectService:
                         for uid in to_insert
                     ]
                 )
+        return True
 
 
 project_service = ProjectService()
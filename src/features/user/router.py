@@ -4,6 +4,9 @@ from src.core.server.dependencies import DbSession
 from src.core.base.schema import BaseRequestSchema, BaseResponseSchema
 from src.core.base.response import BaseResponse
 from src.common.utils.pagination import paginate
+from src.common.utils.fieldsets import parse_fields, to_schema_list
+from src.common.utils.conditional import conditional_get, with_etag
+from src.common.utils.response_cache import response_cache, RouteCache
 from src.common.utils.logger import logger
 from src.common.utils.security import require_authentication, admin_required
 from src.features.user.service import user_service
@@ -20,13 +23,19 @@ router = APIRouter()
             # require_authentication和admin_required都不需要拿到注入依赖的返回值，因此可以放到路由装饰器中
             dependencies=[Depends(require_authentication), Depends(admin_required)],
             )
-async def user_list(db: DbSession, params: BaseRequestSchema = Depends()):
+async def user_list(db: DbSession,
+                    params: BaseRequestSchema = Depends(),
+                    cache: RouteCache = Depends(response_cache(ttl=60, tags=("user", "user_roles")))):
+    cached = await cache.get()
+    if cached:
+        return cached
     # 注意: 这里由于只是构建查询语句, 并没有执行查询, 因此不需要await
-    query = user_service.get_user_list(params.q)
+    fields = parse_fields(params.fields, UserListData)
+    query = user_service.get_user_list(params.q, fields=fields)
     data = await paginate(db, query, params.page_num, params.page_size)
     # 将数据库对象转为普通python格式
-    data["list"] = [UserListData.model_validate(item) for item in data["list"]]
-    return BaseResponse.success(data=data)
+    data["list"] = to_schema_list(UserListData, data["list"], fields)
+    return await cache.set(BaseResponse.success(data=data))
 
 
 @router.delete("/delete",
@@ -77,8 +86,14 @@ async def update_user(db: DbSession, params: UpdateUserSchema = Depends()):
     description="获取指定用户的信息（仅管理员可操作）",
     dependencies=[Depends(require_authentication), Depends(admin_required)],
 )
-async def user_detail(db: DbSession, id: int = Path(..., ge=1)):
+async def user_detail(db: DbSession,
+                      id: int = Path(..., ge=1),
+                      etag=Depends(conditional_get("user:{id}", "user_roles")),
+                      cache: RouteCache = Depends(response_cache(ttl=60, tags=("user:{id}", "user_roles")))):
+    cached = await cache.get()
+    if cached:
+        return with_etag(cached, etag)
     item = await user_service.get_user_by_id(db, id)
     if not item:
         return BaseResponse.not_found("用户不存在")
-    return BaseResponse.success(data=UserDetailData.from_orm(item))
+    return with_etag(await cache.set(BaseResponse.success(data=UserDetailData.from_orm(item))), etag)
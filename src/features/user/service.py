@@ -1,8 +1,11 @@
-from typing import Tuple
+from typing import Iterable, Optional, Tuple
 from sqlalchemy import select, update
 from src.features.user.models import User
 from src.core.server.dependencies import DbSession
 from src.features.user.schema import UpdateUserSchema
+from src.common.utils.change_version import change_version
+from src.common.utils.memo import memoize, orm_codec
+from src.common.utils.fieldsets import loader_options
 
 
 class UserService:
@@ -11,6 +14,7 @@ class UserService:
     def get_user_list(q: str = None,
                       user_id: int = None,
                       username: str = None,
+                      fields: Optional[Iterable[str]] = None,
                       ):
         query = select(User).where(User.is_deleted == 0)
         if q:
@@ -19,6 +23,7 @@ class UserService:
             query = query.where(User.id == user_id)
         if username:
             query = query.where(User.username == username)
+        query = query.options(*loader_options(User, fields))
         return query
 
     @staticmethod
@@ -31,6 +36,7 @@ class UserService:
             return False
         delete_stmt = update(User).where(User.id == user_id).values(is_deleted=1)
         await db.execute(delete_stmt)
+        change_version.mark(db, f"user:{user_id}")
         return True
 
     @staticmethod
@@ -70,10 +76,15 @@ class UserService:
         # 4. 执行更新操作
         update_stmt = (update(User).where(User.id == user_data.id).values(**update_data))
         await db.execute(update_stmt)
+        change_version.mark(db, f"user:{user_data.id}")
 
         return True, ""
 
     @staticmethod
+    @memoize("user_by_id", ttl=60,
+             key=lambda db, user_id: user_id,
+             tags=lambda db, user_id: [f"user:{user_id}"],
+             **orm_codec(User))
     async def get_user_by_id(db: DbSession, user_id: int):
         query = select(User).where(User.is_deleted == 0, User.id == user_id)
         result = await db.execute(query)
@@ -1,37 +1,45 @@
+import asyncio
+import time
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from sqlalchemy import select, func
 
 from src.common.utils.logger import logger
 from src.core.conf.config import settings
-from src.core.server.database import AsyncSessionLocal
+from src.core.server.database import engine
+from src.core.server.dependencies import close_redis, get_redis
+from src.core.server.lifecycle import lifecycle, warm_up
 from src.features.auth.router import router as auth_router
 from src.features.user.router import router as user_router
 from src.features.project.router import router as project_router
 from src.features.doc.router import router as doc_router
+from src.features.doc.multipart import collect_orphans_periodically
+from src.features.monitor.router import router as monitor_router, debug_router, health_router
 from src.core.base.exceptions import register_exception_handlers
-from src.common.scripts.initial_data import init_database
-from src.features.user.models import Role
+from src.core.base.openapi import install_prebuilt_openapi
+from src.core.middleware.compression import CompressionMiddleware
+from src.core.middleware.metrics import MetricsMiddleware
+from src.core.middleware.query_stats import QueryStatsMiddleware
+from src.core.middleware.request_id import RequestIdMiddleware
+from src.core.middleware.tracing import TracingMiddleware
+from src.core.middleware.memory_profile import MemoryProfileMiddleware
+from src.core.middleware.traffic_capture import TrafficCaptureMiddleware
+from src.core.middleware.lifecycle import LifecycleMiddleware
+from src.common.utils.metrics import write_snapshot
+from src.common.utils.tracing import exporter as trace_exporter
+from src.common.utils.loop_monitor import LoopMonitor
+from src.common.scripts.initial_data import ensure_initialized
 
 
 async def check_and_init_database():
-    """检查并初始化数据库"""
+    """检查并初始化数据库（多 worker 并发安全，已初始化时只需一次查询，见 initial_data.py）"""
     try:
-        logger.info("检查数据库初始化状态...")
-
-        # 创建独立的数据库会话
-        async with AsyncSessionLocal() as db:
-            # 检查是否已初始化（检查角色表是否有数据）
-            result = await db.execute(select(func.count(Role.id)))
-            role_count = result.scalar()
-
-            if role_count == 0:
-                logger.info("检测到空数据库，开始初始化基础数据...")
-                await init_database(db)
-                logger.info("数据库初始化完成")
-            else:
-                logger.info("数据库已初始化，跳过初始化步骤")
+        started = time.perf_counter()
+        if await ensure_initialized(engine):
+            logger.info(f"数据库初始化完成，耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+        else:
+            logger.info(f"数据库已初始化，跳过初始化步骤（{(time.perf_counter() - started) * 1000:.1f}ms）")
 
     except Exception as e:
         logger.error(f"数据库初始化失败: {e}")
@@ -39,22 +47,76 @@ async def check_and_init_database():
         # 可以考虑记录详细日志或发送告警
 
 
+async def flush_metrics_periodically(multiproc_dir: str, interval: float):
+    """多 worker 模式下定期写出本进程的指标快照"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            write_snapshot(multiproc_dir)
+        except OSError as e:
+            logger.warning(f"写入指标快照失败: {e}")
+
+
+async def warm_up_connections():
+    """预热数据库与 Redis 连接池，完成后标记为就绪（见 lifecycle.py）"""
+    await warm_up(engine, await get_redis(), settings.DB_WARMUP_CONNECTIONS, settings.REDIS_WARMUP_CONNECTIONS,
+                  settings.WARMUP_TIMEOUT)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理（FastAPI 2.2+）"""
     # 启动时
+    lifecycle.reset(ready=False)
     await check_and_init_database()
+    warmup_task = None
+    if settings.WARMUP_BLOCKING:
+        await warm_up_connections()
+    else:
+        # 后台预热，期间 /readyz 返回 503，业务请求由就绪门控拦截
+        warmup_task = asyncio.create_task(warm_up_connections())
+    metrics_task = None
+    loop_monitor = None
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_BLOCK_THRESHOLD_MS / 1000)
+        loop_monitor.start()
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        metrics_task = asyncio.create_task(
+            flush_metrics_periodically(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL))
+    multipart_gc_task = None
+    if settings.DOC_MULTIPART_GC_INTERVAL > 0:
+        multipart_gc_task = asyncio.create_task(collect_orphans_periodically(settings.DOC_MULTIPART_GC_INTERVAL))
     yield
-    # 关闭时（可以在这里清理资源）
+    # 关闭时：uvicorn 已停止接收连接并在 SHUTDOWN_DRAIN_TIMEOUT 内等待进行中的请求完成（见 lifecycle.py），这里只释放资源
     logger.info("应用关闭中...")
+    lifecycle.begin_draining()
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    if multipart_gc_task:
+        multipart_gc_task.cancel()
+    if loop_monitor:
+        await loop_monitor.stop()
+    if metrics_task:
+        metrics_task.cancel()
+        # 退出前写最后一次快照，已退出 worker 的计数仍会被合并
+        write_snapshot(settings.METRICS_MULTIPROC_DIR)
+    if settings.TRACING_ENABLED:
+        trace_exporter.flush()
+    # 释放连接池，数据库与 Redis 服务端能立即回收连接
+    await engine.dispose()
+    await close_redis()
+    # 恢复初始状态，同一进程内再次启动应用（如测试）不受上一次下线影响
+    lifecycle.reset()
 
 
 def create_app() -> FastAPI:
     logger.info("Application create")
+    docs_options = {} if settings.OPENAPI_ENABLED else dict(openapi_url=None, docs_url=None, redoc_url=None)
     _app = FastAPI(
         debug=settings.DEBUG,
         dependencies=[],
-        lifespan=lifespan  # 添加lifespan参数，用于应用启动时初始化数据库
+        lifespan=lifespan,  # 添加lifespan参数，用于应用启动时初始化数据库
+        **docs_options,
     )
 
     # === CORS ===
@@ -64,25 +126,66 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Request-ID", "Server-Timing"],
+    )
+    # === 响应压缩 ===
+    if settings.COMPRESSION_ENABLED:
+        _app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            level=settings.COMPRESSION_LEVEL,
+            thread_threshold=settings.COMPRESSION_THREAD_THRESHOLD,
+            excluded_types=settings.COMPRESSION_EXCLUDED_TYPES,
+        )
+    # === 请求级 SQL 统计（DEBUG 模式下输出 Server-Timing） ===
+    _app.add_middleware(
+        QueryStatsMiddleware,
+        n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD,
+        server_timing=settings.DEBUG,
     )
+    # === 路由峰值内存抽样（tracemalloc 通过管理接口启动后才生效） ===
+    if settings.PROFILER_ENABLED:
+        _app.add_middleware(MemoryProfileMiddleware, sample_rate=settings.MEMORY_ROUTE_SAMPLE_RATE)
+    # === 请求指标（靠外层添加，耗时包含其它中间件） ===
+    if settings.METRICS_ENABLED:
+        _app.add_middleware(MetricsMiddleware)
+    # === 链路追踪（头部采样） ===
+    if settings.TRACING_ENABLED:
+        _app.add_middleware(TracingMiddleware, sample_rate=settings.TRACING_SAMPLE_RATE,
+                           trust_parent=settings.TRACING_TRUST_PARENT)
+    # === 流量采集（脱敏后写入 JSONL，供 benchmarks/replay.py 回放） ===
+    if settings.TRAFFIC_CAPTURE_ENABLED:
+        _app.add_middleware(
+            TrafficCaptureMiddleware,
+            sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+            max_body=settings.TRAFFIC_CAPTURE_MAX_BODY,
+            capture_body=settings.TRAFFIC_CAPTURE_BODIES,
+        )
+    # === 就绪门控与进行中请求计数（预热完成前、下线期间返回 503） ===
+    _app.add_middleware(LifecycleMiddleware, gate_until_ready=settings.READINESS_GATE_ENABLED)
+    # === 请求追踪ID（位于最外层，所有中间件和路由的日志都能取到） ===
+    _app.add_middleware(RequestIdMiddleware)
     # 路由注册
     _app.include_router(auth_router, prefix="/api/v1/auth", tags=["认证"])
     _app.include_router(user_router, prefix="/api/v1/user", tags=["用户"])
     _app.include_router(project_router, prefix="/api/v1/project", tags=["项目"])
     _app.include_router(doc_router, prefix="/api/v1/doc", tags=["文件"])
+    _app.include_router(health_router, tags=["监控"])
+    if settings.METRICS_ENABLED:
+        _app.include_router(monitor_router, tags=["监控"])
+    if settings.PROFILER_ENABLED:
+        _app.include_router(debug_router, prefix="/api/v1/monitor", tags=["监控"])
     register_exception_handlers(_app)
+    # 接口文档优先使用构建时预生成的文件，见 src/core/base/openapi.py
+    if settings.OPENAPI_ENABLED:
+        install_prebuilt_openapi(_app, settings.OPENAPI_SCHEMA_PATH)
     return _app
 
 
 app = create_app()
 
 if __name__ == "__main__":
-    import uvicorn
-
-    uvicorn.run(
-        "src.main:app",  # 注意这里是字符串，不能写 app
-        host="0.0.0.0",
-        port=settings.PORT,
-        reload=not settings.DEBUG,  # 开发时开
-        log_level=settings.LOG_LEVEL,
-    )
+    from src.core.server.launcher import run
+
+    # 本地直接运行：DEBUG 时单进程自动重载，否则与生产相同的多 worker 启动方式
+    run(reload=settings.DEBUG)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_bulk_seed.py
+
+测试批量造数：
+1. 同样的种子与主键区间生成同样的数据，分布符合数据集规格
+2. 写入 SQLite 后行数、外键范围正确，导入前删除的索引会被重建，各表摘要与并行度无关
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import src.main  # noqa: F401  注册全部模型
+from src.common.scripts.bulk_seed import COLUMNS, BulkLoader, _init_worker, build_chunk, run_phase
+from src.common.scripts.dataset_profiles import DatasetProfile, get_profile
+from src.core.server.database import Base
+
+PROFILE = DatasetProfile(name="test", users=20, projects=10, docs=45, viewers_per_project=(0, 3))
+REFS = {"locale": "zh_CN", "user_range": (1, 20), "project_range": (1, 10), "hot_project": 1, "profile": PROFILE}
+
+
+def test_chunks_are_deterministic():
+    first, first_stats = build_chunk("doc", 100, 50, seed=7, refs=REFS)
+    second, second_stats = build_chunk("doc", 100, 50, seed=7, refs=REFS)
+    other, other_stats = build_chunk("doc", 100, 50, seed=8, refs=REFS)
+
+    assert first == second and first_stats == second_stats
+    assert first != other and first_stats != other_stats
+    docs = first["doc"]
+    assert [row[0] for row in docs] == list(range(100, 150))
+    assert all(len(row) == len(COLUMNS["doc"]) for row in docs)
+    assert all(1 <= row[3] <= 20 and 1 <= row[4] <= 10 for row in docs)
+
+
+def test_project_chunk_produces_viewers_within_user_range():
+    tables, stats = build_chunk("project", 1, 10, seed=1, refs=REFS)
+
+    assert len(tables["project"]) == 10
+    assert all(1 <= user_id <= 20 for _, user_id, *_ in tables["project_viewers"])
+    assert stats["project_viewers"][0] == len(tables["project_viewers"])
+
+
+def test_skewed_profile_concentrates_docs_on_hot_project():
+    profile = get_profile("skewed-hot-project")
+    refs = dict(REFS, project_range=(1, 1000), hot_project=1, profile=profile)
+    tables, _ = build_chunk("doc", 1, 2000, seed=profile.seed, refs=refs)
+
+    project_ids = [row[4] for row in tables["doc"]]
+    assert project_ids.count(1) > 0.2 * len(project_ids)
+    # 排队中的文档比例明显高于默认规格的 5%
+    assert sum(row[5] == 0 for row in tables["doc"]) > 0.2 * len(project_ids)
+
+
+@pytest.mark.asyncio
+async def test_bulk_load_into_sqlite(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bulk.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    loader = BulkLoader(engine)
+
+    dropped = await loader.drop_indexes(["user", "doc"])
+    assert {index.name for index in dropped} == {"ix_user_id", "ix_doc_id", "ix_doc_file_name", "ix_doc_file_hash"}
+
+    with ProcessPoolExecutor(1, initializer=_init_worker, initargs=("zh_CN",)) as pool:
+        users, _ = await run_phase(loader, pool, "user", 1, 20, 8, 1, REFS, 1, 1)
+        docs, doc_tables = await run_phase(loader, pool, "doc", 1, 45, 10, 1, REFS, 1, 1)
+    await loader.create_indexes(dropped)
+
+    assert users["count"] == 20 and users["rows"] == 40
+    assert docs["count"] == 45
+    assert doc_tables["doc"]["rows"] == 45 and doc_tables["doc"]["first_id"] == 1
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("SELECT COUNT(*) FROM doc"))).scalar() == 45
+        assert (await conn.execute(text("SELECT COUNT(*) FROM user_roles"))).scalar() == 20
+        names = await conn.run_sync(lambda sync_conn: {index["name"] for index in inspect(sync_conn).get_indexes("doc")})
+    assert {"ix_doc_id", "ix_doc_file_name"} <= names
+    assert await loader.next_id("doc") == 46
+    await engine.dispose()
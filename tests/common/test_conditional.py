@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_conditional.py
+
+测试条件 GET 与变更版本：
+1. If-None-Match 命中时返回 304，且不会执行接口内的查询
+2. 版本号变化后 ETag 随之变化
+3. ORM flush / 写语句会自动登记表标签
+"""
+from unittest.mock import AsyncMock, patch
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from src.common.utils.change_version import ChangeVersion, change_version
+from src.common.utils.conditional import conditional_get, etag_matches, with_etag
+from src.common.utils.security import get_current_user
+from src.core.base.exceptions import register_exception_handlers
+from src.core.base.response import BaseResponse
+from src.core.server.database import Base
+from src.features.user.models import User
+from src.features.doc.models import Doc  # noqa: F401  保证关系映射可解析
+
+app = FastAPI()
+register_exception_handlers(app)
+app.dependency_overrides[get_current_user] = lambda: {"sub": "1", "is_superuser": True}
+calls = {"count": 0}
+
+
+@app.get("/items/{id}")
+async def item_detail(id: int, etag=Depends(conditional_get("item:{id}", "item_tag"))):
+    calls["count"] += 1
+    return with_etag(BaseResponse.success(data={"id": id}), etag)
+
+
+client = TestClient(app)
+
+
+def test_etag_matches_weak_comparison():
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('W/"x", W/"abc"', 'W/"abc"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+
+
+def test_not_modified_skips_handler():
+    calls["count"] = 0
+    with patch.object(change_version, "get_many", AsyncMock(return_value=["1", "1"])) as get_many:
+        first = client.get("/items/3")
+        etag = first.headers["etag"]
+        second = client.get("/items/3", headers={"If-None-Match": etag})
+
+    get_many.assert_awaited_with(["item:3", "item_tag"])
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.content == b""
+    assert calls["count"] == 1
+
+
+def test_etag_changes_with_version():
+    with patch.object(change_version, "get_many", AsyncMock(return_value=["1", "1"])):
+        old = client.get("/items/3").headers["etag"]
+    with patch.object(change_version, "get_many", AsyncMock(return_value=["2", "1"])):
+        response = client.get("/items/3", headers={"If-None-Match": old})
+    assert response.status_code == 200
+    assert response.headers["etag"] != old
+
+
+def test_session_collects_changed_tags():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(username="tester", email="t@example.com", hashed_password="x"))
+        session.flush()
+        session.execute(update(User).where(User.username == "tester").values(nickname="n"))
+        tags = session.info[ChangeVersion.SESSION_KEY]
+        assert {"user", "user:1"} <= tags
+        session.rollback()
+        assert ChangeVersion.SESSION_KEY not in session.info
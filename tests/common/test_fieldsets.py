@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_fieldsets.py
+
+测试稀疏字段集：
+1. 未请求的列、column_property 子查询、viewers 预加载都不会出现在 SQL 中
+2. 收窄后的响应只输出请求的字段
+3. 不支持的字段返回 422
+4. 项目可见用户列表同样按 fields 收窄查询与响应
+"""
+import pytest
+
+from src.common.utils.fieldsets import parse_fields, to_schema_list
+from src.core.base.exceptions import MessageException
+from src.features.doc.models import Doc  # noqa: F401  保证关系映射可解析
+from src.features.project.models import Project
+from src.features.project.schema import ProjectListData
+from src.features.project.service import project_service
+from src.features.user.models import User
+from src.features.user.schema import ViewerUserItemData
+from src.features.user.service import user_service
+
+
+def test_parse_fields():
+    assert parse_fields(None, ProjectListData) is None
+    assert parse_fields("id, name", ProjectListData) == {"id", "name"}
+    with pytest.raises(MessageException) as exc_info:
+        parse_fields("id,password", ProjectListData)
+    assert exc_info.value.status_code == 422
+
+
+def test_query_prunes_columns_and_subqueries():
+    sql = str(project_service.get_project_list(None, {"id", "name"}))
+    assert "project.name" in sql
+    assert "project.owner_id" not in sql
+    assert "FROM doc" not in sql
+
+    full_sql = str(project_service.get_project_list(None))
+    assert "FROM doc" in full_sql
+
+
+def test_viewers_loaded_only_when_requested():
+    def has_viewers_loader(query):
+        return any(getattr(option, "path", None) and "viewers" in str(option.path)
+                   for option in query._with_options)
+
+    assert not has_viewers_loader(project_service.get_project_list(None, {"id", "name"}))
+    assert has_viewers_loader(project_service.get_project_list(None, {"id", "viewers"}))
+
+
+def test_narrowed_output_only_contains_requested_fields():
+    project = Project(id=1, name="项目")
+    project.viewers = [User(id=2, username="viewer", nickname=None)]
+    items = to_schema_list(ProjectListData, [project], {"id", "viewers"})
+    assert items[0].model_dump() == {"id": 1, "viewers": [{"id": 2, "username": "viewer", "nickname": None}]}
+
+
+def test_viewer_list_honours_fields():
+    fields = parse_fields("id", ViewerUserItemData)
+    sql = str(user_service.get_user_list(user_id=1, fields=fields))
+    assert "SELECT \"user\".id \n" in sql and "username" not in sql
+    user = User(id=2, username="viewer", nickname=None)
+    assert to_schema_list(ViewerUserItemData, [user], fields)[0].model_dump() == {"id": 2}
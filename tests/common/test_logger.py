@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_logger.py
+
+测试日志管道：
+1. 日志由后台线程写出
+2. 队列满时丢弃并计数，不阻塞调用方
+3. 按级别采样与 JSON 格式
+4. 多个进程写同一个轮转文件时只有一个进程轮转，日志不丢失
+"""
+import json
+import logging
+import multiprocessing
+import os
+import queue
+
+from src.common.utils import logger as logger_module
+from src.common.utils.logger import (DroppingQueueHandler, JsonFormatter, SamplingFilter, attach_queue,
+                                     build_file_handler)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(level=logging.INFO, msg="hello %s", args=("world",)):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+def test_records_written_by_listener():
+    test_logger = logging.getLogger("test.logger.pipeline")
+    test_logger.propagate = False
+    target = ListHandler()
+    queue_handler = attach_queue(test_logger, [target], queue_size=10)
+    test_logger.warning("user_id: %s", 1)
+    # stop 会等待队列中的日志写完
+    listener = logger_module._listeners.pop()
+    listener.stop()
+    test_logger.removeHandler(queue_handler)
+    assert [record.getMessage() for record in target.records] == ["user_id: 1"]
+
+
+def test_full_queue_drops_records():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2), "test.dropping")
+    for _ in range(5):
+        handler.handle(make_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_sampling_filter():
+    sampler = SamplingFilter({"INFO": 0.0})
+    assert not sampler.filter(make_record(logging.INFO))
+    assert sampler.filter(make_record(logging.WARNING))
+
+
+def test_json_formatter():
+    data = json.loads(JsonFormatter().format(make_record()))
+    assert data["level"] == "INFO"
+    assert data["message"] == "hello world"
+
+
+def write_lines(directory: str, worker: int, count: int) -> None:
+    handler = build_file_handler("shared.log", "size", max_bytes=4096, backup_count=1000, directory=directory)
+    for i in range(count):
+        handler.emit(make_record(msg="worker-%s line-%s " + "x" * 40, args=(worker, i)))
+    handler.close()
+
+
+def test_processes_share_rotating_file(tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=write_lines, args=(str(tmp_path), worker, 500)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    lines = []
+    files = [name for name in os.listdir(tmp_path) if name.startswith("shared.log") and not name.endswith(".lock")]
+    for name in files:
+        with open(tmp_path / name, encoding="utf-8") as f:
+            lines += f.read().splitlines()
+    assert sorted(lines) == sorted(f"worker-{w} line-{i} " + "x" * 40 for w in range(4) for i in range(500))
+    # 轮转没有重复执行：每个文件都接近 max_bytes，而不是被切成大量碎片
+    assert len(files) <= 2 * 4 * 500 * 60 // 4096 + 2
+
+
+def test_timed_rotation_runs_once_across_handlers(tmp_path):
+    # 两个 handler 相当于两个进程，到达轮转时间后只有先到的一方轮转，另一方只重新打开文件
+    first, second = (build_file_handler("timed.log", "time", 0, 10, directory=str(tmp_path)) for _ in range(2))
+    first.emit(make_record(msg="before", args=()))
+    first.rolloverAt = second.rolloverAt = 0
+    first.emit(make_record(msg="first", args=()))
+    second.emit(make_record(msg="second", args=()))
+    first.close()
+    second.close()
+
+    backups = [name for name in os.listdir(tmp_path) if name.startswith("timed.log.") and not name.endswith(".lock")]
+    assert len(backups) == 1
+    with open(tmp_path / "timed.log", encoding="utf-8") as f:
+        assert f.read().splitlines() == ["first", "second"]
+    assert second.rolloverAt > 0
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_loop_monitor.py
+
+测试事件循环监控：
+1. 阻塞事件循环时记录调用栈（同一次阻塞只记录一次），与延迟采样间隔无关，默认配置下也能发现略超过阈值的阻塞
+2. 调度延迟写入直方图
+"""
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.common.utils import loop_monitor as loop_monitor_module
+from src.common.utils.loop_monitor import LoopMonitor
+from src.common.utils.metrics import EVENT_LOOP_BLOCKED, EVENT_LOOP_LAG
+from src.core.conf.config import settings
+
+
+def blocking_call(seconds: float):
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_reported_with_stack():
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    lag_before = EVENT_LOOP_LAG.labels().get()
+    blocked_before = EVENT_LOOP_BLOCKED.labels().get()
+    with patch.object(loop_monitor_module.logger, "warning") as warning:
+        monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_call(0.3)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    assert EVENT_LOOP_BLOCKED.labels().get() == blocked_before + 1
+    warning.assert_called_once()
+    assert "blocking_call" in warning.call_args.args[0]
+    assert EVENT_LOOP_LAG.labels().get() > lag_before
+
+
+@pytest.mark.asyncio
+async def test_block_shorter_than_interval_is_reported_with_defaults():
+    # 默认配置：采样间隔 0.5s，阈值 0.1s；阻塞在下一次采样前就结束
+    monitor = LoopMonitor(interval=settings.LOOP_MONITOR_INTERVAL, threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000)
+    blocked_before = EVENT_LOOP_BLOCKED.labels().get()
+    with patch.object(loop_monitor_module.logger, "warning") as warning:
+        monitor.start()
+        await asyncio.sleep(0.1)
+        blocking_call(0.35)
+        await asyncio.sleep(0.1)
+        blocking_call(0.05)
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    assert EVENT_LOOP_BLOCKED.labels().get() == blocked_before + 1
+    warning.assert_called_once()
+    assert "blocking_call" in warning.call_args.args[0]
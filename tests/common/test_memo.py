@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_memo.py
+
+测试两级缓存：
+1. 并发未命中只加载一次（单飞）
+2. 进程内 LRU 容量限制
+3. 本地未命中时从 Redis 读取
+4. 标签发布后缓存失效；本地标签索引只包含仍在 LRU 中的键，不随不同的标签无限增长
+5. ORM 对象编解码
+"""
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.common.utils import memo as memo_module
+from src.common.utils.memo import LRUCache, TwoTierCache, _Entry, memoize, orm_codec
+from src.features.user.models import User
+from src.features.doc.models import Doc  # noqa: F401  保证关系映射可解析
+
+
+class DictRedis:
+    """只实现缓存用到的命令"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def smembers(self, key):
+        return self.data.get(key, set())
+
+    def pipeline(self, transaction=False):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.redis_client.data[key] = value
+
+    def sadd(self, key, member):
+        self.redis_client.data.setdefault(key, set()).add(member)
+
+    def expire(self, key, ttl):
+        pass
+
+    async def execute(self):
+        return []
+
+
+@pytest.fixture
+def fake_redis():
+    redis_client = DictRedis()
+    with patch.object(memo_module, "get_redis", AsyncMock(return_value=redis_client)):
+        yield redis_client
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", _Entry(1, float("inf"), 0))
+    lru.set("b", _Entry(2, float("inf"), 0))
+    lru.get("a")
+    lru.set("c", _Entry(3, float("inf"), 0))
+    assert lru.get("b") is None
+    assert lru.get("a").value == 1
+    assert len(lru) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(fake_redis):
+    calls = {"count": 0}
+
+    @memoize("test_single_flight", ttl=60)
+    async def load(user_id):
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return {"id": user_id}
+
+    results = await asyncio.gather(*[load(1) for _ in range(20)])
+    assert calls["count"] == 1
+    assert all(result == {"id": 1} for result in results)
+    assert load.cache.stats["coalesced"] == 19
+
+
+@pytest.mark.asyncio
+async def test_local_miss_reads_redis(fake_redis):
+    cache = TwoTierCache("test_redis_tier", ttl=60, beta=0)
+    loader = AsyncMock(return_value=5)
+    await cache.get_or_load("k", loader)
+    cache.local.clear()
+    assert await cache.get_or_load("k", loader) == 5
+    assert loader.await_count == 1
+    assert cache.stats["redis_hit"] == 1
+
+
+@pytest.mark.asyncio
+async def test_tag_invalidation(fake_redis):
+    calls = {"count": 0}
+
+    @memoize("test_tags", ttl=60, key=lambda user_id: user_id, tags=lambda user_id: [f"user:{user_id}"])
+    async def load(user_id):
+        calls["count"] += 1
+        return calls["count"]
+
+    assert await load(1) == 1
+    assert await load(1) == 1
+    await memo_module._on_tags_changed(["user:1"])
+    assert await load(1) == 2
+
+
+@pytest.mark.asyncio
+async def test_local_tag_index_bounded_by_lru(fake_redis):
+    cache = TwoTierCache("test_tag_index", ttl=60, maxsize=10, beta=0)
+    for user_id in range(1000):
+        await cache.get_or_load(str(user_id), AsyncMock(return_value=user_id), tags=[f"user:{user_id}", "users"])
+    assert len(cache.local) == 10
+    assert set(cache._local_tags) == {f"user:{user_id}" for user_id in range(990, 1000)} | {"users"}
+    assert cache._local_tags["users"] == {str(user_id) for user_id in range(990, 1000)}
+
+    # 过期与删除同样移出索引
+    cache.local.delete("999")
+    cache.local._data["998"].expiry = 0
+    assert cache.local.get("998") is None
+    assert "user:999" not in cache._local_tags and "user:998" not in cache._local_tags
+    assert len(cache._local_tags["users"]) == 8
+
+    await cache.invalidate_tags(["users"])
+    assert len(cache.local) == 0 and cache._local_tags == {}
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_falls_back_to_loader():
+    cache = TwoTierCache("test_redis_down", ttl=60)
+    with patch.object(memo_module, "get_redis", AsyncMock(side_effect=ConnectionError("down"))):
+        assert await cache.get_or_load("k", AsyncMock(return_value="v")) == "v"
+        # 本地缓存仍然生效
+        assert await cache.get_or_load("k", AsyncMock(return_value="other")) == "v"
+
+
+def test_orm_codec_round_trip():
+    codec = orm_codec(User)
+    user = User(id=1, username="tester", email="t@example.com", hashed_password="x",
+                create_time=datetime(2024, 1, 2, 3, 4, 5))
+    restored = codec["decode"](codec["encode"](user))
+    assert restored.username == "tester"
+    assert restored.create_time == datetime(2024, 1, 2, 3, 4, 5)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_memory_profile.py
+
+测试内存分析：
+1. 快照 top / diff 能定位到分配代码
+2. tracemalloc 运行时抽样记录路由峰值分配
+"""
+import tracemalloc
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.common.utils import memory_profile
+from src.common.utils.security import admin_required, require_authentication
+from src.core.base.exceptions import register_exception_handlers
+from src.core.middleware.memory_profile import MemoryProfileMiddleware
+from src.features.monitor.router import debug_router
+
+app = FastAPI()
+app.add_middleware(MemoryProfileMiddleware, sample_rate=1.0)
+app.include_router(debug_router, prefix="/api/v1/monitor")
+register_exception_handlers(app)
+app.dependency_overrides[require_authentication] = lambda: "token"
+app.dependency_overrides[admin_required] = lambda: {"sub": "1", "is_superuser": True}
+
+retained = []
+
+
+@app.get("/allocate")
+async def allocate():
+    retained.append([bytearray(1024) for _ in range(512)])
+    return {"ok": True}
+
+
+client = TestClient(app)
+
+
+def test_snapshot_diff_and_route_peaks():
+    try:
+        assert client.post("/api/v1/monitor/memory/start").json()["data"]["tracing"]
+        client.post("/api/v1/monitor/memory/snapshot", params={"name": "before"})
+        client.get("/allocate")
+        client.post("/api/v1/monitor/memory/snapshot", params={"name": "after"})
+
+        top = client.get("/api/v1/monitor/memory/top", params={"snapshot": "after", "include": "*test_memory_profile*"})
+        assert top.json()["data"][0]["size"] >= 512 * 1024
+
+        diff = client.get("/api/v1/monitor/memory/diff", params={"base": "before", "target": "after"})
+        assert diff.json()["data"][0]["size_diff"] >= 512 * 1024
+        assert "test_memory_profile.py" in diff.json()["data"][0]["traceback"][0]
+
+        routes = {item["route"]: item for item in client.get("/api/v1/monitor/memory/routes").json()["data"]}
+        assert routes["/allocate"]["max"] >= 512 * 1024
+
+        missing = client.get("/api/v1/monitor/memory/top", params={"snapshot": "nope"})
+        assert missing.status_code == 404
+    finally:
+        client.post("/api/v1/monitor/memory/stop")
+        retained.clear()
+    assert not tracemalloc.is_tracing()
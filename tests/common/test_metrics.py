@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_metrics.py
+
+测试指标：
+1. 中间件按路由模板打标签，未匹配的请求记为 <unmatched>
+2. 直方图按 Prometheus 文本格式输出累积分桶
+3. 多 worker 快照合并：计数累加，已退出 worker 的 gauge 被丢弃；已退出（包括 PID 被复用）的快照并入 dead.json 后删除
+"""
+import json
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.common.utils.metrics import HTTP_REQUESTS, Registry, _process_start, write_snapshot
+from src.core.middleware.metrics import MetricsMiddleware
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/items/{item_id}")
+async def get_item(item_id: int):
+    return {"id": item_id}
+
+
+client = TestClient(app)
+
+
+def test_requests_labelled_by_route_template():
+    before = HTTP_REQUESTS.labels("GET", "/items/{item_id}", 200).get()
+    client.get("/items/1")
+    client.get("/items/2")
+    assert HTTP_REQUESTS.labels("GET", "/items/{item_id}", 200).get() == before + 2
+
+    unmatched = HTTP_REQUESTS.labels("GET", "<unmatched>", 404).get()
+    client.get("/nowhere/3")
+    assert HTTP_REQUESTS.labels("GET", "<unmatched>", 404).get() == unmatched + 1
+
+
+def test_histogram_rendering():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "耗时", ("route",), buckets=(0.1, 1.0))
+    histogram.labels("/a").observe(0.05)
+    histogram.labels("/a").observe(0.5)
+    histogram.labels("/a").observe(5)
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+
+
+def test_multiprocess_merge(tmp_path):
+    write_snapshot(str(tmp_path))
+    # 模拟两个已经退出的 worker：一个 PID 已不存在，另一个的 PID 被当前进程复用（启动时间不同）
+    dead = {
+        "jobs_total": {"type": "counter", "help": "任务数", "labelnames": [], "buckets": [], "samples": {"": 3}},
+        "busy": {"type": "gauge", "help": "忙碌数", "labelnames": [], "buckets": [], "samples": {"": 7}},
+    }
+    (tmp_path / "999999999-1.json").write_text(json.dumps(dead))
+    (tmp_path / f"{os.getpid()}-1.json").write_text(json.dumps(dead))
+
+    registry = Registry()
+    registry.counter("jobs_total", "任务数").inc(2)
+    registry.gauge("busy", "忙碌数").set(1)
+    text = registry.render(str(tmp_path))
+    assert "jobs_total 8" in text
+    assert "busy 1" in text
+
+    # 已退出 worker 的快照合并进 dead.json 后删除，再次抓取时计数不变
+    own = f"{os.getpid()}-{_process_start(os.getpid())}.json"
+    assert sorted(os.listdir(tmp_path)) == sorted(["dead.json", "dead.lock", own])
+    assert "jobs_total 8" in registry.render(str(tmp_path))
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_profiler.py
+
+测试采样分析：
+1. 能采到事件循环线程上的热点函数与挂起任务的 await 栈
+2. pstats 输出可以被标准库 pstats 读取
+3. 接口的时长上限与单任务互斥
+"""
+import asyncio
+import io
+import marshal
+import pstats
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.common.utils import profiler as profiler_module
+from src.common.utils.profiler import SamplingProfiler
+from src.common.utils.security import admin_required, require_authentication
+from src.core.base.exceptions import register_exception_handlers
+from src.features.monitor.router import debug_router
+
+
+def busy_loop(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def waiting_task():
+    await asyncio.sleep(1)
+
+
+@pytest.mark.asyncio
+async def test_samples_hot_function_and_tasks():
+    loop = asyncio.get_running_loop()
+    profiler = SamplingProfiler(threading.get_ident(), loop=loop, interval=0.002)
+    waiter = asyncio.create_task(waiting_task())
+    sampler = threading.Thread(target=profiler.run, args=(0.2,))
+    sampler.start()
+    await asyncio.sleep(0.01)
+    busy_loop(0.15)
+    await asyncio.to_thread(sampler.join)
+    waiter.cancel()
+
+    collapsed = profiler.collapsed()
+    assert "busy_loop" in collapsed
+    assert "<task>;waiting_task" in collapsed
+
+    stats = pstats.Stats(_StatsLoader(profiler.pstats()), stream=io.StringIO())
+    functions = {name for _, _, name in stats.stats}
+    assert "busy_loop" in functions
+
+
+class _StatsLoader:
+    """pstats.Stats 接受带有 create_stats/stats 属性的对象"""
+
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+
+app = FastAPI()
+app.include_router(debug_router, prefix="/api/v1/monitor")
+register_exception_handlers(app)
+app.dependency_overrides[require_authentication] = lambda: "token"
+app.dependency_overrides[admin_required] = lambda: {"sub": "1", "is_superuser": True}
+client = TestClient(app)
+
+
+def test_profile_endpoint():
+    response = client.post("/api/v1/monitor/profile", params={"duration": 0.05, "interval": 0.005})
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
+
+    response = client.post("/api/v1/monitor/profile", params={"duration": 3600})
+    assert response.status_code == 422
+
+
+def test_profile_endpoint_single_run():
+    assert profiler_module.try_acquire_profile_lock()
+    try:
+        response = client.post("/api/v1/monitor/profile", params={"duration": 0.05})
+        assert response.status_code == 409
+    finally:
+        profiler_module.release_profile_lock()
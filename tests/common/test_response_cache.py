@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_response_cache.py
+
+测试路由级响应缓存：
+1. 第二次请求命中缓存，不再执行接口
+2. 标签版本变化后缓存失效
+3. 绕过请求头与命中率统计
+"""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src.common.utils import response_cache as response_cache_module
+from src.common.utils.change_version import change_version
+from src.common.utils.response_cache import RouteCache, response_cache, response_cache_stats
+from src.common.utils.security import get_current_user
+from src.core.base.response import BaseResponse
+
+
+class DictRedis:
+    """只实现缓存用到的命令"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+app = FastAPI()
+app.dependency_overrides[get_current_user] = lambda: {"sub": "1"}
+calls = {"count": 0}
+
+
+@app.get("/cached")
+async def cached_route(cache: RouteCache = Depends(response_cache(ttl=10, tags=("item",)))):
+    cached = await cache.get()
+    if cached:
+        return cached
+    calls["count"] += 1
+    return await cache.set(BaseResponse.success(data={"n": calls["count"]}))
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def fake_redis():
+    redis_client = DictRedis()
+    calls["count"] = 0
+    with patch.object(response_cache_module, "get_redis", AsyncMock(return_value=redis_client)):
+        yield redis_client
+
+
+def test_second_request_hits_cache(fake_redis):
+    with patch.object(change_version, "get_many", AsyncMock(return_value=["1"])):
+        first = client.get("/cached")
+        second = client.get("/cached")
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert calls["count"] == 1
+    assert response_cache_stats()["/cached"]["hit"] >= 1
+
+
+def test_version_bump_invalidates(fake_redis):
+    with patch.object(change_version, "get_many", AsyncMock(return_value=["1"])):
+        client.get("/cached")
+    with patch.object(change_version, "get_many", AsyncMock(return_value=["2"])):
+        response = client.get("/cached")
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["data"] == {"n": 2}
+
+
+def test_bypass_header_skips_read(fake_redis):
+    with patch.object(change_version, "get_many", AsyncMock(return_value=["1"])):
+        client.get("/cached")
+        response = client.get("/cached", headers={"X-Cache-Bypass": "1"})
+        after = client.get("/cached")
+    assert response.headers["x-cache"] == "BYPASS"
+    assert calls["count"] == 2
+    # 绕过读取时仍会写入最新结果
+    assert after.json()["data"] == {"n": 2}
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_tracing.py
+
+测试链路追踪：
+1. 采样的请求导出根 span 与子 span（含 SQL），父子关系正确
+2. 未采样时 span() 为空操作，不导出
+3. 沿用调用方 traceparent 的 trace_id，采样标记只在信任调用方时生效，否则仍按本地采样率
+4. OTLP/JSON 转换
+"""
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.common.utils import tracing as tracing_module
+from src.common.utils.tracing import NOOP_SPAN, parse_traceparent, span, to_otlp
+from src.core.base.response import BaseResponse
+from src.core.conf.config import settings
+from src.core.middleware.tracing import TracingMiddleware
+from src.core.server.instrumentation import install_sql_instrumentation
+
+engine = create_async_engine("sqlite+aiosqlite://")
+install_sql_instrumentation(engine.sync_engine)
+
+
+def make_client(sample_rate: float, trust_parent: bool = None) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, sample_rate=sample_rate, trust_parent=trust_parent)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        with span("handler.load"):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT :id"), {"id": item_id})
+        return BaseResponse.success(data={"id": item_id})
+
+    return TestClient(app)
+
+
+def test_sampled_request_exports_span_tree():
+    with patch.object(tracing_module.exporter, "export") as export:
+        response = make_client(1.0).get("/items/1")
+    assert response.status_code == 200
+    spans = {item.name: item for item in export.call_args.args[0]}
+    root = spans["HTTP GET /items/{item_id}"]
+    assert root.attributes["http.status_code"] == 200
+    assert spans["handler.load"].parent_id == root.span_id
+    assert spans["db.select"].parent_id == spans["handler.load"].span_id
+    assert spans["response.serialize"].parent_id == root.span_id
+    assert response.headers["traceparent"] == root.traceparent()
+
+
+def test_unsampled_request_is_noop():
+    with patch.object(tracing_module.exporter, "export") as export:
+        response = make_client(0.0).get("/items/1")
+    assert response.status_code == 200
+    assert "traceparent" not in response.headers
+    export.assert_not_called()
+    assert span("outside") is NOOP_SPAN
+
+
+def test_incoming_traceparent_is_honoured():
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    headers = {"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+    assert settings.TRACING_TRUST_PARENT is False
+
+    # 默认不信任调用方的采样标记，仍按本地采样率
+    with patch.object(tracing_module.exporter, "export") as export:
+        make_client(0.0).get("/items/1", headers=headers)
+    export.assert_not_called()
+
+    # 本地决定采样时沿用调用方的 trace_id 与父 span
+    with patch.object(tracing_module.exporter, "export") as export:
+        make_client(1.0).get("/items/1", headers=headers)
+    spans = export.call_args.args[0]
+    assert {item.trace_id for item in spans} == {trace_id}
+    assert "00f067aa0ba902b7" in {item.parent_id for item in spans}
+
+    with patch.object(tracing_module.exporter, "export") as export:
+        make_client(0.0, trust_parent=True).get("/items/1", headers=headers)
+    assert {item.trace_id for item in export.call_args.args[0]} == {trace_id}
+    assert parse_traceparent("00-bad-00f067aa0ba902b7-01") is None
+
+
+def test_to_otlp():
+    with patch.object(tracing_module.exporter, "export") as export:
+        make_client(1.0).get("/items/2")
+    document = to_otlp(export.call_args.args[0])
+    otlp_spans = document["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root = next(item for item in otlp_spans if "parentSpanId" not in item)
+    attributes = {attr["key"]: attr["value"] for attr in root["attributes"]}
+    assert attributes["http.status_code"] == {"intValue": "200"}
+    assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_compression.py
+
+测试响应压缩中间件：
+1. Accept-Encoding 协商（q 值、通配符）
+2. 超过阈值的响应被 gzip 压缩
+3. 小响应、已压缩响应、流式响应不压缩
+"""
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.core.middleware.compression import CompressionMiddleware, parse_accept_encoding
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100, level=6)
+
+LARGE_PAYLOAD = {"list": [{"id": i, "name": f"项目{i}"} for i in range(200)]}
+
+
+@app.get("/large")
+async def large():
+    return JSONResponse(LARGE_PAYLOAD)
+
+
+@app.get("/small")
+async def small():
+    return JSONResponse({"id": 1})
+
+
+@app.get("/encoded")
+async def encoded():
+    return Response(gzip.compress(b"x" * 1000), headers={"Content-Encoding": "gzip"})
+
+
+@app.get("/stream")
+async def stream():
+    async def chunks():
+        for _ in range(3):
+            yield b"y" * 500
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+client = TestClient(app)
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.5, br, *;q=0") == {"gzip": 0.5, "br": 1.0, "*": 0.0}
+
+
+def test_negotiate_respects_q_values():
+    middleware = CompressionMiddleware(app, minimum_size=0)
+    assert middleware.negotiate("gzip") == "gzip"
+    assert middleware.negotiate("gzip;q=0") is None
+    assert middleware.negotiate("identity") is None
+    assert middleware.negotiate("*") is not None
+
+
+def test_large_response_is_compressed():
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == LARGE_PAYLOAD
+
+
+def test_small_response_is_not_compressed():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_already_encoded_response_is_untouched():
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"x" * 1000
+
+
+def test_streaming_response_is_not_compressed():
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "y" * 1500
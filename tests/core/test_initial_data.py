@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_initial_data.py
+
+测试启动初始化：
+1. 首次初始化写入角色、管理员与版本标记，之后只读取版本标记并跳过
+2. 多个 worker 并发初始化、或已有旧数据（无版本标记）时不会产生重复数据
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import src.main  # noqa: F401  注册全部模型
+from src.common.scripts.initial_data import SEED_VERSION, ensure_initialized, read_seed_version
+from src.core.server.database import Base
+from src.features.user.models import Role, User, user_roles
+
+
+async def make_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'init.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def counts(engine) -> tuple:
+    async with engine.connect() as conn:
+        roles = (await conn.execute(select(func.count(Role.id)))).scalar()
+        admins = (await conn.execute(select(func.count(User.id)).where(User.username == "admin"))).scalar()
+        links = (await conn.execute(select(func.count()).select_from(user_roles))).scalar()
+    return roles, admins, links
+
+
+@pytest.mark.asyncio
+async def test_second_start_only_reads_marker(tmp_path):
+    engine = await make_engine(tmp_path)
+    assert await ensure_initialized(engine) is True
+    assert await counts(engine) == (2, 1, 1)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    assert await ensure_initialized(engine) is False
+    assert len(statements) == 1 and "app_meta" in statements[0]
+    async with engine.connect() as conn:
+        assert await read_seed_version(conn) == SEED_VERSION
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_and_legacy_init_is_idempotent(tmp_path):
+    engine = await make_engine(tmp_path)
+    # 旧版本初始化过的库：有角色与管理员但没有版本标记
+    async with engine.begin() as conn:
+        await conn.execute(text("INSERT INTO role (id, name, description, create_time, update_time, is_deleted) "
+                                "VALUES (1, '普通用户', NULL, '2025-01-01', '2025-01-01', 0)"))
+
+    await asyncio.gather(*(ensure_initialized(engine) for _ in range(3)))
+    assert await counts(engine) == (2, 1, 1)
+    await engine.dispose()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_launcher.py
+
+测试服务启动参数：
+1. 可用 CPU 数受 cgroup CPU 配额限制，未配置 worker 数时按可用 CPU 数启动
+2. 固定使用 uvloop 与 httptools，keep-alive、监听队列、最大请求数取自配置
+3. 每个 worker 的最大请求数加上随机抖动，且不影响原配置
+4. 实例退出时先通知 worker 进入下线状态，等待 prestop_delay 后才发送 SIGTERM
+5. 就绪标记只认 worker 启动之后写入的，自行退出的 worker 被回收时清理标记
+"""
+import os
+import random
+import threading
+import time
+
+from src.core.conf.config import settings
+from src.core.server import launcher
+from src.core.server.launcher import (DRAIN_SIGNAL, RollingMultiprocess, WorkerServer, available_cpus, build_config,
+                                      jittered_config, worker_count)
+from src.core.server.lifecycle import lifecycle
+
+
+def test_available_cpus_respects_cgroup_quota(tmp_path):
+    cpu_max = tmp_path / "cpu.max"
+    host_cpus = available_cpus(str(tmp_path / "missing"))
+    assert host_cpus >= 1
+
+    cpu_max.write_text("150000 100000\n")
+    assert available_cpus(str(cpu_max)) == min(host_cpus, 2)
+    cpu_max.write_text("max 100000\n")
+    assert available_cpus(str(cpu_max)) == host_cpus
+
+    assert worker_count(3) == 3
+    assert worker_count(0) == available_cpus()
+
+
+def test_build_config_uses_settings():
+    config = build_config(workers=4, port=9000)
+    assert config.workers == 4 and config.port == 9000 and config.host == settings.SERVER_HOST
+    assert config.loop == "uvloop" and config.http == "httptools"
+    assert config.backlog == settings.SERVER_BACKLOG
+    assert config.timeout_keep_alive == settings.SERVER_KEEPALIVE_TIMEOUT
+    assert config.limit_max_requests == (settings.SERVER_MAX_REQUESTS or None)
+    assert config.app == "src.main:app"
+
+
+def test_jittered_config_spreads_max_requests():
+    config = build_config(workers=2)
+    config.limit_max_requests = 1000
+    rng = random.Random(1)
+    limits = {jittered_config(config, 100, rng).limit_max_requests for _ in range(20)}
+    assert all(1000 <= limit <= 1100 for limit in limits) and len(limits) > 1
+    assert config.limit_max_requests == 1000
+
+    config.limit_max_requests = None
+    assert jittered_config(config, 100, rng).limit_max_requests is None
+
+
+def test_drain_signal_marks_worker_draining():
+    server = WorkerServer(build_config(workers=1))
+    try:
+        with server.capture_signals():
+            os.kill(os.getpid(), DRAIN_SIGNAL)
+            time.sleep(0.01)
+            assert lifecycle.draining is True
+            assert server.should_exit is False
+    finally:
+        lifecycle.reset()
+
+
+class FakeProcess:
+    def __init__(self, pid: int, events: list):
+        self.pid = pid
+        self.events = events
+
+    def terminate(self):
+        self.events.append(("terminate", self.pid, time.monotonic()))
+
+
+def test_terminate_all_drains_before_sigterm(monkeypatch):
+    events = []
+    supervisor = RollingMultiprocess.__new__(RollingMultiprocess)
+    supervisor.processes = [FakeProcess(101, events), FakeProcess(102, events)]
+    supervisor.prestop_delay = 0.2
+    monkeypatch.setattr(launcher.os, "kill", lambda pid, sig: events.append(("kill", pid, time.monotonic(), sig)))
+
+    started = time.monotonic()
+    supervisor.terminate_all()
+    assert [event[:2] for event in events] == [("kill", 101), ("kill", 102), ("terminate", 101), ("terminate", 102)]
+    assert all(event[3] == DRAIN_SIGNAL for event in events[:2])
+    assert events[2][2] - started >= 0.2
+
+
+class ExitedProcess:
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.spawned_at = 0.0
+
+    def is_alive(self):
+        return False
+
+    def kill(self):
+        pass
+
+    def join(self):
+        pass
+
+
+def test_ready_markers_not_reused_across_pids(tmp_path):
+    supervisor = RollingMultiprocess.__new__(RollingMultiprocess)
+    supervisor.ready_dir = str(tmp_path)
+    supervisor.should_exit = threading.Event()
+    exited = ExitedProcess(4321)
+    (tmp_path / "4321").touch()
+    replacement = ExitedProcess(4321)
+    replacement.spawned_at = time.time() + 1
+    supervisor.spawn = lambda: replacement
+    supervisor.processes = [exited]
+
+    # 新 worker 复用了旧 PID：旧标记早于它的启动时间，不算就绪
+    assert supervisor.is_ready(exited) is True
+    assert supervisor.is_ready(replacement) is False
+
+    supervisor.keep_subprocess_alive()
+    assert supervisor.processes == [replacement]
+    assert not (tmp_path / "4321").exists()
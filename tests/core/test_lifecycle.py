@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_lifecycle.py
+
+测试启动预热与优雅下线：
+1. 数据库连接池预热后常驻指定数量的连接，Redis 预热失败不影响就绪；部分连接失败或超时时已建立的连接都归还连接池
+2. 预热完成前业务请求返回 503，探针接口不受影响
+3. 下线期间请求照常处理（包括进行中的请求），响应带 Connection: close，不再视为就绪
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from benchmarks.fake_redis import FakeRedis
+from src.core.middleware.lifecycle import LifecycleMiddleware
+from src.core.server import lifecycle as lifecycle_module
+from src.core.server.lifecycle import Lifecycle, warm_up, warm_up_database
+
+
+class BrokenRedis:
+    async def ping(self):
+        raise ConnectionError("connection refused")
+
+
+def build_app(state: Lifecycle, release: asyncio.Event = None) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(LifecycleMiddleware, state=state)
+
+    @app.get("/work")
+    async def work():
+        if release is not None:
+            await release.wait()
+        return {"ok": True}
+
+    @app.get("/readyz")
+    async def readyz():
+        return state.status()
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_pool_connections(tmp_path, monkeypatch):
+    state = Lifecycle()
+    state.reset(ready=False)
+    monkeypatch.setattr(lifecycle_module, "lifecycle", state)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'warm.db'}",
+                                 poolclass=AsyncAdaptedQueuePool, pool_size=5)
+    try:
+        report = await warm_up(engine, FakeRedis(), db_connections=8, redis_connections=2, timeout=5)
+        # 预热数量不超过连接池常驻连接数，归还后全部留在池中
+        assert report["database"]["connections"] == 5
+        assert engine.sync_engine.pool.checkedin() == 5
+        assert report["redis"]["connections"] == 2
+        assert state.ready is True
+
+        state.reset(ready=False)
+        report = await warm_up(engine, BrokenRedis(), db_connections=1, redis_connections=2, timeout=5)
+        assert report["redis"]["connections"] == 0 and "ConnectionError" in report["redis"]["error"]
+        assert state.ready is True
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_database_returns_connections_on_failure(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'warm.db'}",
+                                 poolclass=AsyncAdaptedQueuePool, pool_size=5)
+    attempts = []
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def fail_third(dialect, conn_rec, cargs, cparams):
+        attempts.append(1)
+        if len(attempts) == 3:
+            raise ConnectionError("connection refused")
+
+    pool = engine.sync_engine.pool
+    try:
+        with pytest.raises(Exception):
+            await warm_up_database(engine, 5)
+        assert pool.checkedout() == 0 and pool.checkedin() == 4
+
+        # 超时：还在建立的连接在后台建立后归还
+        await engine.dispose()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(warm_up_database(engine, 5), 0.0001)
+        for _ in range(100):
+            if not lifecycle_module._pending_cleanups:
+                break
+            await asyncio.sleep(0.01)
+        assert engine.sync_engine.pool.checkedout() == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_requests_gated_until_ready():
+    state = Lifecycle()
+    state.reset(ready=False)
+    transport = httpx.ASGITransport(app=build_app(state))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/work")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1" and response.headers["connection"] == "close"
+        assert (await client.get("/readyz")).status_code == 200
+
+        state.ready = True
+        assert (await client.get("/work")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_draining_keeps_serving_with_connection_close():
+    state = Lifecycle()
+    release = asyncio.Event()
+    transport = httpx.ASGITransport(app=build_app(state, release))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        pending = asyncio.create_task(client.get("/work"))
+        while state.in_flight == 0:
+            await asyncio.sleep(0.01)
+
+        # 下线期间负载均衡仍可能转发请求，请求不能失败，只是不再保持长连接
+        state.begin_draining()
+        assert state.accepting() is False and state.status()["draining"] is True
+        release.set()
+        response = await pending
+        assert response.status_code == 200 and response.headers["connection"] == "close"
+        response = await client.get("/work")
+        assert response.status_code == 200 and response.headers["connection"] == "close"
+        assert state.in_flight == 0
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_micro.py
+
+测试微基准的回归比较：
+1. Mann-Whitney U 检验的 U 与 p 值（正态近似、含并列校正）与手算结果一致，样本完全相同时 p 为 1
+2. 显著且中位数变化超过阈值时判定为 slower / faster，否则为 same；只比较两个版本都有的基准
+3. 分页基准测量的是 paginate 实际使用的语句构造
+"""
+import pytest
+from sqlalchemy.dialects import sqlite
+
+from benchmarks.micro import compare_results, mann_whitney_u
+from src.common.utils.pagination import build_page_queries
+from src.features.doc.models import Doc  # noqa: F401  保证关系映射可解析
+from src.features.project.service import project_service
+
+
+def test_mann_whitney_u_known_values():
+    assert mann_whitney_u([1, 2, 3], [4, 5, 6]) == (0.0, pytest.approx(0.080856, abs=1e-6))
+    # 并列：秩和 19.5，U=4.5，方差 22.5
+    assert mann_whitney_u([1, 2, 3, 4, 5], [3, 4, 5, 6, 7]) == (4.5, pytest.approx(0.113846, abs=1e-6))
+    assert mann_whitney_u([1.0] * 5, [1.0] * 5) == (12.5, 1.0)
+
+
+def history(**results) -> dict:
+    return {"results": {name: {"samples": samples} for name, samples in results.items()}}
+
+
+def test_compare_results_verdicts():
+    base = [1.00 + i * 0.001 for i in range(20)]
+    base_history = history(slow=base, fast=base, noise=base, same=base, removed=base)
+    target_history = history(
+        slow=[value * 1.5 for value in base],
+        fast=[value * 0.5 for value in base],
+        noise=[value * 1.01 for value in base],
+        same=list(base),
+        added=base,
+    )
+    rows = {row["name"]: row for row in compare_results(base_history, target_history, alpha=0.01, threshold=0.05)}
+    assert set(rows) == {"slow", "fast", "noise", "same"}
+    assert rows["slow"]["verdict"] == "slower" and rows["slow"]["p_value"] < 0.01
+    assert rows["fast"]["verdict"] == "faster" and rows["fast"]["ratio"] == 0.5
+    # 变化小于阈值，即使两组样本整体平移也不报告
+    assert rows["noise"]["verdict"] == "same"
+    assert rows["same"]["verdict"] == "same" and rows["same"]["p_value"] > 0.9
+
+
+def test_page_queries_match_paginate():
+    count_query, page_query = build_page_queries(project_service.get_project_list("项目"), 3, 10)
+    dialect = sqlite.dialect()
+    assert "count(*)" in str(count_query.compile(dialect=dialect)).lower()
+    compiled = page_query.compile(dialect=dialect)
+    assert compiled.params["param_1"] == 10 and compiled.params["param_2"] == 20
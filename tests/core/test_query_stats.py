@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_query_stats.py
+
+测试请求级 SQL 统计：
+1. SQL 归一化（字面量、占位符、IN 列表）
+2. 同一语句形状重复执行时记录 N+1 告警
+3. 开启后输出 Server-Timing 响应头
+"""
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.common.utils.query_stats import normalize_sql
+from src.core.middleware import query_stats as query_stats_module
+from src.core.middleware.query_stats import QueryStatsMiddleware
+from src.core.server.instrumentation import install_sql_instrumentation
+
+engine = create_async_engine("sqlite+aiosqlite://")
+install_sql_instrumentation(engine.sync_engine)
+
+app = FastAPI()
+app.add_middleware(QueryStatsMiddleware, n_plus_one_threshold=3, server_timing=True)
+
+
+@app.get("/projects")
+async def projects():
+    async with engine.connect() as conn:
+        for project_id in range(4):
+            await conn.execute(text("SELECT :id AS owner_id"), {"id": project_id})
+    return {"ok": True}
+
+
+client = TestClient(app)
+
+
+def test_normalize_sql():
+    assert normalize_sql("SELECT * FROM user WHERE id = 5 AND name = 'a''b'") == \
+        "SELECT * FROM user WHERE id = ? AND name = ?"
+    assert normalize_sql("SELECT id FROM doc\n WHERE project_id IN (%s, %s, %s)") == \
+        "SELECT id FROM doc WHERE project_id IN (...)"
+    assert normalize_sql("SELECT user.id FROM user WHERE user.id = %(id_1)s") == \
+        "SELECT user.id FROM user WHERE user.id = ?"
+    assert normalize_sql("SELECT 1 /* request_id=abc */") == "SELECT ?"
+
+
+def test_n_plus_one_warning_and_server_timing():
+    with patch.object(query_stats_module.logger, "warning") as warning:
+        response = client.get("/projects")
+    assert response.status_code == 200
+    assert 'desc="4 queries"' in response.headers["Server-Timing"]
+    assert "app;dur=" in response.headers["Server-Timing"]
+    warning.assert_called_once()
+    assert "执行 4 次" in warning.call_args.args[0]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_request_id.py
+
+测试请求追踪ID：
+1. 透传合法的 X-Request-ID，缺失或不合法时生成新的
+2. 请求内的日志与 SQL 注释带有同一个 ID
+"""
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.common.utils.request_id import RequestIdFilter, current_request_id
+from src.core.middleware.request_id import RequestIdMiddleware
+from src.core.server.instrumentation import install_sql_instrumentation
+
+engine = create_async_engine("sqlite+aiosqlite://")
+install_sql_instrumentation(engine.sync_engine)
+executed = []
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def capture(conn, cursor, statement, parameters, context, executemany):
+    executed.append(statement)
+
+
+app = FastAPI()
+app.add_middleware(RequestIdMiddleware)
+
+
+@app.get("/echo")
+async def echo():
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "msg", (), None)
+    RequestIdFilter().filter(record)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    return {"context": current_request_id(), "log": record.request_id}
+
+
+client = TestClient(app)
+
+
+def test_request_id_passthrough():
+    executed.clear()
+    response = client.get("/echo", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["X-Request-ID"] == "abc-123"
+    assert response.json() == {"context": "abc-123", "log": "abc-123"}
+    assert executed[-1].endswith("/* request_id=abc-123 */")
+
+
+def test_request_id_generated_when_missing_or_invalid():
+    generated = client.get("/echo").headers["X-Request-ID"]
+    assert len(generated) == 32
+    replaced = client.get("/echo", headers={"X-Request-ID": "*/ DROP TABLE user"}).headers["X-Request-ID"]
+    assert replaced != "*/ DROP TABLE user"
+    assert current_request_id() is None
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_slow_query.py
+
+测试慢查询日志：
+1. 参数只记录类型与长度
+2. 超过阈值的语句写入慢查询日志，并异步抓取一次执行计划
+3. 未超过阈值的语句不记录
+"""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core.server import slow_query as slow_query_module
+from src.core.server.slow_query import SlowQueryLog, param_shapes
+
+
+def test_param_shapes():
+    assert param_shapes({"id": 1, "name": "abc"}) == {"id": "int", "name": "str[3]"}
+    assert param_shapes((1, None)) == ["int", "NoneType"]
+    assert param_shapes([{"id": 1}, {"id": 2}], executemany=True) == {"rows": 2, "row": {"id": "int"}}
+
+
+@pytest.mark.asyncio
+async def test_slow_select_logged_with_explain():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE project (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    slow_log = SlowQueryLog()
+    slow_log.configure(engine, threshold_ms=10)
+    statement = "SELECT id, name FROM project WHERE id = ?"
+    with patch.object(slow_query_module.slow_query_logger, "warning") as warning:
+        slow_log.observe(statement, (5,), duration=0.001)
+        assert warning.call_count == 0
+
+        slow_log.observe(statement, (5,), duration=0.02)
+        slow_log.observe(statement, (6,), duration=0.03)
+        await asyncio.gather(*slow_log._pending)
+
+    records = [json.loads(call.args[0]) for call in warning.call_args_list]
+    assert [record["event"] for record in records] == ["slow_query", "slow_query", "explain"]
+    assert records[0]["sql"] == "SELECT id, name FROM project WHERE id = ?"
+    assert records[0]["params"] == ["int"]
+    assert records[0]["duration_ms"] == 20.0
+    assert records[2]["fingerprint"] == records[0]["fingerprint"]
+    assert records[2]["plan"]
+    await engine.dispose()
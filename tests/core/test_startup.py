@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_startup.py
+
+测试冷启动：
+1. 新进程导入应用、执行启动阶段、处理第一个请求的耗时在 BUDGET_MS 之内，SMTP、Faker 等模块没有被导入
+2. 预生成的 OpenAPI 文档指纹一致时直接使用，路由变化后忽略文件、现场生成
+3. OPENAPI_ENABLED=false 时不注册文档接口
+"""
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from benchmarks.startup import check_budget, run_once, summarize
+from src.core.base.openapi import build_schema, install_prebuilt_openapi
+from src.core.conf.config import settings
+
+
+def test_cold_start_within_budget():
+    result = run_once("/healthz")
+    assert result["status"] == 200
+    assert result["deferred_loaded"] == []
+    assert check_budget(summarize([result])) == {}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items")
+    async def items():
+        return []
+
+    return app
+
+
+def test_prebuilt_openapi_used_until_stale(tmp_path):
+    path = str(tmp_path / "openapi.json")
+    build_schema(build_app(), path)
+    with open(path, encoding="utf-8") as f:
+        prebuilt = json.load(f)
+    prebuilt["schema"]["info"]["title"] = "prebuilt"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(prebuilt, f)
+
+    app = build_app()
+    install_prebuilt_openapi(app, path)
+    assert TestClient(app).get("/openapi.json").json()["info"]["title"] == "prebuilt"
+
+    # 新增路由后指纹不一致，按当前路由现场生成
+    app = build_app()
+
+    @app.get("/users")
+    async def users():
+        return []
+
+    install_prebuilt_openapi(app, path)
+    schema = TestClient(app).get("/openapi.json").json()
+    assert schema["info"]["title"] == "FastAPI" and "/users" in schema["paths"]
+
+
+def test_openapi_can_be_disabled(monkeypatch):
+    from src.main import create_app
+
+    monkeypatch.setattr(settings, "OPENAPI_ENABLED", False)
+    client = TestClient(create_app())
+    assert client.get("/openapi.json").status_code == 404
+    assert client.get("/docs").status_code == 404
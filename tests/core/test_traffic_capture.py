@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_traffic_capture.py
+
+测试流量采集与回放：
+1. 采集记录包含路由模板、状态码、耗时，敏感字段被脱敏，默认只记录请求体形状
+2. 回放工具按形状合成请求体，重新发出请求并按路由汇总延迟
+"""
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from benchmarks.replay import replay, synthesize
+from src.core.middleware import traffic_capture as capture_module
+from src.core.middleware.traffic_capture import TrafficCaptureMiddleware
+
+
+class LoginBody(BaseModel):
+    username: str
+    password: str
+    tags: list
+
+
+def build_app(**options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(TrafficCaptureMiddleware, **options)
+
+    @app.post("/items/{item_id}")
+    async def create(item_id: int, body: LoginBody):
+        return {"id": item_id, "tags": len(body.tags)}
+
+    @app.get("/metrics")
+    async def metrics():
+        return {}
+
+    return app
+
+
+def capture(app: FastAPI, method: str, url: str, **kwargs) -> list:
+    records = []
+    with patch.object(capture_module, "write_record", records.append):
+        TestClient(app).request(method, url, **kwargs)
+    return records
+
+
+def test_record_is_sanitized():
+    app = build_app()
+    records = capture(app, "POST", "/items/7?token=abc&page=2",
+                      json={"username": "alice", "password": "secret", "tags": ["a", "b"]},
+                      headers={"Authorization": "Bearer x"})
+
+    assert len(records) == 1
+    record = records[0]
+    assert record["route"] == "/items/{item_id}" and record["path"] == "/items/7"
+    assert record["status"] == 200 and record["auth"] is True
+    assert record["query"] == {"token": ["***"], "page": ["2"]}
+    assert record["body_shape"] == {"username": "str:5", "password": "str:6", "tags": {"$list": 2, "item": "str:1"}}
+    assert "body" not in record
+    assert "secret" not in json.dumps(record)
+
+
+def test_body_capture_redacts_and_excluded_paths_are_skipped():
+    app = build_app(capture_body=True)
+    records = capture(app, "POST", "/items/1", json={"username": "bob", "password": "pw", "tags": []})
+    assert records[0]["body"] == {"username": "bob", "password": "***", "tags": []}
+    assert capture(app, "GET", "/metrics") == []
+
+
+@pytest.mark.asyncio
+async def test_replay_reports_latency_by_route():
+    shape = {"username": "str:5", "password": "str:8", "tags": {"$list": 3, "item": "str:2"}}
+    assert synthesize(shape) == {"username": "xxxxx", "password": "xxxxxxxx", "tags": ["xx", "xx", "xx"]}
+
+    records = [
+        {"ts": 100.0 + i * 0.001, "method": "POST", "path": f"/items/{i}", "route": "/items/{item_id}", "query": {},
+         "content_type": "application/json", "body_size": 40, "body_shape": shape, "status": 200,
+         "duration_ms": 5.0}
+        for i in range(5)
+    ]
+    records.append({"ts": 101.0, "method": "POST", "path": "/upload", "route": "/upload", "query": {},
+                    "content_type": "multipart/form-data", "body_size": 1000, "body_shape": None, "status": 200,
+                    "duration_ms": 1.0})
+    transport = httpx.ASGITransport(app=build_app(sample_rate=0))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        report = await replay(client, records, speed=0, concurrency=2, token=None)
+
+    assert report["total"]["requests"] == 5 and report["total"]["skipped"] == 1
+    route = report["routes"]["POST /items/{item_id}"]
+    assert route["requests"] == 5 and route["status_mismatch"] == 0 and route["errors"] == 0
+    assert route["original"]["p50_ms"] == 5.0
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+tests/doc 共用的测试环境：临时 SQLite 库（两个用户、一个项目）、进程内 Redis 替身与临时存储目录
+"""
+import httpx
+import pytest_asyncio
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import src.main  # noqa: F401  注册全部模型
+from benchmarks.fake_redis import FakeRedis
+from src.core.conf.config import settings
+from src.core.server import database, dependencies
+from src.core.server.database import AsyncSession, Base
+from src.features.project.models import Project
+from src.features.user.models import User
+
+
+@pytest_asyncio.fixture
+async def upload_env(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'upload.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {"id": 1, "username": "owner", "email": "owner@example.com", "hashed_password": "x"},
+            {"id": 2, "username": "other", "email": "other@example.com", "hashed_password": "x"},
+        ])
+        await conn.execute(insert(Project), [{"id": 1, "name": "p1", "project_type": 1, "owner_id": 1}])
+    monkeypatch.setattr(database, "AsyncSessionLocal",
+                        async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(dependencies, "_redis_client", FakeRedis())
+    monkeypatch.setattr(settings, "DOC_STORAGE_DIR", str(tmp_path / "docs"))
+    monkeypatch.setattr(settings, "DOC_UPLOAD_CHUNK_SIZE", 64 * 1024)
+
+    transport = httpx.ASGITransport(app=src.main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client, engine
+    await engine.dispose()
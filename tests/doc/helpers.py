@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+tests/doc 共用的辅助函数
+"""
+from src.common.utils.security import create_access_token
+
+
+async def chunks(payload: bytes, sizes=(1000, 7, 65536, 300)):
+    """按大小不一的块产出请求体，模拟网络上收到的数据"""
+    offset, index = 0, 0
+    while offset < len(payload):
+        size = sizes[index % len(sizes)]
+        yield payload[offset:offset + size]
+        offset += size
+        index += 1
+
+
+def auth(user_id: int) -> dict:
+    token = create_access_token({"sub": str(user_id), "username": "u", "is_superuser": False})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_multipart.py
+
+测试分片上传：
+1. 分片并行、乱序上传，查询进度可用于续传，完成时按分片号合并、校验整体 SHA-256 并写入 QUEUEING 状态的文档记录，分片随后被删除
+2. 整体哈希不一致、缺少分片、分片文件与登记的不一致时拒绝完成且不留下合并文件，分片保留以便重传；其他用户不能操作该上传
+3. 已上传分片的总大小超过声明的文件大小时，超出的分片返回 413 且不被登记
+4. 重传的分片为空、哈希不一致或超出总额度时保留此前上传的内容；分片文件丢失时完成返回 422
+5. 合并期间放弃上传返回 409
+6. 后台清理只删除 Redis 中已没有上传信息的分片目录
+"""
+import asyncio
+import hashlib
+import os
+
+import pytest
+from sqlalchemy import select
+
+from src.core.base.exceptions import MessageException
+from src.core.conf.config import settings
+from src.core.server import dependencies
+from src.features.doc import storage
+from src.features.doc.models import Doc, DocStatus
+from src.features.doc.multipart import collect_orphans, multipart_dir, multipart_upload, part_path
+from tests.doc.helpers import auth, chunks
+
+PART_SIZE = 100_000
+
+
+async def initiate(client, **extra) -> str:
+    response = await client.post("/api/v1/doc/multipart/initiate",
+                                 json={"project_id": 1, "file_name": "大文件.pdf", **extra}, headers=auth(1))
+    assert response.status_code == 201, response.text
+    return response.json()["data"]["upload_id"]
+
+
+async def put_part(client, upload_id: str, number: int, payload: bytes, user_id: int = 1):
+    return await client.put(f"/api/v1/doc/multipart/{upload_id}/parts/{number}", content=chunks(payload),
+                            headers=auth(user_id))
+
+
+@pytest.mark.asyncio
+async def test_parallel_parts_resume_and_complete(upload_env):
+    client, engine = upload_env
+    payload = os.urandom(PART_SIZE * 3 + 1234)
+    digest = hashlib.sha256(payload).hexdigest()
+    parts = [payload[i:i + PART_SIZE] for i in range(0, len(payload), PART_SIZE)]
+    upload_id = await initiate(client, file_size=len(payload), sha256=digest)
+
+    # 第 3 片“断线”前没有传完，其余分片乱序并行上传
+    responses = await asyncio.gather(*(put_part(client, upload_id, n, parts[n - 1]) for n in (4, 1, 2)))
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert responses[0].json()["data"] == {"part_number": 4, "size": 1234,
+                                           "sha256": hashlib.sha256(parts[3]).hexdigest()}
+
+    response = await client.get(f"/api/v1/doc/multipart/{upload_id}", headers=auth(1))
+    assert [part["part_number"] for part in response.json()["data"]["parts"]] == [1, 2, 4]
+    response = await client.post(f"/api/v1/doc/multipart/{upload_id}/complete", headers=auth(1))
+    assert response.status_code == 422 and "[3]" in response.json()["message"]
+
+    # 续传缺少的分片后完成
+    assert (await put_part(client, upload_id, 3, parts[2])).status_code == 200
+    response = await client.post(f"/api/v1/doc/multipart/{upload_id}/complete", headers=auth(1))
+    assert response.status_code == 201, response.text
+    data = response.json()["data"]
+    assert data["file_size"] == len(payload) and data["file_hash"] == digest
+    assert data["status"] == DocStatus.QUEUEING and data["file_uuid"] == upload_id
+    with open(storage.file_path(upload_id), "rb") as f:
+        assert f.read() == payload
+    async with engine.connect() as conn:
+        row = (await conn.execute(select(Doc.__table__).where(Doc.id == data["id"]))).mappings().one()
+    assert row["file_name"] == "大文件.pdf" and row["owner_id"] == 1
+
+    assert not os.path.exists(os.path.join(multipart_dir(), upload_id))
+    response = await client.get(f"/api/v1/doc/multipart/{upload_id}", headers=auth(1))
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_complete_rejects_hash_mismatch_and_other_users(upload_env):
+    client, engine = upload_env
+    payload = os.urandom(PART_SIZE + 10)
+    upload_id = await initiate(client, sha256="0" * 64)
+
+    assert (await put_part(client, upload_id, 1, payload, user_id=2)).status_code == 403
+    assert (await put_part(client, upload_id, 1, payload)).status_code == 200
+    response = await client.post(f"/api/v1/doc/multipart/{upload_id}/complete", headers=auth(1))
+    assert response.status_code == 422
+    assert not os.path.exists(storage.file_path(upload_id))
+    assert os.path.exists(part_path(upload_id, 1))
+
+    # 完成时传入正确的哈希即可成功，锁已在失败时释放
+    response = await client.post(f"/api/v1/doc/multipart/{upload_id}/complete", headers=auth(1),
+                                 json={"sha256": hashlib.sha256(payload).hexdigest()})
+    assert response.status_code == 201, response.text
+
+    upload_id = await initiate(client)
+    assert (await put_part(client, upload_id, 1, payload)).status_code == 200
+    assert (await client.delete(f"/api/v1/doc/multipart/{upload_id}", headers=auth(2))).status_code == 403
+    assert (await client.delete(f"/api/v1/doc/multipart/{upload_id}", headers=auth(1))).status_code == 200
+    assert not os.path.exists(os.path.join(multipart_dir(), upload_id))
+    async with engine.connect() as conn:
+        assert len((await conn.execute(select(Doc.id))).all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_complete_verifies_parts_without_whole_file_hash(upload_env):
+    client, engine = upload_env
+    payload = os.urandom(PART_SIZE)
+    upload_id = await initiate(client)
+    for number in (1, 2):
+        assert (await put_part(client, upload_id, number, payload)).status_code == 200
+
+    # 分片文件在登记后被替换（例如合并前磁盘上的内容被改动）
+    with open(part_path(upload_id, 2), "wb") as f:
+        f.write(os.urandom(PART_SIZE))
+    response = await client.post(f"/api/v1/doc/multipart/{upload_id}/complete", headers=auth(1))
+    assert response.status_code == 422 and "第 2 个分片" in response.json()["message"]
+    assert not os.path.exists(storage.file_path(upload_id))
+
+    assert (await put_part(client, upload_id, 2, payload)).status_code == 200
+    response = await client.post(f"/api/v1/doc/multipart/{upload_id}/complete", headers=auth(1))
+    assert response.status_code == 201, response.text
+    assert response.json()["data"]["file_hash"] == hashlib.sha256(payload * 2).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_parts_limited_by_declared_size(upload_env):
+    client, _ = upload_env
+    upload_id = await initiate(client, file_size=PART_SIZE + 10)
+    assert (await put_part(client, upload_id, 1, os.urandom(PART_SIZE))).status_code == 200
+    assert (await put_part(client, upload_id, 2, os.urandom(11))).status_code == 413
+    # 重传同一个分片号不重复计入
+    assert (await put_part(client, upload_id, 1, os.urandom(PART_SIZE))).status_code == 200
+    assert (await put_part(client, upload_id, 2, os.urandom(10))).status_code == 200
+
+    response = await client.get(f"/api/v1/doc/multipart/{upload_id}", headers=auth(1))
+    assert [part["size"] for part in response.json()["data"]["parts"]] == [PART_SIZE, 10]
+    assert sorted(os.listdir(os.path.join(multipart_dir(), upload_id))) == ["00001", "00002"]
+    assert (await put_part(client, upload_id, 3, b"x")).status_code == 413
+    assert sorted(os.listdir(os.path.join(multipart_dir(), upload_id))) == ["00001", "00002"]
+
+
+@pytest.mark.asyncio
+async def test_failed_resend_keeps_uploaded_part(upload_env):
+    client, _ = upload_env
+    payload = os.urandom(PART_SIZE)
+    upload_id = await initiate(client, file_size=PART_SIZE + 10)
+    assert (await put_part(client, upload_id, 1, payload)).status_code == 200
+
+    response = await client.put(f"/api/v1/doc/multipart/{upload_id}/parts/1", content=b"", headers=auth(1))
+    assert response.status_code == 422
+    response = await client.put(f"/api/v1/doc/multipart/{upload_id}/parts/1", content=chunks(os.urandom(10)),
+                                headers={**auth(1), "X-Content-SHA256": "0" * 64})
+    assert response.status_code == 422
+    # 超出声明的大小时同样保留原来的分片
+    assert (await put_part(client, upload_id, 1, os.urandom(PART_SIZE + 11))).status_code == 413
+    with open(part_path(upload_id, 1), "rb") as f:
+        assert f.read() == payload
+    assert os.listdir(os.path.join(multipart_dir(), upload_id)) == ["00001"]
+
+    assert (await put_part(client, upload_id, 2, b"0123456789")).status_code == 200
+    # 写入期间其他分片已登记、换入前才发现超出：只删除临时文件
+    temp_path = f"{part_path(upload_id, 1)}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(os.urandom(PART_SIZE + 1))
+    upload = await multipart_upload.get(upload_id, 1)
+    with pytest.raises(MessageException) as exc_info:
+        await multipart_upload.commit_part(upload, 1, temp_path, PART_SIZE + 1, "0" * 64)
+    assert exc_info.value.status_code == 413 and not os.path.exists(temp_path)
+
+    response = await client.post(f"/api/v1/doc/multipart/{upload_id}/complete", headers=auth(1))
+    assert response.status_code == 201, response.text
+    assert response.json()["data"]["file_hash"] == hashlib.sha256(payload + b"0123456789").hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_missing_part_file_and_abort_during_complete(upload_env):
+    client, _ = upload_env
+    upload_id = await initiate(client)
+    assert (await put_part(client, upload_id, 1, os.urandom(PART_SIZE))).status_code == 200
+    os.remove(part_path(upload_id, 1))
+    response = await client.post(f"/api/v1/doc/multipart/{upload_id}/complete", headers=auth(1))
+    assert response.status_code == 422 and "第 1 个分片" in response.json()["message"]
+
+    # 模拟 complete 正在合并：放弃与上传分片都返回 409，分片保留
+    assert (await put_part(client, upload_id, 1, os.urandom(PART_SIZE))).status_code == 200
+    await multipart_upload.lock(upload_id)
+    assert (await client.delete(f"/api/v1/doc/multipart/{upload_id}", headers=auth(1))).status_code == 409
+    assert (await put_part(client, upload_id, 2, b"x")).status_code == 409
+    assert os.path.exists(part_path(upload_id, 1))
+    await multipart_upload.unlock(upload_id)
+    assert (await client.delete(f"/api/v1/doc/multipart/{upload_id}", headers=auth(1))).status_code == 200
+    assert not os.path.exists(os.path.join(multipart_dir(), upload_id))
+
+
+@pytest.mark.asyncio
+async def test_collect_orphans_removes_expired_uploads(upload_env):
+    live = await multipart_upload.initiate(1, 1, "a.bin")
+    expired = await multipart_upload.initiate(1, 1, "b.bin")
+    for upload in (live, expired):
+        os.makedirs(os.path.dirname(part_path(upload["upload_id"], 1)))
+        with open(part_path(upload["upload_id"], 1), "wb") as f:
+            f.write(b"data")
+    await dependencies._redis_client.delete(multipart_upload._meta_key(expired["upload_id"]))
+
+    # 刚写入的目录在宽限期内不清理
+    assert await collect_orphans() == 0
+    assert await collect_orphans(grace=-1) == 1
+    assert os.listdir(multipart_dir()) == [live["upload_id"]]
+    assert settings.DOC_MULTIPART_GC_INTERVAL > 0
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件：test_upload.py
+
+测试文档上传：
+1. 请求体按固定大小分块写入磁盘，大小与 SHA-256 在写入过程中算出，超过大小限制时不留下临时文件
+2. 上传接口流式接收请求体，写入 QUEUEING 状态的文档记录；无权访问的项目、哈希不一致时返回错误且不保留文件
+"""
+import hashlib
+import os
+
+import pytest
+from sqlalchemy import select
+
+from src.core.base.exceptions import MessageException
+from src.core.conf.config import settings
+from src.features.doc import storage
+from src.features.doc.models import Doc, DocStatus
+from src.features.doc.storage import ChunkWriter, save_stream
+from tests.doc.helpers import auth, chunks
+
+
+@pytest.mark.asyncio
+async def test_save_stream_writes_fixed_chunks(tmp_path, monkeypatch):
+    payload = os.urandom(300_000)
+    writes = []
+    original = ChunkWriter._write
+    monkeypatch.setattr(ChunkWriter, "_write", lambda self, data: (writes.append(len(data)), original(self, data)))
+
+    path = str(tmp_path / "ab" / "abcdef")
+    size, digest = await save_stream(chunks(payload), path, max_bytes=1_000_000, chunk_size=64 * 1024)
+    assert (size, digest) == (len(payload), hashlib.sha256(payload).hexdigest())
+    with open(path, "rb") as f:
+        assert f.read() == payload
+    # 除最后一次外，每次写入都是块大小的整数倍
+    assert all(n % (64 * 1024) == 0 for n in writes[:-1]) and sum(writes) == len(payload)
+
+    with pytest.raises(MessageException) as exc_info:
+        await save_stream(chunks(payload), str(tmp_path / "cd" / "cdef"), max_bytes=100_000, chunk_size=64 * 1024)
+    assert exc_info.value.status_code == 413
+    assert os.listdir(tmp_path / "cd") == []
+
+
+@pytest.mark.asyncio
+async def test_upload_creates_queueing_doc(upload_env):
+    client, engine = upload_env
+    payload = os.urandom(200_000)
+    digest = hashlib.sha256(payload).hexdigest()
+
+    response = await client.post("/api/v1/doc/upload", params={"project_id": 1, "file_name": "报告.pdf"},
+                                 content=chunks(payload), headers={**auth(1), "X-Content-SHA256": digest})
+    assert response.status_code == 201, response.text
+    data = response.json()["data"]
+    assert data["file_size"] == len(payload) and data["file_hash"] == digest
+    assert data["status"] == DocStatus.QUEUEING
+    with open(storage.file_path(data["file_uuid"]), "rb") as f:
+        assert f.read() == payload
+    async with engine.connect() as conn:
+        row = (await conn.execute(select(Doc.__table__).where(Doc.id == data["id"]))).mappings().one()
+    assert row["file_name"] == "报告.pdf" and row["owner_id"] == 1 and row["project_id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_rejects_without_keeping_files(upload_env):
+    client, engine = upload_env
+    params = {"project_id": 1, "file_name": "a.bin"}
+
+    response = await client.post("/api/v1/doc/upload", params=params, content=b"data", headers=auth(2))
+    assert response.status_code == 403
+
+    response = await client.post("/api/v1/doc/upload", params=params, content=b"data",
+                                 headers={**auth(1), "X-Content-SHA256": "0" * 64})
+    assert response.status_code == 422
+
+    response = await client.post("/api/v1/doc/upload", params=params, content=b"x" * 100,
+                                 headers={**auth(1), "Content-Length": str(settings.DOC_UPLOAD_MAX_BYTES + 1)})
+    assert response.status_code == 413
+
+    docs_dir = settings.DOC_STORAGE_DIR
+    assert not os.path.exists(docs_dir) or all(not files for _, _, files in os.walk(docs_dir))
+    async with engine.connect() as conn:
+        assert (await conn.execute(select(Doc.id))).first() is None